@@ -0,0 +1,137 @@
+"""
+Admission control for the Research Assistant API
+Per-client token buckets, a global concurrency cap with a bounded wait queue,
+and fast rejection with a Retry-After hint once the queue is full
+"""
+
+import math
+import time
+import asyncio
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+class AdmissionRejected(Exception):
+    """Raised when a request is refused before any upstream work is done"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self, cost: float = 1.0) -> float:
+        """Consume `cost` tokens; returns 0 on success, otherwise seconds until they are available.
+        A cost above the burst is taken from a full bucket and leaves it in debt"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        needed = min(cost, self.burst)
+        if self.tokens >= needed:
+            self.tokens -= cost
+            return 0.0
+        return (needed - self.tokens) / self.rate
+
+class AdmissionSlot:
+    """A held concurrency slot. Releasing it more than once is a no-op, so every
+    path that may end a request can release without tracking the others"""
+
+    def __init__(self, controller: "AdmissionController", admitted_at: float):
+        self.controller = controller
+        self.admitted_at = admitted_at
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.controller._release(self.admitted_at)
+
+class AdmissionController:
+    def __init__(self, max_concurrency: int = 64, max_queue: int = 128, queue_timeout: float = 10.0,
+                 rate_per_minute: float = 60.0, burst: int = 20, max_clients: int = 100000):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_clients = max_clients
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected: Dict[str, int] = {"rate_limited": 0, "queue_full": 0, "queue_timeout": 0}
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._service_time = 1.0  # EWMA of seconds a request holds a slot
+
+    def charge(self, key: str, cost: float = 1.0):
+        """Take `cost` tokens from the client's bucket or raise AdmissionRejected"""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+
+        wait = bucket.take(cost)
+        if wait:
+            self.rejected["rate_limited"] += 1
+            raise AdmissionRejected(429, "Rate limit exceeded", max(1, math.ceil(wait)))
+
+    def _retry_after(self) -> int:
+        # Time for the current queue to drain at the observed service rate
+        return max(1, math.ceil(self._service_time * (self.waiting + 1) / self.max_concurrency))
+
+    async def acquire(self, key: Optional[str], cost: float = 1.0) -> AdmissionSlot:
+        """Admit a request or raise AdmissionRejected. Without a key the request
+        is not rate limited, e.g. a batch item whose batch was charged up front"""
+        if key is not None:
+            self.charge(key, cost)
+
+        if not self._slots.locked():
+            # A free slot is taken without suspending
+            await self._slots.acquire()
+        else:
+            if self.waiting >= self.max_queue:
+                self.rejected["queue_full"] += 1
+                raise AdmissionRejected(503, "Server is at capacity", self._retry_after())
+
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected["queue_timeout"] += 1
+                raise AdmissionRejected(503, "Timed out waiting for capacity", self._retry_after())
+            finally:
+                self.waiting -= 1
+
+        self.in_flight += 1
+        return AdmissionSlot(self, time.monotonic())
+
+    def _release(self, admitted_at: float):
+        self.in_flight -= 1
+        self._slots.release()
+        self._service_time = 0.9 * self._service_time + 0.1 * (time.monotonic() - admitted_at)
+
+    @asynccontextmanager
+    async def admit(self, key: Optional[str], cost: float = 1.0):
+        slot = await self.acquire(key, cost)
+        try:
+            yield slot
+        finally:
+            slot.release()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "rejected": dict(self.rejected)
+        }
@@ -0,0 +1,95 @@
+"""
+Request authentication for the Research Assistant API
+Resolves the session token the web app issues at sign-in (the session_token
+cookie, or an `Authorization: Bearer` header) to a user ID through the
+user_sessions table. Lookups are cached briefly, so a signed-out session
+stops working within cache_ttl seconds
+"""
+
+import os
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+SESSION_COOKIE = "session_token"
+
+def session_token(headers, cookies) -> Optional[str]:
+    """The bearer token if one is sent, otherwise the session cookie"""
+    scheme, _, credentials = (headers.get("authorization") or "").partition(" ")
+    if scheme.lower() == "bearer" and credentials.strip():
+        return credentials.strip()
+    return cookies.get(SESSION_COOKIE) or None
+
+class SessionAuthenticator:
+    """Maps session tokens to user IDs, caching hits and misses in an LRU"""
+
+    def __init__(self, cache_size: int = 10000, cache_ttl: float = 60.0, pool_size: int = 5):
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.pool_size = pool_size
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # getconn() raises rather than waits once the pool is empty
+        self._slots = asyncio.Semaphore(pool_size)
+        self._cache: "OrderedDict[str, Tuple[Optional[int], float]]" = OrderedDict()
+        self.lookups = 0
+
+    def _get_pool(self):
+        # Opened on first use so a pre-forking launcher never shares connections between workers
+        with self._pool_lock:
+            if self._pool is None:
+                from psycopg2.pool import ThreadedConnectionPool
+
+                dsn = os.getenv("DATABASE_URL")
+                if dsn:
+                    self._pool = ThreadedConnectionPool(1, self.pool_size, dsn)
+                else:
+                    self._pool = ThreadedConnectionPool(
+                        1, self.pool_size,
+                        host=os.getenv('PGHOST', 'localhost'),
+                        database=os.getenv('PGDATABASE', 'research_hub'),
+                        user=os.getenv('PGUSER', 'postgres'),
+                        password=os.getenv('PGPASSWORD', ''),
+                        port=os.getenv('PGPORT', '5432')
+                    )
+        return self._pool
+
+    def _lookup(self, token: str) -> Tuple[Optional[int], Optional[float]]:
+        """The session's user and seconds until it expires, or (None, None)"""
+        pool = self._get_pool()
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT user_id, EXTRACT(EPOCH FROM expires_at - NOW()) FROM user_sessions
+                    WHERE session_token = %s AND expires_at > NOW()
+                """, (token,))
+                row = cursor.fetchone()
+            conn.commit()
+        finally:
+            pool.putconn(conn)
+        return (row[0], float(row[1])) if row else (None, None)
+
+    async def user_id(self, token: Optional[str]) -> Optional[int]:
+        """The signed-in user for a session token, or None if it is unknown or expired"""
+        if not token:
+            return None
+        entry = self._cache.get(token)
+        if entry is not None and entry[1] > time.monotonic():
+            self._cache.move_to_end(token)
+            return entry[0]
+
+        async with self._slots:
+            user_id, expires_in = await asyncio.to_thread(self._lookup, token)
+        self.lookups += 1
+        ttl = self.cache_ttl if expires_in is None else min(self.cache_ttl, expires_in)
+        self._cache[token] = (user_id, time.monotonic() + ttl)
+        self._cache.move_to_end(token)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return user_id
+
+    def stats(self) -> dict:
+        return {"cached_tokens": len(self._cache), "lookups": self.lookups}
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Load Benchmark for the Research Assistant API
+Runs /chat against a local stub of the completion API and reports
+requests/sec and latency percentiles for the blocking and async paths,
+plus time-to-first-byte for /chat/stream
+"""
+
+import os
+import sys
+import time
+import json
+import asyncio
+import argparse
+import threading
+from typing import List, Dict, Any
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+STUB_PORT = 8901
+APP_PORT = 8902
+STUB_REPLY = "Start by defining a clear research question, then map the key databases for your field."
+
+def create_stub_app(latency: float) -> FastAPI:
+    """Minimal stand-in for the chat completions API with a fixed latency"""
+    stub = FastAPI()
+
+    @stub.post("/v1/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        if body.get("stream"):
+            return StreamingResponse(stream_tokens(latency), media_type="text/event-stream")
+        await asyncio.sleep(latency)
+        return {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": STUB_REPLY},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 120, "completion_tokens": 12, "total_tokens": 132}
+        }
+
+    return stub
+
+async def stream_tokens(latency: float):
+    """Spread the stub latency evenly across the streamed words"""
+    words = STUB_REPLY.split(" ")
+    for i, word in enumerate(words):
+        await asyncio.sleep(latency / len(words))
+        delta = {"content": word if i == 0 else f" {word}"}
+        yield f"data: {json.dumps({'choices': [{'index': 0, 'delta': delta}]})}\n\n"
+    yield "data: [DONE]\n\n"
+
+def start_server(app: FastAPI, port: int) -> uvicorn.Server:
+    """Run an app with uvicorn in a background thread and wait until it accepts requests"""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def run_load(path: str, total: int, concurrency: int) -> Dict[str, Any]:
+    """Fire `total` chat requests with `concurrency` in flight and time each one"""
+    latencies = []
+    failures = 0
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{APP_PORT}", timeout=120) as client:
+        async def worker():
+            nonlocal failures
+            while True:
+                try:
+                    i = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                started = time.perf_counter()
+                response = await client.post(path, json={"message": f"How do I plan a literature review? ({i})"})
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    failures += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": total,
+        "failures": failures,
+        "requests_per_sec": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1)
+    }
+
+async def measure_first_byte(total: int, concurrency: int) -> Dict[str, Any]:
+    """Time from request to first streamed chunk and to the trailer event on /chat/stream"""
+    first_bytes = []
+    completions = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{APP_PORT}", timeout=120) as client:
+        async def one(i: int):
+            async with semaphore:
+                started = time.perf_counter()
+                async with client.stream("POST", "/chat/stream", json={"message": f"How do I plan a literature review? ({i})"}) as response:
+                    first = None
+                    async for _ in response.aiter_bytes():
+                        if first is None:
+                            first = time.perf_counter() - started
+                first_bytes.append(first)
+                completions.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(one(i) for i in range(total)))
+
+    return {
+        "ttfb_p50_ms": round(percentile(first_bytes, 50) * 1000, 1),
+        "ttfb_p99_ms": round(percentile(first_bytes, 99) * 1000, 1),
+        "complete_p50_ms": round(percentile(completions, 50) * 1000, 1)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /chat against a stub completion API")
+    parser.add_argument("--requests", type=int, default=200, help="Total requests per run")
+    parser.add_argument("--concurrency", type=int, default=50, help="Requests kept in flight")
+    parser.add_argument("--latency", type=float, default=0.5, help="Stub completion latency in seconds")
+    args = parser.parse_args()
+
+    # Point both generation paths at the stub before the server module is imported
+    os.environ["OPENAI_API_BASE"] = f"http://127.0.0.1:{STUB_PORT}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    # The load comes from one address; keep per-client rate limiting out of the measurement
+    os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "1000000")
+    os.environ.setdefault("RATE_LIMIT_BURST", "1000000")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import openai
+    import chatbot_server
+
+    openai.api_base = os.environ["OPENAI_API_BASE"]
+
+    @chatbot_server.app.post("/chat/blocking")
+    async def blocking_chat(chat_message: chatbot_server.ChatMessage):
+        # The pre-async behaviour: a synchronous completion call on the event loop
+        return chatbot_server.research_assistant.generate_response(
+            chat_message.message, chat_message.conversation_history
+        )
+
+    start_server(create_stub_app(args.latency), STUB_PORT)
+    start_server(chatbot_server.app, APP_PORT)
+
+    print(f"🚀 {args.requests} requests, concurrency {args.concurrency}, stub latency {args.latency}s")
+    results = {}
+    for label, path in [("blocking", "/chat/blocking"), ("async", "/chat")]:
+        results[label] = asyncio.run(run_load(path, args.requests, args.concurrency))
+        stats = results[label]
+        print(f"   • {label:<9} {stats['requests_per_sec']:>8} req/s   "
+              f"p50 {stats['p50_ms']:>8} ms   p99 {stats['p99_ms']:>8} ms   "
+              f"failures {stats['failures']}")
+
+    results["stream"] = asyncio.run(measure_first_byte(args.requests, args.concurrency))
+    stats = results["stream"]
+    print(f"   • stream    ttfb p50 {stats['ttfb_p50_ms']} ms   ttfb p99 {stats['ttfb_p99_ms']} ms   "
+          f"complete p50 {stats['complete_p50_ms']} ms")
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
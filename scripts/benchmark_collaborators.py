@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the collaborator recommendation index
+Builds an index from seeded profiles and a power-law follow graph, then
+reports build time, lookup latency percentiles, the cost of an incremental
+refresh and agreement with a brute-force ranking on sampled users
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import timedelta
+from typing import List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from collaborator_recommender import build_index
+from seed_sample_data import DataGenerator, PasswordHasher
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def profile_row(profile: dict, updated_at) -> tuple:
+    return (profile["user_id"], profile["research_interests"], profile["methodologies"],
+            profile["specializations"], profile["collaboration_open"], "public", updated_at)
+
+def brute_force_scores(index, user_id: int, follows: set, k: int) -> List[float]:
+    """Top-k scores from one dense product against every profile"""
+    row = index.row_of[user_id]
+    scores = (index.features @ index.features[row].T).toarray().ravel()
+    keep = [j for j in np.flatnonzero(scores > 0) if j != row and index.candidates[j]
+            and (user_id, int(index.user_ids[j])) not in follows]
+    return sorted((round(float(scores[j]), 4) for j in keep), reverse=True)[:k]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark collaborator recommendations over seeded profiles")
+    parser.add_argument("--users", type=int, default=20000, help="Profiles indexed")
+    parser.add_argument("--avg-follows", type=float, default=5.0, help="Mean follows per user")
+    parser.add_argument("--top-k", type=int, default=10, help="Recommendations per lookup")
+    parser.add_argument("--lookups", type=int, default=10000, help="Lookups timed")
+    parser.add_argument("--changed", type=float, default=0.01, help="Share of profiles edited before the refresh")
+    parser.add_argument("--verify", type=int, default=50, help="Users checked against brute force")
+    parser.add_argument("--seed", type=int, default=42, help="Profile and follow seed")
+    args = parser.parse_args()
+
+    generator = DataGenerator(seed=args.seed, hasher=PasswordHasher(rounds=4))
+    user_ids = list(range(1, args.users + 1))
+    profiles = list(generator.generate_user_profiles(list(enumerate(user_ids))))
+    follows = [(f["follower_id"], f["following_id"])
+               for f in generator.generate_follows(user_ids, args.avg_follows)]
+    rows = [profile_row(profile, profile["created_at"]) for profile in profiles]
+
+    started = time.perf_counter()
+    index = build_index(rows, follows, depth=args.top_k * 2)
+    build = time.perf_counter() - started
+    print(f"🚀 {args.users:,} profiles, {len(follows):,} follows, built in {build * 1000:.0f} ms   {index.stats()}")
+
+    random.seed(args.seed)
+    lookups = [random.choice(user_ids) for _ in range(args.lookups)]
+    latencies = []
+    for user_id in lookups:
+        started = time.perf_counter()
+        index.recommend(user_id, args.top_k)
+        latencies.append(time.perf_counter() - started)
+    print(f"   • lookup    p50 {percentile(latencies, 50) * 1e6:.0f} µs   "
+          f"p99 {percentile(latencies, 99) * 1e6:.0f} µs")
+
+    # Edited profiles swap one interest; new follows reverse existing ones (followed back)
+    edited = []
+    for profile in random.sample(profiles, max(1, int(args.users * args.changed))):
+        interests = profile["research_interests"][1:] + [random.choice(generator.research_interests)]
+        edited.append(profile_row(dict(profile, research_interests=interests), generator.now + timedelta(minutes=5)))
+    existing = set(follows)
+    new_follows = [(b, a) for a, b in random.sample(follows, len(edited)) if (b, a) not in existing]
+    started = time.perf_counter()
+    index = index.updated(edited, new_follows, args.top_k)
+    refresh = time.perf_counter() - started
+    print(f"   • refresh   {len(edited):,} profiles and {len(new_follows):,} follows in {refresh * 1000:.0f} ms "
+          f"({build / refresh:.0f}x faster than a rebuild)")
+
+    follow_set = existing | set(new_follows)
+    mismatches = 0
+    for user_id in random.sample(user_ids, min(args.verify, args.users)):
+        got = [hit["score"] for hit in index.recommend(user_id, args.top_k)]
+        expected = brute_force_scores(index, user_id, follow_set, args.top_k)
+        if len(got) != len(expected) or np.abs(np.array(got) - np.array(expected)).max(initial=0) > 1e-3:
+            mismatches += 1
+    print(f"   • verified  {min(args.verify, args.users)} users against brute force, {mismatches} mismatches")
+
+if __name__ == "__main__":
+    main()
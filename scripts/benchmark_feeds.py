@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Feed benchmark for The Research Hub database
+Runs against a database seeded with a large power-law follow graph, e.g.
+
+    python seed_sample_data.py --users 50000 --avg-follows 40 --follow-skew 1.1
+
+Reports the follow graph's skew, rebuilds every feed with feed_worker's
+backfill, compares feed read latency against joining user_follows with the
+activity tables at read time, and measures the write cost of fanning out new
+papers with and without fan-out on read for high-follower accounts. The first
+trim after a batch measures every touched feed; later ones only cut feeds
+that outgrew the trim slack. The write test runs in a transaction that is
+rolled back
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from feed_worker import SOURCES, FeedWorker, connect, read_feed
+
+# The feed as a read-time join over everyone the user follows
+JOIN_FEED = "SELECT * FROM ({}) activity ORDER BY created_at DESC LIMIT %(limit)s".format(" UNION ALL ".join(
+    f"""SELECT '{kind}' AS item_type, {alias}.id AS item_id, {alias}.user_id AS actor_id, {alias}.created_at
+        FROM user_follows f JOIN {table} {alias} ON {alias}.user_id = f.following_id
+        WHERE f.follower_id = %(user_id)s AND {visible}"""
+    for kind, (table, alias, visible) in SOURCES.items()
+))
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def graph_stats(cursor, pull_threshold: int) -> Dict[str, float]:
+    cursor.execute("""
+        SELECT count(*), sum(followers), max(followers),
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY followers),
+               percentile_cont(0.99) WITHIN GROUP (ORDER BY followers),
+               count(*) FILTER (WHERE followers >= %s),
+               COALESCE(sum(followers) FILTER (WHERE followers >= %s), 0)
+        FROM (SELECT following_id, count(*) AS followers FROM user_follows GROUP BY following_id) c
+    """, (pull_threshold, pull_threshold))
+    accounts, follows, most, p50, p99, pull_accounts, pull_follows = cursor.fetchone()
+    return {"followed_accounts": accounts, "follows": follows or 0, "max_followers": most or 0,
+            "p50_followers": p50 or 0, "p99_followers": p99 or 0, "pull_accounts": pull_accounts,
+            "pull_share": (pull_follows / follows) if follows else 0.0}
+
+def time_reads(cursor, users: List[int], limit: int, join: bool) -> List[float]:
+    latencies = []
+    for user_id in users:
+        started = time.perf_counter()
+        if join:
+            cursor.execute(JOIN_FEED, {"user_id": user_id, "limit": limit})
+            cursor.fetchall()
+        else:
+            read_feed(cursor, user_id, limit)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+def time_fan_out(conn, worker: FeedWorker, authors: List[int], exempt_pull_authors: bool,
+                 batches: int) -> List[Dict[str, float]]:
+    """Insert one public paper per author and fan them out, once per batch, each
+    batch followed by a trim pass; everything runs inside a savepoint"""
+    results = []
+    with conn.cursor() as cursor:
+        cursor.execute("SAVEPOINT fan_out")
+        worker.lengths.clear()
+        for _ in range(batches):
+            cursor.execute("""
+                INSERT INTO papers (user_id, title, visibility)
+                SELECT author, 'Feed benchmark paper', 'public' FROM unnest(%s::int[]) AS a(author)
+                RETURNING id, user_id, created_at
+            """, (authors,))
+            items = cursor.fetchall()
+            started = time.perf_counter()
+            written = worker.fan_out(cursor, "paper", items, exempt_pull_authors)
+            elapsed = time.perf_counter() - started
+            feeds, worker.untrimmed = worker.untrimmed, set()
+            started = time.perf_counter()
+            trimmed = worker.trim(cursor, feeds)
+            results.append({"seconds": elapsed, "rows": written, "feeds": len(feeds),
+                            "trim_seconds": time.perf_counter() - started, "trimmed": trimmed})
+        cursor.execute("ROLLBACK TO SAVEPOINT fan_out")
+    worker.lengths.clear()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark materialized follower feeds on a seeded database")
+    parser.add_argument("--readers", type=int, default=300, help="Followers whose feeds are read")
+    parser.add_argument("--heavy-readers", type=int, default=50, help="Of those, the users following the most accounts")
+    parser.add_argument("--limit", type=int, default=50, help="Items per feed page")
+    parser.add_argument("--posts", type=int, default=500, help="New papers fanned out in the write test")
+    parser.add_argument("--batches", type=int, default=3, help="Rounds of new papers in the write test")
+    parser.add_argument("--feed-length", type=int, default=500, help="Items kept per feed")
+    parser.add_argument("--pull-threshold", type=int, default=10000, help="Followers at which fan-out on read starts")
+    parser.add_argument("--skip-backfill", action="store_true", help="Reuse feeds already built by feed_worker.py")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for sampled readers and authors")
+    args = parser.parse_args()
+
+    conn = connect()
+    worker = FeedWorker(conn, feed_length=args.feed_length, pull_threshold=args.pull_threshold)
+    worker.ensure_schema()
+    cursor = conn.cursor()
+
+    stats = graph_stats(cursor, args.pull_threshold)
+    if not stats["follows"]:
+        raise SystemExit("❌ No follows found. Run seed_sample_data.py first")
+    print(f"🚀 {stats['follows']:,} follows of {stats['followed_accounts']:,} accounts: followers p50 "
+          f"{stats['p50_followers']:.0f}, p99 {stats['p99_followers']:.0f}, max {stats['max_followers']:,}")
+    print(f"   • {stats['pull_accounts']} accounts at ≥{args.pull_threshold:,} followers hold "
+          f"{stats['pull_share']:.0%} of all follows and are read on demand")
+
+    if not args.skip_backfill:
+        started = time.perf_counter()
+        written = worker.backfill()
+        elapsed = time.perf_counter() - started
+        print(f"⏱️  Backfill: {written:,} feed rows in {elapsed:.1f}s ({written / max(elapsed, 1e-9):,.0f} rows/s)")
+
+    rng = random.Random(args.seed)
+    cursor.execute("SELECT follower_id FROM user_follows GROUP BY follower_id ORDER BY count(*) DESC LIMIT %s",
+                   (args.heavy_readers,))
+    heavy = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT DISTINCT follower_id FROM user_follows")
+    followers = [row[0] for row in cursor.fetchall()]
+    readers = heavy + rng.sample(followers, min(len(followers), max(0, args.readers - len(heavy))))
+    rng.shuffle(readers)
+    conn.commit()
+
+    # One untimed pass warms the cache for both queries
+    time_reads(cursor, readers, args.limit, join=True)
+    time_reads(cursor, readers, args.limit, join=False)
+    results = {name: time_reads(cursor, readers, args.limit, join) for name, join in [("join", True), ("feed", False)]}
+    conn.commit()
+    print(f"📊 Reads of {args.limit} items for {len(readers)} users ({len(heavy)} following the most accounts):")
+    for name, label in [("join", "read-time join"), ("feed", "materialized feed")]:
+        values = results[name]
+        print(f"   • {label:<18} p50 {percentile(values, 50) * 1000:>7.2f} ms   p99 {percentile(values, 99) * 1000:>7.2f} ms"
+              f"   max {max(values) * 1000:>7.2f} ms")
+    print(f"   • p99 speedup {percentile(results['join'], 99) / percentile(results['feed'], 99):.1f}x")
+
+    # Posting is independent of popularity, but the most-followed account always posts once
+    cursor.execute("SELECT following_id FROM user_follows GROUP BY following_id ORDER BY count(*) DESC LIMIT 1")
+    authors = [cursor.fetchone()[0]] + rng.sample(followers, min(len(followers), args.posts - 1))
+    conn.commit()
+    try:
+        print(f"✍️  Fan-out of {len(authors)} new papers, {args.batches} times:")
+        for label, exempt in [("hybrid (pull ≥ threshold)", True), ("push to every follower", False)]:
+            for batch, write in enumerate(time_fan_out(conn, worker, authors, exempt, args.batches), 1):
+                print(f"   • {label if batch == 1 else '':<26} {write['rows']:>9,} rows in {write['seconds'] * 1000:>6.0f} ms, "
+                      f"then trimming {write['feeds']:>6,} feeds ({write['trimmed']:>6,} rows) "
+                      f"{write['trim_seconds'] * 1000:>6.0f} ms")
+    finally:
+        conn.rollback()
+        conn.close()
+
+if __name__ == "__main__":
+    main()
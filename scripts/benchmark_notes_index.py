@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the per-user BM25 notes index
+Builds an index from synthetic notes (the seeder's text corpus) and reports
+build time, query latency percentiles, incremental update cost and the size
+of the grounding message
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from typing import List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from history_manager import TokenCounter
+from notes_index import UserIndex, format_grounding
+from text_corpus import TOPIC_WORDS, TextCorpus
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the BM25 notes index for one user")
+    parser.add_argument("--documents", type=int, default=2000, help="Notes indexed for the user")
+    parser.add_argument("--words", type=int, default=250, help="Mean words per note")
+    parser.add_argument("--queries", type=int, default=1000, help="Queries timed")
+    parser.add_argument("--top-k", type=int, default=5, help="Hits per query")
+    parser.add_argument("--token-budget", type=int, default=800, help="Grounding message token cap")
+    parser.add_argument("--seed", type=int, default=42, help="Corpus and query seed")
+    args = parser.parse_args()
+
+    topics = list(TOPIC_WORDS)
+    corpus = TextCorpus(topics, seed=args.seed)
+    rng = np.random.default_rng(args.seed)
+    picked = [topics[i] for i in rng.integers(0, len(topics), size=args.documents)]
+    texts = corpus.documents(rng, picked, mean_words=args.words)
+
+    index = UserIndex()
+    started = time.perf_counter()
+    for i, (topic, text) in enumerate(zip(picked, texts)):
+        index.upsert(("note", i), f"{topic} notes {i}", text)
+    build = time.perf_counter() - started
+    print(f"🚀 {args.documents} notes, ~{args.words} words each, built in {build * 1000:.0f} ms "
+          f"({args.documents / build:,.0f} docs/s)")
+
+    # Questions mix topic terms with words from the notes themselves
+    random.seed(args.seed)
+    queries = []
+    for _ in range(args.queries):
+        topic = random.choice(topics)
+        words = TOPIC_WORDS[topic][:] + random.choice(texts).split()[:40]
+        queries.append("How should I approach " + " ".join(random.sample(words, 6)) + "?")
+
+    latencies = []
+    answered = 0
+    for query in queries:
+        started = time.perf_counter()
+        hits = index.search(query, args.top_k)
+        latencies.append(time.perf_counter() - started)
+        answered += bool(hits)
+    print(f"   • search    p50 {percentile(latencies, 50) * 1000:.2f} ms   "
+          f"p99 {percentile(latencies, 99) * 1000:.2f} ms   {answered}/{len(queries)} queries with hits")
+
+    updates = []
+    for i in random.sample(range(args.documents), min(200, args.documents)):
+        started = time.perf_counter()
+        index.upsert(("note", i), f"{picked[i]} notes {i} (edited)", texts[i] + " Revised after the group meeting.")
+        updates.append(time.perf_counter() - started)
+    print(f"   • update    p50 {percentile(updates, 50) * 1000:.2f} ms   "
+          f"p99 {percentile(updates, 99) * 1000:.2f} ms   {index.stats()}")
+
+    counter = TokenCounter()
+    grounding = format_grounding(index.search(queries[0], args.top_k), counter, args.token_budget) or ""
+    print(f"   • grounding {counter.count(grounding)} tokens (cap {args.token_budget}) for: {queries[0]}")
+
+if __name__ == "__main__":
+    main()
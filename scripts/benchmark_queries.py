@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Query Benchmark for The Research Hub database
+Runs a weighted mix of the app's hot queries against a seeded database (see
+seed_sample_data.py) with concurrent clients, and reports throughput, latency
+percentiles and EXPLAIN plans. Results can be saved as a JSON baseline and
+later runs compared against it to catch regressions from schema or index changes
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Dict, Any, Tuple
+
+import psycopg2
+
+def connect():
+    """Connect using DATABASE_URL or the PG* environment variables, like the seeder"""
+    dsn = os.getenv("DATABASE_URL")
+    if dsn:
+        return psycopg2.connect(dsn)
+    return psycopg2.connect(
+        host=os.getenv('PGHOST', 'localhost'),
+        database=os.getenv('PGDATABASE', 'research_hub'),
+        user=os.getenv('PGUSER', 'postgres'),
+        password=os.getenv('PGPASSWORD', ''),
+        port=os.getenv('PGPORT', '5432')
+    )
+
+# The workload mix. params draws arguments from values sampled out of the seeded data
+WORKLOAD: List[Dict[str, Any]] = [
+    {
+        "name": "notes_search",
+        "weight": 25,
+        "sql": """
+            SELECT id, title, ts_rank(to_tsvector('english', title || ' ' || COALESCE(content, '')), query) AS rank
+            FROM research_notes, plainto_tsquery('english', %s) AS query
+            WHERE to_tsvector('english', title || ' ' || COALESCE(content, '')) @@ query
+            ORDER BY rank DESC
+            LIMIT 20
+        """,
+        "params": lambda rng, samples: (" ".join(rng.sample(samples["terms"], rng.choice([1, 1, 2]))),)
+    },
+    {
+        "name": "notes_by_user",
+        "weight": 20,
+        "sql": "SELECT * FROM research_notes WHERE user_id = %s ORDER BY updated_at DESC",
+        "params": lambda rng, samples: (rng.choice(samples["users"]),)
+    },
+    {
+        "name": "citations_by_tag_year",
+        "weight": 20,
+        "sql": """
+            SELECT id, title, authors, year FROM citations
+            WHERE tags @> %s AND year >= %s
+            ORDER BY year DESC, created_at DESC
+            LIMIT 50
+        """,
+        "params": lambda rng, samples: ([rng.choice(samples["tags"])], rng.randint(2015, 2024))
+    },
+    {
+        "name": "papers_feed",
+        "weight": 15,
+        "sql": """
+            SELECT id, title, field, created_at FROM papers
+            WHERE field = %s AND visibility = 'public'
+            ORDER BY created_at DESC
+            LIMIT 20
+        """,
+        "params": lambda rng, samples: (rng.choice(samples["fields"]),)
+    },
+    {
+        "name": "follower_feed",
+        "weight": 15,
+        "sql": """
+            SELECT p.id, p.title, p.user_id, p.created_at
+            FROM user_follows f
+            JOIN papers p ON p.user_id = f.following_id
+            WHERE f.follower_id = %s AND p.visibility = 'public'
+            ORDER BY p.created_at DESC
+            LIMIT 20
+        """,
+        "params": lambda rng, samples: (rng.choice(samples["followers"]),)
+    },
+    {
+        "name": "timeline_by_user",
+        "weight": 5,
+        "sql": "SELECT * FROM timeline_events WHERE user_id = %s ORDER BY event_date ASC",
+        "params": lambda rng, samples: (rng.choice(samples["users"]),)
+    }
+]
+
+def load_samples(conn, size: int = 1000) -> Dict[str, list]:
+    """Parameter values drawn from the seeded data, so every query hits real rows"""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT id FROM users ORDER BY random() LIMIT %s", (size,))
+        users = [row[0] for row in cursor.fetchall()]
+        cursor.execute("""
+            SELECT follower_id FROM (SELECT DISTINCT follower_id FROM user_follows) f
+            ORDER BY random() LIMIT %s
+        """, (size,))
+        followers = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT DISTINCT unnest(tags) FROM (SELECT tags FROM citations LIMIT 10000) c")
+        tags = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT DISTINCT field FROM papers WHERE field IS NOT NULL")
+        fields = [row[0] for row in cursor.fetchall()]
+        # Lexemes across the frequency range: common terms match many notes, rare ones few
+        cursor.execute("""
+            SELECT word FROM ts_stat($$
+                SELECT to_tsvector('english', title || ' ' || COALESCE(content, ''))
+                FROM (SELECT title, content FROM research_notes LIMIT 5000) n
+            $$)
+            ORDER BY ndoc DESC
+            LIMIT 2000
+        """)
+        words = [row[0] for row in cursor.fetchall()]
+    conn.commit()
+
+    terms = words[:50] + words[50::max(1, len(words) // 200)]
+    samples = {"users": users, "followers": followers or users, "tags": tags, "fields": fields, "terms": terms}
+    missing = [name for name, values in samples.items() if not values]
+    if missing:
+        raise SystemExit(f"❌ No seeded data for: {', '.join(missing)}. Run seed_sample_data.py first")
+    return samples
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def _plan_nodes(node: Dict[str, Any]) -> List[str]:
+    label = node["Node Type"]
+    if "Index Name" in node:
+        label += f" ({node['Index Name']})"
+    nodes = [label]
+    for child in node.get("Plans", []):
+        nodes.extend(_plan_nodes(child))
+    return nodes
+
+def error_line(error: psycopg2.Error) -> str:
+    """First line of a database error, without the LINE/HINT detail"""
+    return (str(error).strip().splitlines() or [type(error).__name__])[0]
+
+def explain(conn, samples: Dict[str, list], seed: int) -> Dict[str, Dict[str, Any]]:
+    """EXPLAIN ANALYZE each query once with representative parameters. A query
+    that fails gets its error instead of a plan"""
+    rng = random.Random(seed)
+    plans = {}
+    with conn.cursor() as cursor:
+        for query in WORKLOAD:
+            params = query["params"](rng, samples)
+            try:
+                cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query["sql"], params)
+            except psycopg2.Error as e:
+                conn.rollback()
+                plans[query["name"]] = {"error": error_line(e)}
+                continue
+            plan = cursor.fetchone()[0][0]
+            plans[query["name"]] = {
+                "nodes": _plan_nodes(plan["Plan"]),
+                "execution_ms": plan.get("Execution Time"),
+                "plan": plan["Plan"]
+            }
+    conn.rollback()
+    return plans
+
+def run_client(index: int, seed: int, samples: Dict[str, list], warmup_until: float, deadline: float,
+               results: List[Dict[str, List[float]]], errors: List[Dict[str, Tuple[int, str]]]):
+    rng = random.Random(seed + index)
+    weights = [query["weight"] for query in WORKLOAD]
+    latencies = defaultdict(list)
+    failures: Dict[str, Tuple[int, str]] = {}  # name -> (count, last error)
+    conn = connect()
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cursor:
+            while time.perf_counter() < deadline:
+                query = rng.choices(WORKLOAD, weights)[0]
+                params = query["params"](rng, samples)
+                started = time.perf_counter()
+                try:
+                    cursor.execute(query["sql"], params)
+                    cursor.fetchall()
+                except psycopg2.Error as e:
+                    if started >= warmup_until:
+                        count, _ = failures.get(query["name"], (0, ""))
+                        failures[query["name"]] = (count + 1, error_line(e))
+                    continue
+                if started >= warmup_until:
+                    latencies[query["name"]].append(time.perf_counter() - started)
+    finally:
+        conn.close()
+    results[index] = latencies
+    errors[index] = failures
+
+def run_workload(samples: Dict[str, list], clients: int, duration: float, warmup: float,
+                 seed: int) -> Dict[str, Any]:
+    results: List[Dict[str, List[float]]] = [{} for _ in range(clients)]
+    errors: List[Dict[str, Tuple[int, str]]] = [{} for _ in range(clients)]
+    warmup_until = time.perf_counter() + warmup
+    deadline = warmup_until + duration
+    threads = [
+        threading.Thread(target=run_client, args=(i, seed, samples, warmup_until, deadline, results, errors))
+        for i in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    merged = defaultdict(list)
+    for latencies in results:
+        for name, values in latencies.items():
+            merged[name].extend(values)
+    failures: Dict[str, Tuple[int, str]] = {}
+    for client_failures in errors:
+        for name, (count, message) in client_failures.items():
+            failures[name] = (failures.get(name, (0, ""))[0] + count, message)
+
+    queries = {}
+    for query in WORKLOAD:
+        values = merged.get(query["name"], [])
+        failed, message = failures.get(query["name"], (0, ""))
+        if not values:
+            if failed:
+                # Kept in the report: a query that always fails is a result, not a gap
+                queries[query["name"]] = {"count": 0, "errors": failed, "failed": True, "error": message}
+            continue
+        queries[query["name"]] = {
+            "count": len(values),
+            "errors": failed,
+            "qps": round(len(values) / duration, 1),
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "max_ms": round(max(values) * 1000, 2)
+        }
+    return {
+        "total_qps": round(sum(len(values) for values in merged.values()) / duration, 1),
+        "queries": queries
+    }
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Queries whose p95 grew by more than `threshold`x, and queries whose plan shape changed"""
+    regressions = []
+    print(f"\n📐 Against baseline from {baseline.get('created_at', 'unknown')} (threshold {threshold}x p95):")
+    for name, stats in report["queries"].items():
+        old = baseline.get("queries", {}).get(name)
+        if stats.get("failed"):
+            print(f"   ❌ {name:<22} every run failed: {stats['error']}")
+            regressions.append(f"{name}: every run failed")
+            continue
+        if not old or old.get("failed"):
+            print(f"   • {name:<22} new query")
+            continue
+        ratio = stats["p95_ms"] / old["p95_ms"] if old["p95_ms"] else float("inf")
+        flag = "⚠️ " if ratio > threshold else "  "
+        print(f"   {flag}{name:<22} p95 {old['p95_ms']:>8.2f} → {stats['p95_ms']:>8.2f} ms  ({ratio:.2f}x)")
+        if ratio > threshold:
+            regressions.append(f"{name}: p95 {ratio:.2f}x")
+
+        old_nodes = baseline.get("plans", {}).get(name, {}).get("nodes")
+        new_nodes = report.get("plans", {}).get(name, {}).get("nodes")
+        if old_nodes and new_nodes and old_nodes != new_nodes:
+            print(f"     plan changed: {' > '.join(old_nodes)}")
+            print(f"               to: {' > '.join(new_nodes)}")
+            regressions.append(f"{name}: plan changed")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the app's hot queries against a seeded database")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent client connections")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds run before measuring")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the query and parameter sequence")
+    parser.add_argument("--no-explain", action="store_true", help="Skip EXPLAIN ANALYZE of each query")
+    parser.add_argument("--save", metavar="PATH", help="Write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Compare against a saved baseline; exits 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="p95 growth over the baseline that counts as a regression")
+    args = parser.parse_args()
+
+    conn = connect()
+    try:
+        samples = load_samples(conn)
+        plans = {} if args.no_explain else explain(conn, samples, args.seed)
+    finally:
+        conn.close()
+
+    print(f"🚀 {args.clients} clients, {args.duration:.0f}s after {args.warmup:.0f}s warmup")
+    report = run_workload(samples, args.clients, args.duration, args.warmup, args.seed)
+    report.update({
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "config": {"clients": args.clients, "duration": args.duration, "warmup": args.warmup, "seed": args.seed},
+        "plans": plans
+    })
+
+    print(f"📊 {report['total_qps']} queries/s overall")
+    for name, stats in report["queries"].items():
+        if stats.get("failed"):
+            print(f"   ❌ {name:<22} all {stats['errors']} runs failed: {stats['error']}")
+            continue
+        print(f"   • {name:<22} {stats['qps']:>8} q/s   p50 {stats['p50_ms']:>8.2f} ms   "
+              f"p95 {stats['p95_ms']:>8.2f} ms   p99 {stats['p99_ms']:>8.2f} ms"
+              + (f"   {stats['errors']} errors" if stats["errors"] else ""))
+    if plans:
+        print("🧭 Plans:")
+        for name, plan in plans.items():
+            if "error" in plan:
+                print(f"   ❌ {name:<22} EXPLAIN failed: {plan['error']}")
+                continue
+            print(f"   • {name:<22} {plan['execution_ms']:>8.2f} ms  {' > '.join(plan['nodes'])}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Baseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s): {'; '.join(regressions)}")
+            sys.exit(1)
+        print("✅ No regressions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the Research Assistant API
+Measures how fast a replica can take traffic: the app's import cost (with
+the slowest imports), time from launch to the first healthy response for
+preloaded and per-worker imports, and a SIGHUP rollover under load that
+should not fail a single request
+"""
+
+import os
+import re
+import sys
+import time
+import signal
+import argparse
+import threading
+import subprocess
+from statistics import median
+from typing import Dict, List, Tuple
+
+import httpx
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def launcher_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [SCRIPTS_DIR, env.get("PYTHONPATH")]))
+    env.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    return env
+
+def measure_imports(module: str, top: int) -> Tuple[float, List[Tuple[float, str]]]:
+    """Wall time to import `module` in a fresh interpreter, and the slowest of
+    its direct imports by cumulative time (from -X importtime)"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            env=launcher_env(), capture_output=True, text=True, check=True)
+    # Children are listed before their parent, two spaces deeper
+    children: List[Tuple[float, str]] = []
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)", line)
+        if not match:
+            continue
+        cumulative, depth, name = int(match.group(1)) / 1e6, len(match.group(2)), match.group(3)
+        if depth == 3:
+            children.append((cumulative, name))
+        elif depth == 1:
+            if name == module:
+                return cumulative, sorted(children, reverse=True)[:top]
+            children = []
+    raise RuntimeError(f"{module} not found in -X importtime output")
+
+def wait_healthy(port: int, timeout: float) -> float:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return time.perf_counter()
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.005)
+    raise TimeoutError(f"No healthy response on port {port} within {timeout}s")
+
+def launch(port: int, workers: int, preload: bool) -> subprocess.Popen:
+    command = [sys.executable, os.path.join(SCRIPTS_DIR, "serve.py"), "--port", str(port),
+               "--host", "127.0.0.1", "--workers", str(workers), "--log-level", "warning"]
+    if not preload:
+        command.append("--no-preload")
+    return subprocess.Popen(command, env=launcher_env(), stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True)
+
+def stop(process: subprocess.Popen) -> str:
+    process.send_signal(signal.SIGTERM)
+    _, stderr = process.communicate(timeout=60)
+    return stderr
+
+def measure_startup(port: int, workers: int, preload: bool, runs: int) -> Dict[str, float]:
+    """Median time to first healthy response and to every worker accepting"""
+    first, all_ready = [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        process = launch(port, workers, preload)
+        first.append(wait_healthy(port, 60) - started)
+        log = stop(process)
+        # The launcher logs once every worker accepts; a single preloaded worker runs unsupervised
+        match = re.search(r"Workers ready: \d+/\d+ in (\d+) ms", log)
+        if match:
+            all_ready.append(int(match.group(1)) / 1000)
+    stats = {"first_healthy_ms": round(median(first) * 1000, 1)}
+    if all_ready:
+        stats["all_workers_ready_ms"] = round(median(all_ready) * 1000, 1)
+    return stats
+
+def measure_rollover(port: int, workers: int, seconds: float) -> Dict[str, float]:
+    """Send SIGHUP while clients keep calling /health; count failed requests"""
+    process = launch(port, workers, preload=True)
+    wait_healthy(port, 60)
+    counts = {"ok": 0, "failed": 0}
+    stopping = threading.Event()
+
+    def client():
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=10) as http:
+            while not stopping.is_set():
+                try:
+                    ok = http.get("/health").status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                counts["ok" if ok else "failed"] += 1
+
+    threads = [threading.Thread(target=client) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds / 2)
+    process.send_signal(signal.SIGHUP)
+    time.sleep(seconds / 2)
+    stopping.set()
+    for thread in threads:
+        thread.join()
+    log = stop(process)
+    match = re.search(r"ready in (\d+) ms, draining", log)
+    return {"requests": counts["ok"] + counts["failed"], "failed": counts["failed"],
+            "rollover_ms": int(match.group(1)) if match else None}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark how quickly the API starts serving")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Workers per launch")
+    parser.add_argument("--runs", type=int, default=5, help="Launches per configuration")
+    parser.add_argument("--port", type=int, default=8903)
+    parser.add_argument("--rollover-seconds", type=float, default=4.0, help="Load duration around the SIGHUP")
+    args = parser.parse_args()
+
+    total, slowest = measure_imports("chatbot_server", top=8)
+    print(f"🚀 import chatbot_server: {total * 1000:.0f} ms")
+    for seconds, name in slowest:
+        print(f"   • {name:<28} {seconds * 1000:>7.1f} ms")
+
+    for label, workers, preload in [("1 worker", 1, True),
+                                    (f"{args.workers} workers, preloaded", args.workers, True),
+                                    (f"{args.workers} workers, per-worker import", args.workers, False)]:
+        stats = measure_startup(args.port, workers, preload, args.runs)
+        print(f"⏱️  {label:<32} " + "   ".join(f"{key} {value}" for key, value in stats.items()))
+
+    stats = measure_rollover(args.port, args.workers, args.rollover_seconds)
+    print(f"📊 SIGHUP rollover with {args.workers} workers: {stats['rollover_ms']} ms to new generation, "
+          f"{stats['failed']} of {stats['requests']} requests failed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the suggestion/action rule engine
+Compares the original per-group keyword scans with the compiled RuleEngine
+on short questions and on pasted-abstract-sized messages
+"""
+
+import os
+import sys
+import timeit
+import random
+import argparse
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from suggestion_rules import RuleEngine
+
+ABSTRACT_SENTENCES = [
+    "We present a mixed-methods study of reproducibility practices across computational research groups.",
+    "Survey responses from 412 researchers were combined with semi-structured interviews.",
+    "Quantitative data were analyzed using hierarchical regression models to control for field effects.",
+    "Our methodology draws on grounded theory for the qualitative strand of the analysis.",
+    "Results indicate that code sharing is strongly associated with journal policies and funder mandates.",
+    "We review prior literature on open science incentives and identify gaps in existing sources.",
+    "The findings inform recommendations for institutions that plan to update their research data policies.",
+    "Limitations include self-selection bias and the cross-sectional design of the survey instrument.",
+    "Future work will extend this approach to longitudinal cohorts and publish the full dataset."
+]
+
+def legacy_suggestions(user_message: str) -> List[str]:
+    """The pre-engine implementation: one lower() and substring scan per keyword group"""
+    suggestions = []
+    if any(keyword in user_message.lower() for keyword in ["methodology", "method", "approach"]):
+        suggestions.extend(["Explore quantitative vs qualitative approaches", "Consider mixed-methods research design",
+                            "Review ethical considerations for your study"])
+    if any(keyword in user_message.lower() for keyword in ["literature", "review", "sources"]):
+        suggestions.extend(["Set up systematic search strategies", "Use citation management tools",
+                            "Identify key databases for your field"])
+    if any(keyword in user_message.lower() for keyword in ["data", "analysis", "statistics"]):
+        suggestions.extend(["Choose appropriate statistical tests", "Consider sample size requirements",
+                            "Plan for data visualization"])
+    if any(keyword in user_message.lower() for keyword in ["writing", "paper", "publish"]):
+        suggestions.extend(["Identify target journals", "Follow journal formatting guidelines",
+                            "Plan peer review timeline"])
+    return suggestions[:3]
+
+def legacy_action_items(user_message: str) -> List[dict]:
+    action_items = []
+    if any(keyword in user_message.lower() for keyword in ["start", "begin", "plan"]):
+        action_items.append({"task": "Define research question and objectives", "priority": "high", "estimated_time": "2-3 hours"})
+        action_items.append({"task": "Conduct preliminary literature search", "priority": "high", "estimated_time": "4-6 hours"})
+    if "methodology" in user_message.lower():
+        action_items.append({"task": "Select appropriate research design", "priority": "high", "estimated_time": "1-2 hours"})
+        action_items.append({"task": "Identify data collection methods", "priority": "medium", "estimated_time": "2-3 hours"})
+    if any(keyword in user_message.lower() for keyword in ["analyze", "analysis", "data"]):
+        action_items.append({"task": "Choose statistical software (R, SPSS, Python)", "priority": "medium", "estimated_time": "1 hour"})
+        action_items.append({"task": "Prepare data cleaning protocol", "priority": "high", "estimated_time": "2-4 hours"})
+    return action_items[:3]
+
+def build_message(words: int, seed: int = 42) -> str:
+    rng = random.Random(seed)
+    sentences = []
+    while sum(len(sentence.split()) for sentence in sentences) < words:
+        sentences.append(rng.choice(ABSTRACT_SENTENCES))
+    return "Can you help me with this abstract? " + " ".join(sentences)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suggestion/action keyword matching")
+    parser.add_argument("--number", type=int, default=2000, help="Evaluations per message size")
+    args = parser.parse_args()
+
+    engine = RuleEngine()
+    print(f"🔍 {args.number} evaluations per message size")
+    for words in [12, 250, 1000, 4000]:
+        message = build_message(words)
+        legacy = timeit.timeit(lambda: (legacy_suggestions(message), legacy_action_items(message)), number=args.number)
+        compiled = timeit.timeit(lambda: engine.evaluate(message), number=args.number)
+        print(f"   • {len(message):>6} chars   legacy {legacy / args.number * 1e6:>9.1f} µs   "
+              f"engine {compiled / args.number * 1e6:>9.1f} µs   ({legacy / compiled:.1f}x)")
+
+if __name__ == "__main__":
+    main()
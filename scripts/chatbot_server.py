@@ -1,19 +1,57 @@
 import os
+import math
+import importlib
+import time
+import random
 import asyncio
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-import openai
-from typing import Optional, List
+import httpx
+from typing import Optional, List, AsyncIterator
 import json
 import logging
+from contextlib import asynccontextmanager
 from datetime import datetime
+from response_cache import create_response_cache, make_cache_key, ResponseCache
+from request_coalescing import SingleFlight
+from suggestion_rules import RuleEngine, load_rules
+from history_manager import HistoryManager, TokenCounter
+from session_store import create_session_store, new_session_id
+from notes_index import NotesIndex, format_grounding
+from auth import SessionAuthenticator, session_token
+from admission import AdmissionController, AdmissionRejected, AdmissionSlot
+from metrics import (
+    REGISTRY, MetricsMiddleware, SharedMetrics, observe_stage,
+    UPSTREAM_REQUESTS, UPSTREAM_IN_FLIGHT, UPSTREAM_TOKENS
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Research Assistant API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Per-worker background work and teardown. The components it uses are
+    created further down, at import time"""
+    background_tasks: List[asyncio.Task] = []
+    if collaborators is not None:
+        background_tasks.append(asyncio.create_task(refresh_collaborators()))
+    if shared_metrics is not None:
+        background_tasks.append(asyncio.create_task(shared_metrics.run()))
+    try:
+        yield
+    finally:
+        for task in background_tasks:
+            task.cancel()
+        if shared_metrics is not None:
+            # Final counts outlive the worker, so totals don't drop when it is replaced
+            shared_metrics.flush()
+        await completion_client.aclose()
+
+app = FastAPI(title="Research Assistant API", version="1.0.0", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -23,22 +61,238 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+
+# Configure OpenAI (the SDK itself is only imported by the blocking generation path)
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_API_BASE = os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1")
+MAX_CONCURRENT_COMPLETIONS = int(os.getenv("MAX_CONCURRENT_COMPLETIONS", "64"))
+COMPLETION_TIMEOUT = float(os.getenv("COMPLETION_TIMEOUT", "60"))
+UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", "3"))
+UPSTREAM_BACKOFF_BASE = float(os.getenv("UPSTREAM_BACKOFF_BASE", "0.5"))
+UPSTREAM_BACKOFF_CAP = float(os.getenv("UPSTREAM_BACKOFF_CAP", "8"))
+
+# Configure admission control in front of the completion API
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", str(MAX_CONCURRENT_COMPLETIONS)))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "128"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10"))
+RATE_LIMIT_PER_MINUTE = float(os.getenv("RATE_LIMIT_PER_MINUTE", "60"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "20"))
+
+# Configure response caching
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL")  # e.g. redis://localhost:6379/0, shared across workers
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+
+# Configure conversation history compaction
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "3000"))
+HISTORY_SUMMARY_TOKENS = int(os.getenv("HISTORY_SUMMARY_TOKENS", "300"))
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "gpt-3.5-turbo")
+
+# Configure server-side conversation sessions
+SESSION_STORE = os.getenv("SESSION_STORE", "memory")  # "memory" or "postgres" (chat_messages table)
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "10000"))
+SESSION_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", "200"))
 
-# Configure OpenAI
-openai.api_key = os.getenv("OPENAI_API_KEY")
+# Configure authentication: the web app's session tokens, resolved through user_sessions
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
+
+# Configure grounding on the signed-in user's own notes and citations (needs DATABASE_URL or PG* settings)
+RETRIEVAL_ENABLED = os.getenv("RETRIEVAL_ENABLED", "false").lower() in ("1", "true", "yes")
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "5"))
+RETRIEVAL_TOKEN_BUDGET = int(os.getenv("RETRIEVAL_TOKEN_BUDGET", "800"))
+RETRIEVAL_SNIPPET_CHARS = int(os.getenv("RETRIEVAL_SNIPPET_CHARS", "400"))
+RETRIEVAL_MAX_USERS = int(os.getenv("RETRIEVAL_MAX_USERS", "2000"))
+RETRIEVAL_REFRESH_SECONDS = float(os.getenv("RETRIEVAL_REFRESH_SECONDS", "30"))
+
+# Set by serve.py for its workers: a directory they share state through
+SHARED_STATE_DIR = os.getenv("SHARED_STATE_DIR")
+# How often each worker publishes its metrics for /metrics on the other workers
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+
+# Configure collaborator recommendations (precomputed from user_profiles, held in memory)
+RECOMMENDATIONS_ENABLED = os.getenv("RECOMMENDATIONS_ENABLED", "false").lower() in ("1", "true", "yes")
+RECOMMENDATIONS_TOP_K = int(os.getenv("RECOMMENDATIONS_TOP_K", "10"))
+RECOMMENDATIONS_REFRESH_SECONDS = float(os.getenv("RECOMMENDATIONS_REFRESH_SECONDS", "300"))
+RECOMMENDATIONS_REBUILD_SECONDS = float(os.getenv("RECOMMENDATIONS_REBUILD_SECONDS", "86400"))
+
+# Configure follower feeds (materialized by feed_worker.py)
+FEED_ENABLED = os.getenv("FEED_ENABLED", "false").lower() in ("1", "true", "yes")
+FEED_PAGE_SIZE = int(os.getenv("FEED_PAGE_SIZE", "50"))
+
+# Configure bulk processing via /chat/batch
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))
+
+# Optional JSON rule table overriding the built-in suggestion/action rules
+SUGGESTION_RULES_PATH = os.getenv("SUGGESTION_RULES_PATH")
 
 class ChatMessage(BaseModel):
     message: str
-    conversation_history: Optional[List[dict]] = []
+    conversation_history: Optional[List[dict]] = []  # Only used when no session_id is given
+    session_id: Optional[str] = None
+    start_session: bool = False  # Keep this conversation server-side and return its session_id
 
 class ChatResponse(BaseModel):
     response: str
     suggestions: List[str]
     action_items: List[dict]
     timestamp: str
+    session_id: Optional[str] = None
+
+class BatchChatItem(BaseModel):
+    id: Optional[str] = None  # Caller's reference, echoed back with the result
+    message: str
+    conversation_history: Optional[List[dict]] = []
+
+class BatchChatRequest(BaseModel):
+    items: List[BatchChatItem]
+    concurrency: Optional[int] = None
+
+class UpstreamOverloaded(Exception):
+    """The completion API kept rate limiting or timing out after all retries"""
+
+    def __init__(self, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.retry_after = retry_after
+
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+
+class CompletionClient:
+    """Async client for the chat completions API with a pooled HTTP connection"""
+
+    def __init__(self, api_key: Optional[str], base_url: str, max_concurrency: int, timeout: float,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_cap: float = 8.0):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Created lazily so the client binds to the running event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency
+                )
+            )
+        return self._client
+
+    def _backoff_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        """Honour the upstream Retry-After if given, otherwise exponential backoff with full jitter"""
+        if response is not None:
+            try:
+                return min(float(response.headers["retry-after"]), self.backoff_cap)
+            except (KeyError, ValueError):
+                pass
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    async def _retry_or_raise(self, attempt: int, response: Optional[httpx.Response]):
+        UPSTREAM_REQUESTS.inc("timeout" if response is None else "throttled")
+        if attempt >= self.max_retries:
+            reason = f"status {response.status_code}" if response is not None else "timeout"
+            raise UpstreamOverloaded(f"Completion API overloaded ({reason})", math.ceil(self.backoff_cap))
+        # Sleep outside the semaphore so the slot serves other requests meanwhile
+        await asyncio.sleep(self._backoff_delay(attempt, response))
+
+    def _record_usage(self, model: str, usage: Optional[dict]):
+        if usage:
+            UPSTREAM_TOKENS.inc(model, "prompt", amount=usage.get("prompt_tokens", 0))
+            UPSTREAM_TOKENS.inc(model, "completion", amount=usage.get("completion_tokens", 0))
+
+    async def create(self, messages: List[dict], **params) -> dict:
+        """Request a chat completion, waiting for a free slot if all are in use"""
+        for attempt in range(self.max_retries + 1):
+            response = None
+            async with self._semaphore:
+                UPSTREAM_IN_FLIGHT.inc()
+                try:
+                    response = await self._get_client().post(
+                        "/chat/completions",
+                        json={"messages": messages, **params}
+                    )
+                except httpx.TimeoutException:
+                    pass
+                finally:
+                    UPSTREAM_IN_FLIGHT.dec()
+            if response is not None and response.status_code not in RETRYABLE_STATUS_CODES:
+                UPSTREAM_REQUESTS.inc("ok" if response.is_success else "error")
+                response.raise_for_status()
+                body = response.json()
+                self._record_usage(params.get("model", ""), body.get("usage"))
+                return body
+            await self._retry_or_raise(attempt, response)
+
+    async def stream(self, messages: List[dict], **params) -> AsyncIterator[str]:
+        """Request a streamed chat completion and yield content deltas as they arrive.
+        Retries only happen before the first token, so output is never duplicated"""
+        for attempt in range(self.max_retries + 1):
+            response = None
+            started = False
+            async with self._semaphore:
+                UPSTREAM_IN_FLIGHT.inc()
+                try:
+                    async with self._get_client().stream(
+                        "POST",
+                        "/chat/completions",
+                        json={"messages": messages, "stream": True,
+                              "stream_options": {"include_usage": True}, **params}
+                    ) as response:
+                        if response.status_code not in RETRYABLE_STATUS_CODES:
+                            UPSTREAM_REQUESTS.inc("ok" if response.is_success else "error")
+                            response.raise_for_status()
+                            async for line in response.aiter_lines():
+                                if not line.startswith("data:"):
+                                    continue
+                                data = line[len("data:"):].strip()
+                                if data == "[DONE]":
+                                    break
+                                chunk = json.loads(data)
+                                # With include_usage the last chunk carries usage and no choices
+                                self._record_usage(params.get("model", ""), chunk.get("usage"))
+                                for choice in chunk.get("choices") or []:
+                                    content = choice.get("delta", {}).get("content")
+                                    if content:
+                                        started = True
+                                        yield content
+                            return
+                except httpx.TimeoutException:
+                    if started:
+                        raise
+                finally:
+                    UPSTREAM_IN_FLIGHT.dec()
+            await self._retry_or_raise(attempt, response)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
 class ResearchAssistant:
-    def __init__(self):
+    def __init__(self, completion_client: Optional[CompletionClient] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 notes_index: Optional[NotesIndex] = None):
+        self.completion_client = completion_client
+        self.response_cache = response_cache
+        self.notes_index = notes_index
+        self.single_flight = SingleFlight()
+        self.rule_engine = RuleEngine(load_rules(SUGGESTION_RULES_PATH) if SUGGESTION_RULES_PATH else None)
+        self.completion_params = {"model": "gpt-4", "max_tokens": 1000, "temperature": 0.7}
+        self.history_manager = HistoryManager(
+            TokenCounter(self.completion_params["model"]),
+            token_budget=HISTORY_TOKEN_BUDGET,
+            summary_tokens=HISTORY_SUMMARY_TOKENS,
+            summarizer=self._summarize_history if completion_client is not None else None
+        )
         self.system_prompt = """
         You are Aethon, an advanced AI research assistant specialized in academic research, 
         scientific methodology, and scholarly writing. You provide expert guidance on:
@@ -56,145 +310,572 @@ class ResearchAssistant:
         Include relevant academic resources and methodological frameworks when appropriate.
         """
     
+    def _build_messages(self, message: str, context: List[dict]) -> List[dict]:
+        """Prepare the conversation sent to the model from an already budgeted context"""
+        messages = [{"role": "system", "content": self.system_prompt}]
+        messages.extend(context)
+        messages.append({"role": "user", "content": message})
+        return messages
+    
+    def _cache_key(self, message: str, context: List[dict]) -> str:
+        return make_cache_key(self.system_prompt, context, message)
+    
+    async def _summarize_history(self, previous_summary: Optional[str], turns: List[dict], max_tokens: int) -> str:
+        """Fold conversation turns that no longer fit the budget into the running summary"""
+        transcript = "\n".join(f"{turn.get('role', 'user')}: {turn.get('content', '')}" for turn in turns)
+        if previous_summary:
+            transcript = f"Existing summary:\n{previous_summary}\n\nNew turns:\n{transcript}"
+        response = await self.completion_client.create(
+            [
+                {"role": "system", "content": "Summarize this research conversation in a short paragraph. "
+                                              "Keep topics, decisions, sources mentioned and open questions."},
+                {"role": "user", "content": transcript}
+            ],
+            model=SUMMARY_MODEL,
+            max_tokens=max_tokens,
+            temperature=0.2
+        )
+        return response["choices"][0]["message"]["content"]
+    
+    def _build_response(self, message: str, ai_response: str) -> ChatResponse:
+        """Attach suggestions and action items to a model reply"""
+        started = time.perf_counter()
+        suggestions, action_items = self.rule_engine.evaluate(message)
+        observe_stage("postprocess", started)
+        return ChatResponse(
+            response=ai_response,
+            suggestions=suggestions,
+            action_items=action_items,
+            timestamp=datetime.now().isoformat()
+        )
+    
     def generate_response(self, message: str, history: List[dict] = None) -> ChatResponse:
+        """Blocking generation path, kept for scripts that run outside the event loop"""
         try:
-            # Prepare conversation context
-            messages = [{"role": "system", "content": self.system_prompt}]
-            
-            if history:
-                messages.extend(history[-10:])  # Keep last 10 messages for context
-            
-            messages.append({"role": "user", "content": message})
-            
-            # Generate response using OpenAI
+            import openai
+            openai.api_key = OPENAI_API_KEY
             response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=messages,
-                max_tokens=1000,
-                temperature=0.7
+                messages=self._build_messages(message, self.history_manager.window(history)),
+                **self.completion_params
             )
             
             ai_response = response.choices[0].message.content
+            return self._build_response(message, ai_response)
             
-            # Generate contextual suggestions
-            suggestions = self._generate_suggestions(message, ai_response)
-            
-            # Generate action items
-            action_items = self._generate_action_items(message, ai_response)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"AI generation failed: {str(e)}")
+    
+    async def _grounding(self, message: str, user_id: Optional[int]) -> List[dict]:
+        """A system message quoting the user's best-matching notes and citations, if any"""
+        if self.notes_index is None or user_id is None:
+            return []
+        started = time.perf_counter()
+        try:
+            hits = await self.notes_index.search(user_id, message, RETRIEVAL_TOP_K, RETRIEVAL_SNIPPET_CHARS)
+        except Exception as e:
+            # Answering without grounding beats failing the request
+            logger.warning(f"Notes retrieval failed for user {user_id}: {e}")
+            return []
+        finally:
+            observe_stage("retrieval", started)
+        content = format_grounding(hits, self.history_manager.counter, RETRIEVAL_TOKEN_BUDGET)
+        return [{"role": "system", "content": content}] if content else []
+    
+    async def _prepare_context(self, history: List[dict], message: str = "",
+                               user_id: Optional[int] = None) -> List[dict]:
+        grounding = await self._grounding(message, user_id)
+        started = time.perf_counter()
+        context = await self.history_manager.prepare(history)
+        observe_stage("history", started)
+        # Grounding is part of the context, so the cache key covers it too
+        return grounding + context
+    
+    async def _cache_lookup(self, cache_key: str) -> Optional[str]:
+        started = time.perf_counter()
+        cached = await self.response_cache.get(cache_key)
+        observe_stage("cache_lookup", started)
+        return cached
+    
+    async def _complete(self, message: str, context: List[dict], cache_key: str) -> str:
+        """Single upstream completion whose reply is written to the cache"""
+        started = time.perf_counter()
+        response = await self.completion_client.create(
+            self._build_messages(message, context),
+            **self.completion_params
+        )
+        observe_stage("upstream", started)
+        
+        ai_response = response["choices"][0]["message"]["content"]
+        if self.response_cache is not None:
+            await self.response_cache.set(cache_key, ai_response)
+        return ai_response
+    
+    async def _stream_upstream(self, message: str, context: List[dict], cache_key: str) -> AsyncIterator[str]:
+        """Single upstream token stream whose full reply is written to the cache"""
+        chunks = []
+        started = time.perf_counter()
+        async for token in self.completion_client.stream(
+            self._build_messages(message, context),
+            **self.completion_params
+        ):
+            if not chunks:
+                observe_stage("upstream_first_token", started)
+            chunks.append(token)
+            yield token
+        observe_stage("upstream", started)
+        if self.response_cache is not None:
+            await self.response_cache.set(cache_key, "".join(chunks))
+    
+    async def agenerate_response(self, message: str, history: List[dict] = None,
+                                 user_id: Optional[int] = None) -> ChatResponse:
+        """Generate a response without blocking the event loop"""
+        try:
+            context = await self._prepare_context(history, message, user_id)
+            cache_key = self._cache_key(message, context)
+            if self.response_cache is not None:
+                cached = await self._cache_lookup(cache_key)
+                if cached is not None:
+                    return self._build_response(message, cached)
             
-            return ChatResponse(
-                response=ai_response,
-                suggestions=suggestions,
-                action_items=action_items,
-                timestamp=datetime.now().isoformat()
+            # Identical prompts already in flight share one upstream completion
+            ai_response = await self.single_flight.do(
+                cache_key,
+                lambda: self._complete(message, context, cache_key)
             )
+            return self._build_response(message, ai_response)
             
+        except UpstreamOverloaded as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"AI generation failed: {str(e)}")
     
-    def _generate_suggestions(self, user_message: str, ai_response: str) -> List[str]:
-        """Generate contextual follow-up suggestions"""
-        suggestions = []
-        
-        # Research methodology suggestions
-        if any(keyword in user_message.lower() for keyword in ["methodology", "method", "approach"]):
-            suggestions.extend([
-                "Explore quantitative vs qualitative approaches",
-                "Consider mixed-methods research design",
-                "Review ethical considerations for your study"
-            ])
-        
-        # Literature review suggestions
-        if any(keyword in user_message.lower() for keyword in ["literature", "review", "sources"]):
-            suggestions.extend([
-                "Set up systematic search strategies",
-                "Use citation management tools",
-                "Identify key databases for your field"
-            ])
-        
-        # Data analysis suggestions
-        if any(keyword in user_message.lower() for keyword in ["data", "analysis", "statistics"]):
-            suggestions.extend([
-                "Choose appropriate statistical tests",
-                "Consider sample size requirements",
-                "Plan for data visualization"
-            ])
-        
-        # Writing and publication suggestions
-        if any(keyword in user_message.lower() for keyword in ["writing", "paper", "publish"]):
-            suggestions.extend([
-                "Identify target journals",
-                "Follow journal formatting guidelines",
-                "Plan peer review timeline"
-            ])
-        
-        return suggestions[:3]  # Return top 3 suggestions
-    
-    def _generate_action_items(self, user_message: str, ai_response: str) -> List[dict]:
-        """Generate specific action items based on the conversation"""
-        action_items = []
-        
-        # Research planning actions
-        if any(keyword in user_message.lower() for keyword in ["start", "begin", "plan"]):
-            action_items.append({
-                "task": "Define research question and objectives",
-                "priority": "high",
-                "estimated_time": "2-3 hours"
-            })
-            action_items.append({
-                "task": "Conduct preliminary literature search",
-                "priority": "high",
-                "estimated_time": "4-6 hours"
-            })
-        
-        # Methodology actions
-        if "methodology" in user_message.lower():
-            action_items.append({
-                "task": "Select appropriate research design",
-                "priority": "high",
-                "estimated_time": "1-2 hours"
-            })
-            action_items.append({
-                "task": "Identify data collection methods",
-                "priority": "medium",
-                "estimated_time": "2-3 hours"
-            })
-        
-        # Data analysis actions
-        if any(keyword in user_message.lower() for keyword in ["analyze", "analysis", "data"]):
-            action_items.append({
-                "task": "Choose statistical software (R, SPSS, Python)",
-                "priority": "medium",
-                "estimated_time": "1 hour"
-            })
-            action_items.append({
-                "task": "Prepare data cleaning protocol",
-                "priority": "high",
-                "estimated_time": "2-4 hours"
-            })
+    async def astream_response(self, message: str, history: List[dict] = None,
+                               user_id: Optional[int] = None) -> AsyncIterator[dict]:
+        """Yield token events as the model produces them, then a trailer event
+        carrying suggestions and action items for the full reply"""
+        chunks = []
+        try:
+            context = await self._prepare_context(history, message, user_id)
+            cache_key = self._cache_key(message, context)
+            cached = None
+            if self.response_cache is not None:
+                cached = await self._cache_lookup(cache_key)
+            
+            if cached is not None:
+                chunks.append(cached)
+                yield {"event": "token", "content": cached}
+            else:
+                async for token in self.single_flight.stream(
+                    cache_key,
+                    lambda: self._stream_upstream(message, context, cache_key)
+                ):
+                    chunks.append(token)
+                    yield {"event": "token", "content": token}
+        except UpstreamOverloaded as e:
+            yield {"event": "error", "detail": str(e), "retry_after": e.retry_after}
+            return
+        except Exception as e:
+            yield {"event": "error", "detail": f"AI generation failed: {str(e)}"}
+            return
         
-        return action_items[:3]  # Return top 3 action items
+        response = self._build_response(message, "".join(chunks))
+        yield {
+            "event": "done",
+            "suggestions": response.suggestions,
+            "action_items": response.action_items,
+            "timestamp": response.timestamp
+        }
 
 # Initialize the research assistant
-research_assistant = ResearchAssistant()
+completion_client = CompletionClient(
+    api_key=OPENAI_API_KEY,
+    base_url=OPENAI_API_BASE,
+    max_concurrency=MAX_CONCURRENT_COMPLETIONS,
+    timeout=COMPLETION_TIMEOUT,
+    max_retries=UPSTREAM_MAX_RETRIES,
+    backoff_base=UPSTREAM_BACKOFF_BASE,
+    backoff_cap=UPSTREAM_BACKOFF_CAP
+)
+response_cache = create_response_cache(RESPONSE_CACHE_URL, RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)
+notes_index = NotesIndex(RETRIEVAL_MAX_USERS, RETRIEVAL_REFRESH_SECONDS) if RETRIEVAL_ENABLED else None
+research_assistant = ResearchAssistant(completion_client, response_cache, notes_index)
+collaborators = None
+if RECOMMENDATIONS_ENABLED:
+    # NumPy and SciPy are only needed when recommendations are served
+    from collaborator_recommender import CollaboratorRecommender
+    collaborators = CollaboratorRecommender(
+        top_k=RECOMMENDATIONS_TOP_K,
+        refresh_interval=RECOMMENDATIONS_REFRESH_SECONDS,
+        rebuild_interval=RECOMMENDATIONS_REBUILD_SECONDS,
+        # One worker refreshes the index and the others map its copy
+        shared_dir=os.path.join(SHARED_STATE_DIR, "collaborators") if SHARED_STATE_DIR else None
+    )
+feed_reader = None
+if FEED_ENABLED:
+    from feed_worker import FeedReader, decode_cursor, encode_cursor
+    feed_reader = FeedReader()
+session_store = create_session_store(SESSION_STORE, SESSION_MAX_SESSIONS, SESSION_MAX_MESSAGES)
+# Only features that act on a user's own data need to know who is asking
+authenticator = None
+if SESSION_STORE == "postgres" or any(component is not None for component in (notes_index, collaborators, feed_reader)):
+    authenticator = SessionAuthenticator(cache_ttl=AUTH_CACHE_TTL)
+admission = AdmissionController(
+    max_concurrency=ADMISSION_MAX_CONCURRENCY,
+    max_queue=ADMISSION_MAX_QUEUE,
+    queue_timeout=ADMISSION_QUEUE_TIMEOUT,
+    rate_per_minute=RATE_LIMIT_PER_MINUTE,
+    burst=RATE_LIMIT_BURST
+)
+
+def warm() -> dict:
+    """Do the one-off work every worker would otherwise repeat on its first
+    requests: load the token encoding, import the database driver and build
+    the collaborator index. Run once in the launcher's parent process so
+    forked workers inherit the result. Leaves no connections open. Returns
+    seconds per step"""
+    timings = {}
+    started = time.perf_counter()
+    research_assistant.history_manager.counter.count("warm up the token encoding")
+    timings["token_encoding"] = time.perf_counter() - started
+    if authenticator is not None:
+        started = time.perf_counter()
+        # Imported only for its side effect: workers find the driver already loaded
+        importlib.import_module("psycopg2.pool")
+        timings["psycopg2"] = time.perf_counter() - started
+    if collaborators is not None:
+        started = time.perf_counter()
+        try:
+            collaborators.rebuild()
+            timings["collaborator_index"] = time.perf_counter() - started
+        except Exception as e:
+            # Workers build it themselves at startup
+            logger.warning(f"Collaborator index not built before fork: {e}")
+    return timings
+
+async def refresh_collaborators():
+    """Build the collaborator index if warm() did not, then keep it fresh"""
+    while True:
+        if collaborators.index is not None:
+            await asyncio.sleep(collaborators.refresh_interval)
+        try:
+            await asyncio.to_thread(collaborators.refresh)
+        except Exception as e:
+            logger.warning(f"Collaborator index refresh failed: {e}")
+            await asyncio.sleep(10)  # Database unreachable; don't spin
+            continue
+        if collaborators.index is None:
+            await asyncio.sleep(1)  # Waiting for the leading worker's first build
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+def client_key(request: Request) -> str:
+    """Rate-limit identity: API key header, then session cookie, then client address"""
+    api_key = request.headers.get("x-api-key") or request.headers.get("authorization")
+    if api_key:
+        return f"key:{api_key}"
+    token = session_token(request.headers, request.cookies)
+    if token:
+        return f"session:{token}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+async def current_user(request: Request) -> Optional[int]:
+    """The signed-in user, or None for anonymous requests. A failed lookup also
+    gives None: chat answers without the user's own data rather than failing"""
+    if authenticator is None:
+        return None
+    try:
+        return await authenticator.user_id(session_token(request.headers, request.cookies))
+    except Exception as e:
+        logger.warning(f"Session lookup failed: {e}")
+        return None
+
+async def require_user(request: Request) -> int:
+    """The signed-in user; 401 for anonymous requests"""
+    if authenticator is None:
+        raise HTTPException(status_code=401, detail="Authentication is not configured")
+    try:
+        user_id = await authenticator.user_id(session_token(request.headers, request.cookies))
+    except Exception as e:
+        logger.warning(f"Session lookup failed: {e}")
+        raise HTTPException(status_code=503, detail="Authentication is unavailable", headers={"Retry-After": "10"})
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="Not signed in", headers={"WWW-Authenticate": "Bearer"})
+    return user_id
+
+async def load_session(session_id: str, user_id: Optional[int]) -> List[dict]:
+    """A session's history; 404 if it does not exist or belongs to someone else"""
+    history = await session_store.load(session_id, user_id)
+    if history is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return history
+
+async def resolve_session(chat_message: ChatMessage, user_id: Optional[int]):
+    """Session ID and server-side history for a request. A new session owned
+    by the caller, seeded from any history the client sent, is only started
+    on request; otherwise the request is stateless and the session ID is None"""
+    if chat_message.session_id:
+        return chat_message.session_id, await load_session(chat_message.session_id, user_id)
+    
+    history = chat_message.conversation_history or []
+    if not chat_message.start_session:
+        return None, history
+    session_id = new_session_id()
+    await session_store.seed(session_id, history, user_id)
+    return session_id, history
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(chat_message: ChatMessage):
+async def chat_endpoint(chat_message: ChatMessage, request: Request):
     """Main chat endpoint for research assistance"""
+    observe_stage("validation", request.state.received_at)
     try:
-        response = research_assistant.generate_response(
-            chat_message.message, 
-            chat_message.conversation_history
-        )
+        user_id = await current_user(request)
+        session_id, history = await resolve_session(chat_message, user_id)
+        async with admission.admit(client_key(request)):
+            response = await research_assistant.agenerate_response(
+                chat_message.message, 
+                history,
+                user_id
+            )
+        if session_id is not None:
+            await session_store.append_turn(session_id, chat_message.message, response.response, user_id)
+        response.session_id = session_id
         return response
+    except (HTTPException, AdmissionRejected):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def format_sse(event: dict) -> str:
+    """Encode an assistant stream event as a server-sent event frame"""
+    payload = {key: value for key, value in event.items() if key != "event"}
+    return f"event: {event['event']}\ndata: {json.dumps(payload)}\n\n"
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """Streaming response that holds an admission slot for as long as it is
+    being sent. The slot is released however sending ends, including when the
+    client is gone before the body generator ever starts"""
+
+    def __init__(self, content, slot: AdmissionSlot, **kwargs):
+        super().__init__(content, **kwargs)
+        self.slot = slot
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.slot.release()
+
+async def session_stream_events(chat_message: ChatMessage, user_id: Optional[int], session_id: Optional[str],
+                                history: List[dict]) -> AsyncIterator[dict]:
+    """Stream events for a request, recording the turn once the reply is complete"""
+    chunks = []
+    async for event in research_assistant.astream_response(chat_message.message, history, user_id):
+        if event["event"] == "token":
+            chunks.append(event["content"])
+        elif event["event"] == "done":
+            if session_id is not None:
+                await session_store.append_turn(session_id, chat_message.message, "".join(chunks), user_id)
+            event = {**event, "session_id": session_id}
+        yield event
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(chat_message: ChatMessage, request: Request):
+    """Streaming chat endpoint: tokens as server-sent events, then a `done` trailer"""
+    observe_stage("validation", request.state.received_at)
+    # Admit before the response starts so overload is a fast 429/503, not a broken stream
+    user_id = await current_user(request)
+    slot = await admission.acquire(client_key(request))
+    try:
+        session_id, history = await resolve_session(chat_message, user_id)
+    except Exception:
+        slot.release()
+        raise
+    events = session_stream_events(chat_message, user_id, session_id, history)
+    return AdmittedStreamingResponse(
+        (format_sse(event) async for event in events),
+        slot,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def run_batch(items: List[BatchChatItem], concurrency: int) -> AsyncIterator[str]:
+    """Run batch items with bounded concurrency, yielding one NDJSON line per
+    item as it completes. Each running item holds its own admission slot, so a
+    batch competes for capacity like the same number of single requests. A
+    failing item produces an error line, not a failed batch"""
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def run_item(index: int, item: BatchChatItem) -> dict:
+        async with semaphore:
+            try:
+                # The batch was rate limited as a whole; each item only needs a slot
+                async with admission.admit(None):
+                    response = await research_assistant.agenerate_response(item.message, item.conversation_history)
+                return {"index": index, "id": item.id, "status": "ok", "result": jsonable_encoder(response)}
+            except AdmissionRejected as e:
+                return {"index": index, "id": item.id, "status": "error", "error": e.detail,
+                        "retry_after": e.retry_after}
+            except HTTPException as e:
+                return {"index": index, "id": item.id, "status": "error", "error": e.detail}
+            except Exception as e:
+                return {"index": index, "id": item.id, "status": "error", "error": str(e)}
+    
+    tasks = [asyncio.ensure_future(run_item(index, item)) for index, item in enumerate(items)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield json.dumps(await next_done) + "\n"
+    finally:
+        # Stop outstanding work if the client goes away mid-batch
+        for task in tasks:
+            task.cancel()
+
+@app.post("/chat/batch")
+async def chat_batch_endpoint(batch: BatchChatRequest, request: Request):
+    """Bulk chat endpoint: results stream back as NDJSON in completion order"""
+    observe_stage("validation", request.state.received_at)
+    if len(batch.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {BATCH_MAX_ITEMS} items")
+    
+    # Every item costs a rate-limit token, charged before anything runs
+    admission.charge(client_key(request), cost=len(batch.items))
+    concurrency = min(batch.concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+    return StreamingResponse(
+        run_batch(batch.items, max(1, concurrency)),
+        media_type="application/x-ndjson"
+    )
+
+@app.get("/admission/stats")
+async def admission_stats():
+    """In-flight and queued requests, and rejections by reason"""
+    return admission.stats()
+
+@app.get("/sessions/{session_id}")
+async def get_session(session_id: str, request: Request):
+    """Server-side history for one of the caller's sessions"""
+    user_id = await current_user(request)
+    return {"session_id": session_id, "history": await load_session(session_id, user_id)}
+
+def collect_component_metrics():
+    """Cache, coalescing, admission, session and optional component figures read at scrape time"""
+    cache = response_cache.stats()
+    coalescing = research_assistant.single_flight.stats()
+    queue = admission.stats()
+    backend = {"backend": cache["backend"]}
+    yield "response_cache_hits_total", "counter", "Response cache hits", [(backend, cache["hits"])]
+    yield "response_cache_misses_total", "counter", "Response cache misses", [(backend, cache["misses"])]
+    if cache["entries"] is not None:
+        yield "response_cache_entries", "gauge", "Entries held by the response cache", [(backend, cache["entries"])]
+    if cache["evictions"] is not None:
+        yield "response_cache_evictions_total", "counter", "Entries evicted by LRU or TTL", [(backend, cache["evictions"])]
+    yield "coalescing_upstream_calls_total", "counter", "Upstream calls started by single-flight", [({}, coalescing["upstream_calls"])]
+    yield "coalescing_coalesced_total", "counter", "Requests served by an in-flight call", [({}, coalescing["coalesced"])]
+    yield "admission_in_flight", "gauge", "Requests holding an admission slot", [({}, queue["in_flight"])]
+    yield "admission_waiting", "gauge", "Requests queued for an admission slot", [({}, queue["waiting"])]
+    yield "admission_rejected_total", "counter", "Requests rejected by admission control", [
+        ({"reason": reason}, count) for reason, count in queue["rejected"].items()
+    ]
+    yield "sessions_active", "gauge", "Sessions held in memory", [({}, session_store.stats()["sessions"])]
+    if notes_index is not None:
+        retrieval = notes_index.stats()
+        yield "retrieval_users_indexed", "gauge", "Users with a notes index in memory", [({}, retrieval["users"])]
+        yield "retrieval_documents_indexed", "gauge", "Notes and citations held in memory", [({}, retrieval["documents"])]
+        yield "retrieval_index_builds_total", "counter", "Full per-user index builds", [({}, retrieval["builds"])]
+        yield "retrieval_index_refreshes_total", "counter", "Incremental per-user index refreshes", [({}, retrieval["refreshes"])]
+    if collaborators is not None:
+        recommendations = collaborators.stats()
+        yield "collaborator_index_users", "gauge", "Profiles in the collaborator index", [({}, recommendations["users"])]
+        yield "collaborator_index_refreshes_total", "counter", "Incremental collaborator index refreshes", [({}, recommendations["refreshes"])]
+        yield "collaborator_index_refresh_seconds", "gauge", "Duration of the last build or refresh", [({}, recommendations["last_refresh_seconds"])]
+    if authenticator is not None:
+        yield "auth_session_lookups_total", "counter", "Session tokens looked up in user_sessions", [({}, authenticator.lookups)]
+    if feed_reader is not None:
+        yield "feed_reads_total", "counter", "Feed pages read", [({}, feed_reader.reads)]
+
+REGISTRY.register_collector(collect_component_metrics)
+shared_metrics = (SharedMetrics(REGISTRY, os.path.join(SHARED_STATE_DIR, "metrics"), METRICS_FLUSH_SECONDS)
+                  if SHARED_STATE_DIR else None)
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus text exposition of request, stage, upstream and component metrics,
+    summed over all of serve.py's workers (gauges per worker, by pid)"""
+    registry = shared_metrics or REGISTRY
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/retrieval/search")
+async def retrieval_search(request: Request, q: str, k: int = RETRIEVAL_TOP_K):
+    """The signed-in user's notes and citations that would ground an answer to `q`"""
+    if notes_index is None:
+        raise HTTPException(status_code=404, detail="Retrieval is not enabled")
+    user_id = await require_user(request)
+    hits = await notes_index.search(user_id, q, min(k, 50), RETRIEVAL_SNIPPET_CHARS)
+    return {"user_id": user_id, "hits": [hit.to_dict() for hit in hits]}
+
+@app.post("/retrieval/refresh")
+async def retrieval_refresh(request: Request):
+    """Pick up the signed-in user's note and citation edits on their next question"""
+    if notes_index is None:
+        raise HTTPException(status_code=404, detail="Retrieval is not enabled")
+    user_id = await require_user(request)
+    notes_index.invalidate(user_id)
+    return {"user_id": user_id, "status": "scheduled"}
+
+@app.get("/collaborators/stats")
+async def collaborator_stats():
+    """Collaborator index size and freshness"""
+    if collaborators is None:
+        raise HTTPException(status_code=404, detail="Recommendations are not enabled")
+    return collaborators.stats()
+
+@app.get("/collaborators")
+async def recommend_collaborators(request: Request, k: int = RECOMMENDATIONS_TOP_K):
+    """Researchers with profiles like the signed-in user's who are open to
+    collaboration and not yet followed"""
+    if collaborators is None:
+        raise HTTPException(status_code=404, detail="Recommendations are not enabled")
+    user_id = await require_user(request)
+    if collaborators.index is None:
+        raise HTTPException(status_code=503, detail="Collaborator index is still building", headers={"Retry-After": "10"})
+    recommendations = collaborators.recommend(user_id, k)
+    if recommendations is None:
+        raise HTTPException(status_code=404, detail=f"No profile for user {user_id}")
+    return {"user_id": user_id, "collaborators": recommendations}
+
+@app.get("/feed")
+async def get_feed(request: Request, limit: int = FEED_PAGE_SIZE, before: Optional[str] = None):
+    """Newest activity from the accounts the signed-in user follows; pass
+    next_before back as `before` for the next page"""
+    if feed_reader is None:
+        raise HTTPException(status_code=404, detail="Feeds are not enabled")
+    user_id = await require_user(request)
+    try:
+        cursor = decode_cursor(before) if before else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid feed cursor")
+    items = await feed_reader.aread(user_id, max(1, min(limit, 200)), cursor)
+    return {"user_id": user_id, "items": items, "next_before": encode_cursor(items[-1]) if items else None}
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "Research Assistant API"}
 
+@app.get("/cache/stats")
+async def cache_stats():
+    """Response cache hit/miss counters"""
+    return response_cache.stats()
+
+@app.get("/coalescing/stats")
+async def coalescing_stats():
+    """Upstream calls made versus requests coalesced onto an in-flight call"""
+    return research_assistant.single_flight.stats()
+
 @app.get("/research-topics")
 async def get_research_topics():
     """Get trending research topics"""
@@ -212,4 +893,6 @@ async def get_research_topics():
     }
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Single process for development; serve.py is the multi-worker production entry point
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", "8000")))
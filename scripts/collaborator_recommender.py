@@ -0,0 +1,504 @@
+"""
+Collaborator recommendations for The Research Hub
+Encodes user_profiles (research interests, specializations, methodologies)
+as IDF-weighted sparse vectors and precomputes each user's most similar
+researchers who are open to collaboration and not already followed. Top-k
+lists are computed in blocked matrix products, held in memory for lookups,
+and refreshed incrementally as profiles and follows change. Workers of one
+launcher can share a directory: one of them keeps the index fresh and
+publishes it there, and the others memory-map what it publishes
+"""
+
+import os
+import json
+import time
+import fcntl
+import shutil
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+logger = logging.getLogger(__name__)
+
+# How much a shared term counts, by profile field
+FIELD_WEIGHTS = {"interest": 1.0, "specialization": 1.5, "method": 0.5}
+DENSE_VOCABULARY_LIMIT = 4096  # Below this, tiles use dense BLAS products instead of sparse ones
+
+# (user_id, research_interests, methodologies, specializations, collaboration_open, privacy_level, updated_at)
+ProfileRow = Tuple[int, Optional[List[str]], Optional[List[str]], Optional[List[str]], Optional[bool], Optional[str], datetime]
+
+def profile_terms(interests: Optional[Sequence[str]], methodologies: Optional[Sequence[str]],
+                  specializations: Optional[Sequence[str]]) -> List[str]:
+    """Field-prefixed, case-folded terms such as "interest:machine learning" """
+    terms = []
+    for field, values in (("interest", interests), ("method", methodologies), ("specialization", specializations)):
+        terms.extend(f"{field}:{value.strip().lower()}" for value in values or () if value and value.strip())
+    return terms
+
+class ProfileEncoder:
+    """Term vocabulary with smoothed IDF weights, fixed at full builds. Terms
+    first seen by an incremental refresh get the weight of a term used once"""
+
+    def __init__(self, documents: Sequence[List[str]]):
+        self.vocabulary: Dict[str, int] = {}
+        counts: Dict[int, int] = {}
+        for terms in documents:
+            for term in set(terms):
+                column = self.vocabulary.setdefault(term, len(self.vocabulary))
+                counts[column] = counts.get(column, 0) + 1
+        self.documents = max(1, len(documents))
+        df = np.array([counts[column] for column in range(len(self.vocabulary))], dtype=np.float32)
+        self.idf = np.log((1 + self.documents) / (1 + df)) + 1
+        self.terms = list(self.vocabulary)
+
+    def _column(self, term: str) -> int:
+        column = self.vocabulary.get(term)
+        if column is None:
+            column = self.vocabulary[term] = len(self.terms)
+            self.terms.append(term)
+            self.idf = np.append(self.idf, np.float32(np.log((1 + self.documents) / 2) + 1))
+        return column
+
+    def encode(self, documents: Sequence[List[str]]) -> sp.csr_matrix:
+        """L2-normalized rows, so row products are cosine similarities"""
+        indptr, indices, data = [0], [], []
+        for terms in documents:
+            columns = sorted({self._column(term) for term in terms})
+            indices.extend(columns)
+            data.extend(FIELD_WEIGHTS[self.terms[column].split(":", 1)[0]] for column in columns)
+            indptr.append(len(indices))
+        matrix = sp.csr_matrix((np.array(data, dtype=np.float32), np.array(indices, dtype=np.int32),
+                                np.array(indptr, dtype=np.int64)), shape=(len(documents), len(self.terms)))
+        matrix.data *= self.idf[matrix.indices]
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sp.csr_matrix(sp.diags(1 / norms) @ matrix, dtype=np.float32)
+
+def _merge_top(neighbors: np.ndarray, scores: np.ndarray, depth: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Best `depth` columns per row, sorted by descending score"""
+    if neighbors.shape[1] > depth:
+        keep = np.argpartition(-scores, depth - 1, axis=1)[:, :depth]
+        neighbors = np.take_along_axis(neighbors, keep, axis=1)
+        scores = np.take_along_axis(scores, keep, axis=1)
+    order = np.argsort(-scores, axis=1, kind="stable")
+    return np.take_along_axis(neighbors, order, axis=1), np.take_along_axis(scores, order, axis=1)
+
+def _resized(matrix: sp.csr_matrix, rows: int, columns: int) -> sp.csr_matrix:
+    """The same CSR entries in a larger shape; new rows are empty"""
+    indptr = np.concatenate((matrix.indptr, np.full(rows - matrix.shape[0], matrix.indptr[-1])))
+    return sp.csr_matrix((matrix.data, matrix.indices, indptr), shape=(rows, columns))
+
+class CollaboratorIndex:
+    """Profile vectors and precomputed top-`depth` candidates per user. Rows are
+    users in load order; lists keep more candidates than are served (depth >
+    top_k) so that incremental updates can drop stale entries without a full
+    recompute. Updates return a new index and never modify a published one"""
+
+    def __init__(self, user_ids: np.ndarray, features: sp.csr_matrix, candidates: np.ndarray,
+                 follows: sp.csr_matrix, encoder: ProfileEncoder, depth: int, block_rows: int = 2048,
+                 block_candidates: int = 8192):
+        self.user_ids = user_ids
+        self.row_of: Dict[int, int] = {int(user_id): row for row, user_id in enumerate(user_ids)}
+        self.features = features
+        self.candidates = candidates
+        self.follows = follows
+        self.encoder = encoder
+        self.depth = depth
+        self.block_rows = block_rows
+        self.block_candidates = block_candidates
+        self.neighbors = np.full((len(user_ids), depth), -1, dtype=np.int32)
+        self.scores = np.full((len(user_ids), depth), -np.inf, dtype=np.float32)
+        self.built_at = time.time()
+
+    def _similarities(self, rows: np.ndarray, columns: np.ndarray) -> np.ndarray:
+        """Dense (rows, columns) tile of cosine similarities with excluded pairs at -inf:
+        columns closed to collaboration, the user themself, and users they follow"""
+        left, right = self.features[rows], self.features[columns]
+        if self.features.shape[1] <= DENSE_VOCABULARY_LIMIT:
+            tile = left.toarray() @ right.toarray().T
+        else:
+            tile = (left @ right.T).toarray()
+        tile[tile <= 0] = -np.inf
+        tile[:, ~self.candidates[columns]] = -np.inf
+        tile[rows[:, None] == columns[None, :]] = -np.inf
+        followed = self.follows[rows][:, columns].tocoo()
+        tile[followed.row, followed.col] = -np.inf
+        return tile.astype(np.float32, copy=False)
+
+    def _top_for(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-depth candidates for `rows` against every user, one tile at a time"""
+        neighbors = np.full((len(rows), self.depth), -1, dtype=np.int32)
+        scores = np.full((len(rows), self.depth), -np.inf, dtype=np.float32)
+        open_rows = np.flatnonzero(self.candidates).astype(np.int32)
+        for start in range(0, len(open_rows), self.block_candidates):
+            columns = open_rows[start:start + self.block_candidates]
+            tile = self._similarities(rows, columns)
+            neighbors, scores = _merge_top(
+                np.hstack((neighbors, np.broadcast_to(columns, tile.shape))),
+                np.hstack((scores, tile)), self.depth
+            )
+        neighbors[np.isinf(scores)] = -1
+        return neighbors, scores
+
+    def build(self):
+        for start in range(0, len(self.user_ids), self.block_rows):
+            rows = np.arange(start, min(start + self.block_rows, len(self.user_ids)))
+            self.neighbors[rows], self.scores[rows] = self._top_for(rows)
+        self.built_at = time.time()
+
+    def updated(self, profiles: Sequence[ProfileRow], new_follows: Sequence[Tuple[int, int]],
+                top_k: int) -> "CollaboratorIndex":
+        """A new index with changed or added profiles and new follow edges applied.
+        Every list drops entries for changed users and merges in their new scores;
+        lists that fall below top_k valid entries, and the changed users' own,
+        are recomputed in full"""
+        index = CollaboratorIndex.__new__(CollaboratorIndex)
+        index.__dict__.update(self.__dict__)
+        index.row_of = dict(self.row_of)
+
+        added = [int(user_id) for user_id, *_ in profiles if int(user_id) not in self.row_of]
+        index.user_ids = np.concatenate((self.user_ids, np.array(added, dtype=self.user_ids.dtype)))
+        for user_id in added:
+            index.row_of[user_id] = len(index.row_of)
+        total = len(index.user_ids)
+        grow = total - len(self.user_ids)
+        index.neighbors = np.vstack((self.neighbors, np.full((grow, self.depth), -1, dtype=np.int32)))
+        index.scores = np.vstack((self.scores, np.full((grow, self.depth), -np.inf, dtype=np.float32)))
+        index.candidates = np.concatenate((self.candidates, np.zeros(grow, dtype=bool)))
+
+        changed = np.array([index.row_of[int(row[0])] for row in profiles], dtype=np.int32)
+        if len(changed):
+            encoded = self.encoder.encode([profile_terms(*row[1:4]) for row in profiles])
+            features = _resized(self.features, total, encoded.shape[1])
+            keep = np.ones(total, dtype=np.float32)
+            keep[changed] = 0
+            place = sp.csr_matrix((np.ones(len(changed), dtype=np.float32), (changed, np.arange(len(changed)))),
+                                  shape=(total, len(changed)))
+            index.features = sp.csr_matrix(sp.diags(keep) @ features + place @ encoded, dtype=np.float32)
+            index.features.eliminate_zeros()
+            for row, profile in zip(changed, profiles):
+                index.candidates[row] = bool(profile[4]) and profile[5] != "private"
+
+        follows = _resized(self.follows, total, total)
+        edges = [(index.row_of[a], index.row_of[b]) for a, b in new_follows if a in index.row_of and b in index.row_of]
+        if edges:
+            rows, columns = np.array(edges, dtype=np.int32).T
+            follows = (follows + sp.csr_matrix((np.ones(len(edges), dtype=bool), (rows, columns)),
+                                               shape=(total, total))).astype(bool).tocsr()
+        index.follows = follows
+
+        # Entries for changed users are stale, as are newly followed users
+        full_before = np.isfinite(index.scores).all(axis=1)
+        stale = np.isin(index.neighbors, changed)
+        if edges:
+            hit_edges, hit_columns = np.nonzero(index.neighbors[rows] == columns[:, None])
+            stale[rows[hit_edges], hit_columns] = True
+        index.neighbors[stale] = -1
+        index.scores[stale] = -np.inf
+
+        if len(changed):
+            for start in range(0, total, self.block_rows):
+                rows = np.arange(start, min(start + self.block_rows, total))
+                tile = index._similarities(rows, changed)
+                index.neighbors[rows], index.scores[rows] = _merge_top(
+                    np.hstack((index.neighbors[rows], np.broadcast_to(changed, tile.shape))),
+                    np.hstack((index.scores[rows], tile)), self.depth
+                )
+
+        # A list that was full may have lost entries that someone outside it now replaces
+        valid = np.isfinite(index.scores).sum(axis=1)
+        recompute = np.union1d(changed, np.flatnonzero(full_before & (valid < top_k))).astype(np.int64)
+        for start in range(0, len(recompute), self.block_rows):
+            rows = recompute[start:start + self.block_rows]
+            index.neighbors[rows], index.scores[rows] = index._top_for(rows)
+        index.neighbors[np.isinf(index.scores)] = -1
+        return index
+
+    def recommend(self, user_id: int, k: int) -> Optional[List[dict]]:
+        """Top-k collaborators for a user, or None if they have no profile"""
+        row = self.row_of.get(user_id)
+        if row is None:
+            return None
+        results = []
+        mine = set(self.features.indices[self.features.indptr[row]:self.features.indptr[row + 1]])
+        for neighbor, score in zip(self.neighbors[row, :k], self.scores[row, :k]):
+            if neighbor < 0:
+                break
+            theirs = self.features.indices[self.features.indptr[neighbor]:self.features.indptr[neighbor + 1]]
+            shared = sorted({self.encoder.terms[column].split(":", 1)[1] for column in theirs if column in mine})
+            results.append({"user_id": int(self.user_ids[neighbor]), "score": round(float(score), 4), "shared": shared})
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self.user_ids),
+            "open_to_collaboration": int(self.candidates.sum()),
+            "terms": len(self.encoder.terms),
+            "follows": int(self.follows.nnz),
+            "built_at": datetime.fromtimestamp(self.built_at).isoformat()
+        }
+
+# Arrays of a published index, one .npy file each, so followers can memory-map them
+INDEX_ARRAYS = {
+    "user_ids": lambda index: index.user_ids,
+    "candidates": lambda index: index.candidates,
+    "neighbors": lambda index: index.neighbors,
+    "scores": lambda index: index.scores,
+    "features_data": lambda index: index.features.data,
+    "features_indices": lambda index: index.features.indices,
+    "features_indptr": lambda index: index.features.indptr,
+    "follows_data": lambda index: index.follows.data,
+    "follows_indices": lambda index: index.follows.indices,
+    "follows_indptr": lambda index: index.follows.indptr,
+    "idf": lambda index: index.encoder.idf,
+}
+
+def save_index(index: CollaboratorIndex, directory: str, watermarks: dict):
+    """Write an index, and the refresh watermarks it is current to, into a new directory"""
+    os.makedirs(directory)
+    for name, array in INDEX_ARRAYS.items():
+        np.save(os.path.join(directory, f"{name}.npy"), array(index))
+    meta = {
+        "terms": index.encoder.terms, "documents": index.encoder.documents, "depth": index.depth,
+        "block_rows": index.block_rows, "block_candidates": index.block_candidates, "built_at": index.built_at,
+        "features_shape": index.features.shape, "follows_shape": index.follows.shape,
+        "watermarks": {name: value.isoformat() if value else None for name, value in watermarks.items()}
+    }
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+def load_index(directory: str) -> Tuple[CollaboratorIndex, dict]:
+    """An index written by save_index, its arrays memory-mapped read-only, and its watermarks"""
+    with open(os.path.join(directory, "meta.json")) as f:
+        meta = json.load(f)
+    arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in INDEX_ARRAYS}
+    encoder = ProfileEncoder.__new__(ProfileEncoder)
+    encoder.terms = meta["terms"]
+    encoder.vocabulary = {term: column for column, term in enumerate(encoder.terms)}
+    encoder.documents = meta["documents"]
+    encoder.idf = arrays["idf"]
+
+    index = CollaboratorIndex.__new__(CollaboratorIndex)
+    index.user_ids = arrays["user_ids"]
+    index.row_of = {int(user_id): row for row, user_id in enumerate(index.user_ids)}
+    index.features = sp.csr_matrix((arrays["features_data"], arrays["features_indices"], arrays["features_indptr"]),
+                                   shape=tuple(meta["features_shape"]))
+    index.follows = sp.csr_matrix((arrays["follows_data"], arrays["follows_indices"], arrays["follows_indptr"]),
+                                  shape=tuple(meta["follows_shape"]))
+    index.candidates = arrays["candidates"]
+    index.neighbors = arrays["neighbors"]
+    index.scores = arrays["scores"]
+    index.encoder = encoder
+    index.depth = meta["depth"]
+    index.block_rows = meta["block_rows"]
+    index.block_candidates = meta["block_candidates"]
+    index.built_at = meta["built_at"]
+    watermarks = {name: datetime.fromisoformat(value) if value else None
+                  for name, value in meta["watermarks"].items()}
+    return index, watermarks
+
+def build_index(profiles: Sequence[ProfileRow], follows: Iterable[Tuple[int, int]], depth: int,
+                block_rows: int = 2048) -> CollaboratorIndex:
+    documents = [profile_terms(*row[1:4]) for row in profiles]
+    encoder = ProfileEncoder(documents)
+    user_ids = np.array([row[0] for row in profiles], dtype=np.int64)
+    candidates = np.array([bool(row[4]) and row[5] != "private" for row in profiles], dtype=bool)
+    row_of = {int(user_id): row for row, user_id in enumerate(user_ids)}
+    edges = np.array([(row_of[a], row_of[b]) for a, b in follows if a in row_of and b in row_of],
+                     dtype=np.int32).reshape(-1, 2)
+    follow_matrix = sp.csr_matrix((np.ones(len(edges), dtype=bool), (edges[:, 0], edges[:, 1])),
+                                  shape=(len(user_ids), len(user_ids)))
+    index = CollaboratorIndex(user_ids, encoder.encode(documents), candidates, follow_matrix, encoder,
+                              depth, block_rows)
+    index.build()
+    return index
+
+class CollaboratorRecommender:
+    """Serves recommendations from the current index and keeps it fresh: a full
+    build on first use (or every rebuild_interval), and in between incremental
+    refreshes from profiles updated and follows created since the last one.
+    Unfollows only take effect at the next full build.
+
+    With a shared_dir, the process holding its lock is the leader: it alone
+    reads the database and computes, publishing each new index to shared_dir.
+    The others load what it publishes instead, and one of them takes over if
+    the leader exits"""
+
+    def __init__(self, top_k: int = 10, depth: Optional[int] = None, refresh_interval: float = 300.0,
+                 rebuild_interval: float = 86400.0, block_rows: int = 2048, fetch_rows: int = 50000,
+                 shared_dir: Optional[str] = None):
+        self.top_k = top_k
+        self.depth = depth or top_k * 2
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self.block_rows = block_rows
+        self.fetch_rows = fetch_rows
+        self.index: Optional[CollaboratorIndex] = None
+        self.profiles_seen: Optional[datetime] = None
+        self.follows_seen: Optional[datetime] = None
+        self.refreshes = 0
+        self.last_refresh_seconds = 0.0
+        self._lock = threading.Lock()
+        self.shared_dir = shared_dir
+        self.published: Optional[str] = None  # Generation of shared_dir last published or loaded
+        self._leader_fd: Optional[int] = None
+
+    def _connect(self):
+        import psycopg2
+
+        dsn = os.getenv("DATABASE_URL")
+        if dsn:
+            return psycopg2.connect(dsn)
+        return psycopg2.connect(
+            host=os.getenv('PGHOST', 'localhost'),
+            database=os.getenv('PGDATABASE', 'research_hub'),
+            user=os.getenv('PGUSER', 'postgres'),
+            password=os.getenv('PGPASSWORD', ''),
+            port=os.getenv('PGPORT', '5432')
+        )
+
+    def _fetch(self, conn, sql: str, params: tuple = ()) -> List[tuple]:
+        """All rows of a query, read through a server-side cursor in fetch_rows chunks"""
+        rows = []
+        with conn.cursor(name="collaborator_recommender") as cursor:
+            cursor.itersize = self.fetch_rows
+            cursor.execute(sql, params)
+            while True:
+                chunk = cursor.fetchmany(self.fetch_rows)
+                if not chunk:
+                    break
+                rows.extend(chunk)
+        conn.commit()
+        return rows
+
+    def _profiles(self, conn, since: Optional[datetime]) -> List[ProfileRow]:
+        # Rows stamped exactly at the watermark are read again; applying them twice is harmless
+        # DISTINCT ON keeps one profile per user should a user have several
+        return self._fetch(conn, f"""
+            SELECT DISTINCT ON (user_id) user_id, research_interests, methodologies, specializations,
+                   collaboration_open, privacy_level, updated_at
+            FROM user_profiles
+            WHERE user_id IS NOT NULL {"AND updated_at >= %s" if since else ""}
+            ORDER BY user_id, updated_at DESC
+        """, (since,) if since else ())
+
+    def _follows(self, conn, since: Optional[datetime]) -> List[tuple]:
+        return self._fetch(conn, f"""
+            SELECT follower_id, following_id, created_at FROM user_follows
+            {"WHERE created_at >= %s" if since else ""}
+        """, (since,) if since else ())
+
+    def rebuild(self):
+        """Full build from the database; blocking"""
+        started = time.perf_counter()
+        conn = self._connect()
+        try:
+            profiles = self._profiles(conn, None)
+            follows = self._follows(conn, None)
+        finally:
+            conn.close()
+        index = build_index(profiles, [(a, b) for a, b, _ in follows], self.depth, self.block_rows)
+        with self._lock:
+            self.index = index
+            self.profiles_seen = max((row[6] for row in profiles if row[6]), default=None)
+            self.follows_seen = max((row[2] for row in follows if row[2]), default=None)
+        self.last_refresh_seconds = time.perf_counter() - started
+        logger.info(f"Built collaborator index for {len(profiles):,} profiles and {len(follows):,} follows "
+                    f"in {self.last_refresh_seconds:.1f}s")
+
+    def _lead(self) -> bool:
+        """Whether this process is, or has just become, the leader. Never called
+        before fork: a forked child would share the parent's lock"""
+        if self._leader_fd is None:
+            os.makedirs(self.shared_dir, exist_ok=True)
+            fd = os.open(os.path.join(self.shared_dir, "leader.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                return False
+            self._leader_fd = fd
+            logger.info(f"Refreshing the collaborator index for every worker (pid {os.getpid()})")
+        return True
+
+    def _current(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.shared_dir, "current")) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _publish(self):
+        """Save the index as a new generation, point `current` at it and drop
+        generations before the previous one. Followers that still map those
+        files keep reading them until they load the new generation"""
+        generation = f"{time.time_ns():020d}"
+        save_index(self.index, os.path.join(self.shared_dir, generation),
+                   {"profiles": self.profiles_seen, "follows": self.follows_seen})
+        pointer = os.path.join(self.shared_dir, f"current.{os.getpid()}")
+        with open(pointer, "w") as f:
+            f.write(generation)
+        os.replace(pointer, os.path.join(self.shared_dir, "current"))
+        self.published = generation
+        generations = sorted(name for name in os.listdir(self.shared_dir) if name.isdigit())
+        for name in generations[:-2]:
+            shutil.rmtree(os.path.join(self.shared_dir, name), ignore_errors=True)
+
+    def _follow(self):
+        """Load the leader's latest index if it is newer than ours"""
+        generation = self._current()
+        if generation is None or generation == self.published:
+            return
+        index, watermarks = load_index(os.path.join(self.shared_dir, generation))
+        with self._lock:
+            self.index = index
+            self.profiles_seen, self.follows_seen = watermarks["profiles"], watermarks["follows"]
+        self.published = generation
+
+    def refresh(self):
+        """Apply profile and follow changes since the last build or refresh; blocking.
+        A follower only picks up the leader's latest index"""
+        if self.shared_dir is not None:
+            if not self._lead():
+                self._follow()
+                return
+            # A new leader continues from the last published index
+            self._follow()
+        if self.index is None or time.time() - self.index.built_at > self.rebuild_interval:
+            self.rebuild()
+            if self.shared_dir is not None:
+                self._publish()
+            return
+        started = time.perf_counter()
+        conn = self._connect()
+        try:
+            profiles = self._profiles(conn, self.profiles_seen)
+            follows = self._follows(conn, self.follows_seen)
+        finally:
+            conn.close()
+        if profiles or follows:
+            index = self.index.updated(profiles, [(a, b) for a, b, _ in follows], self.top_k)
+            with self._lock:
+                self.index = index
+                self.profiles_seen = max((row[6] for row in profiles if row[6]), default=self.profiles_seen)
+                self.follows_seen = max((row[2] for row in follows if row[2]), default=self.follows_seen)
+            if self.shared_dir is not None:
+                self._publish()
+        self.refreshes += 1
+        self.last_refresh_seconds = time.perf_counter() - started
+
+    def recommend(self, user_id: int, k: Optional[int] = None) -> Optional[List[dict]]:
+        if self.index is None:
+            raise RuntimeError("Collaborator index is not built yet")
+        return self.index.recommend(user_id, min(k or self.top_k, self.depth))
+
+    def stats(self) -> dict:
+        stats = self.index.stats() if self.index is not None else {"users": 0}
+        stats.update(refreshes=self.refreshes, last_refresh_seconds=round(self.last_refresh_seconds, 3))
+        if self.shared_dir is not None:
+            stats.update(leader=self._leader_fd is not None, generation=self.published)
+        return stats
@@ -7,6 +7,9 @@ CREATE EXTENSION IF NOT EXISTS "pg_trgm";
 CREATE EXTENSION IF NOT EXISTS "btree_gin";
 
 -- Drop existing tables if they exist (for clean setup)
+DROP TABLE IF EXISTS feed_watermarks CASCADE;
+DROP TABLE IF EXISTS feed_pull_authors CASCADE;
+DROP TABLE IF EXISTS feed_items CASCADE;
 DROP TABLE IF EXISTS user_sessions CASCADE;
 DROP TABLE IF EXISTS contact_submissions CASCADE;
 DROP TABLE IF EXISTS research_comments CASCADE;
@@ -268,6 +271,31 @@ CREATE TABLE notifications (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Precomputed follower feeds, maintained by feed_worker.py
+CREATE TABLE feed_items (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    item_type VARCHAR(20) NOT NULL, -- 'paper', 'project', 'comment'
+    item_id INTEGER NOT NULL,
+    actor_id INTEGER NOT NULL,
+    PRIMARY KEY (user_id, created_at, item_type, item_id)
+);
+
+-- Accounts with too many followers to fan out to; merged into feeds at read time
+CREATE TABLE feed_pull_authors (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    followers INTEGER NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- How far the feed worker has read each source
+CREATE TABLE feed_watermarks (
+    source VARCHAR(20) PRIMARY KEY,
+    position_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    position_id INTEGER NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
 -- Create indexes for better performance
 CREATE INDEX idx_users_email ON users(email);
 CREATE INDEX idx_users_provider ON users(provider);
@@ -285,6 +313,8 @@ CREATE INDEX idx_research_notes_search ON research_notes USING GIN(to_tsvector('
 CREATE INDEX idx_research_projects_user_id ON research_projects(user_id);
 CREATE INDEX idx_research_projects_status ON research_projects(status);
 CREATE INDEX idx_research_projects_tags ON research_projects USING GIN(tags);
+CREATE INDEX idx_research_projects_user_created ON research_projects(user_id, created_at DESC, id DESC);
+CREATE INDEX idx_research_projects_updated ON research_projects(updated_at, id);
 CREATE INDEX idx_research_files_user_id ON research_files(user_id);
 CREATE INDEX idx_research_files_project_id ON research_files(project_id);
 CREATE INDEX idx_research_files_type ON research_files(file_type);
@@ -301,15 +331,21 @@ CREATE INDEX idx_papers_user_id ON papers(user_id);
 CREATE INDEX idx_papers_visibility ON papers(visibility);
 CREATE INDEX idx_papers_status ON papers(status);
 CREATE INDEX idx_papers_field ON papers(field);
+CREATE INDEX idx_papers_user_created ON papers(user_id, created_at DESC, id DESC);
+CREATE INDEX idx_papers_updated ON papers(updated_at, id);
 CREATE INDEX idx_papers_search ON papers USING GIN(to_tsvector('english', title || ' ' || COALESCE(abstract, '')));
 CREATE INDEX idx_user_follows_follower ON user_follows(follower_id);
 CREATE INDEX idx_user_follows_following ON user_follows(following_id);
+CREATE INDEX idx_user_follows_created ON user_follows(created_at, id);
 CREATE INDEX idx_paper_likes_user_id ON paper_likes(user_id);
 CREATE INDEX idx_paper_likes_paper_id ON paper_likes(paper_id);
 CREATE INDEX idx_research_comments_parent ON research_comments(parent_type, parent_id);
 CREATE INDEX idx_research_comments_user_id ON research_comments(user_id);
+CREATE INDEX idx_research_comments_user_created ON research_comments(user_id, created_at DESC, id DESC);
+CREATE INDEX idx_research_comments_updated ON research_comments(updated_at, id);
 CREATE INDEX idx_chat_messages_user_id ON chat_messages(user_id);
 CREATE INDEX idx_chat_messages_created_at ON chat_messages(created_at);
+CREATE INDEX idx_chat_messages_session ON chat_messages((context->>'session_id'), created_at);
 CREATE INDEX idx_contact_submissions_status ON contact_submissions(status);
 CREATE INDEX idx_contact_submissions_type ON contact_submissions(type);
 CREATE INDEX idx_contact_submissions_created_at ON contact_submissions(created_at);
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate detection for The Research Hub citations table
+Streams citations through a server-side cursor and groups re-imports of the
+same paper: rows sharing a normalized DOI, and rows whose title and author
+shingles are similar under MinHash with LSH banding. Candidate clusters are
+written as JSON lines for review; nothing is modified
+
+Work is linear in the number of rows: each row is shingled and hashed once,
+and only rows that collide in an LSH band are ever compared. With the default
+per-user scope rows arrive ordered by user, so memory is bounded by a block
+of users rather than the table
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import argparse
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import psycopg2
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+DOI_PREFIX = re.compile(r"^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)", re.IGNORECASE)
+
+# Author shingles are repeated so that different authors outweigh a shared title
+AUTHOR_WEIGHT = 8
+AUTHOR_BIT = np.uint64(1 << 31)  # Title 3-grams fit in 24 bits; author hashes never collide with them
+
+def connect():
+    """Connect using DATABASE_URL or the PG* environment variables, like the seeder"""
+    dsn = os.getenv("DATABASE_URL")
+    if dsn:
+        return psycopg2.connect(dsn)
+    return psycopg2.connect(
+        host=os.getenv('PGHOST', 'localhost'),
+        database=os.getenv('PGDATABASE', 'research_hub'),
+        user=os.getenv('PGUSER', 'postgres'),
+        password=os.getenv('PGPASSWORD', ''),
+        port=os.getenv('PGPORT', '5432')
+    )
+
+def _fold(text: str) -> str:
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+
+def normalize_doi(doi: Optional[str]) -> Optional[str]:
+    """Bare lowercase DOI ("10.1234/abc"), or None when absent or not a DOI.
+    URL and "doi:" prefixes, case and trailing punctuation are ignored"""
+    if not doi:
+        return None
+    doi = DOI_PREFIX.sub("", doi.strip()).lower().rstrip(".;,")
+    return doi if doi.startswith("10.") and "/" in doi else None
+
+def normalize_title(title: Optional[str]) -> str:
+    """Lowercase ASCII words separated by single spaces"""
+    return " ".join(WORD_PATTERN.findall(_fold(title or "")))
+
+def author_key(name: str) -> str:
+    """Surname and first initial, so "Smith, J." and "J. Smith" agree"""
+    name = _fold(name)
+    if "," in name:
+        surname, _, given = name.partition(",")
+    else:
+        parts = name.split()
+        surname, given = (parts[-1], " ".join(parts[:-1])) if parts else ("", "")
+    surname = "".join(WORD_PATTERN.findall(surname))
+    initials = WORD_PATTERN.findall(given)
+    return f"{surname} {initials[0][0]}" if initials else surname
+
+class MinHasher:
+    """Vectorized MinHash over 32-bit shingle codes with multiply-shift hash
+    functions, banded for LSH"""
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        rng = np.random.default_rng(seed)
+        self.multipliers = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.offsets = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        self.band_mix = rng.integers(1, 2 ** 63, size=self.rows_per_band, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+
+    def shingles(self, titles: Sequence[str], authors: Sequence[Sequence[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Shingle codes and their row numbers for a chunk. Titles give character
+        3-grams (computed on one byte buffer for the whole chunk); each author
+        gives AUTHOR_WEIGHT salted hashes of its key"""
+        padded = [f" {title} ".encode("ascii") for title in titles]
+        lengths = np.fromiter((len(title) for title in padded), dtype=np.int64, count=len(padded))
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        buffer = np.frombuffer(b"".join(padded), dtype=np.uint8).astype(np.uint64)
+        grams = (buffer[:-2] << np.uint64(16)) | (buffer[1:-1] << np.uint64(8)) | buffer[2:]
+        counts = np.maximum(lengths - 2, 0)
+        title_rows = np.repeat(np.arange(len(padded)), counts)
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        title_codes = grams[starts[title_rows] + within]
+
+        author_codes, author_rows = [], []
+        for row, names in enumerate(authors):
+            for key in {author_key(name) for name in names or ()}:
+                if key:
+                    author_codes.append(zlib.crc32(key.encode("ascii")))
+                    author_rows.append(row)
+        salts = np.arange(AUTHOR_WEIGHT, dtype=np.uint64) * np.uint64(0x9E3779B1) & np.uint64(0x7FFFFFFF)
+        author_codes = ((np.array(author_codes, dtype=np.uint64)[:, None] ^ salts) | AUTHOR_BIT).ravel()
+        author_rows = np.repeat(np.array(author_rows, dtype=np.int64), AUTHOR_WEIGHT)
+
+        codes = np.concatenate((title_codes, author_codes))
+        rows = np.concatenate((title_rows, author_rows))
+        order = np.argsort(rows, kind="stable")
+        return codes[order], rows[order]
+
+    def signatures(self, codes: np.ndarray, rows: np.ndarray, count: int) -> np.ndarray:
+        """(count, num_perm) uint32 signatures; rows without shingles are all ones"""
+        signatures = np.full((count, self.num_perm), 0xFFFFFFFF, dtype=np.uint32)
+        if not len(codes):
+            return signatures
+        present, starts = np.unique(rows, return_index=True)
+        for k in range(self.num_perm):
+            hashed = (codes * self.multipliers[k] + self.offsets[k]) >> np.uint64(32)
+            signatures[present, k] = np.minimum.reduceat(hashed, starts)
+        return signatures
+
+    def band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """(rows, bands) uint64 keys; equal keys mean equal signature bands"""
+        banded = signatures.astype(np.uint64).reshape(len(signatures), self.bands, self.rows_per_band)
+        return (banded * self.band_mix).sum(axis=2, dtype=np.uint64)
+
+class Block:
+    """Columns for a run of rows processed together"""
+
+    def __init__(self):
+        self.ids: List[np.ndarray] = []
+        self.scopes: List[np.ndarray] = []
+        self.dois: List[Optional[str]] = []
+        self.signatures: List[np.ndarray] = []
+        self.band_keys: List[np.ndarray] = []
+        self.shingled: List[np.ndarray] = []
+        self.rows = 0
+
+    def add(self, ids: np.ndarray, scopes: np.ndarray, dois: List[Optional[str]],
+            signatures: np.ndarray, band_keys: np.ndarray, shingled: np.ndarray):
+        self.ids.append(ids)
+        self.scopes.append(scopes)
+        self.dois.extend(dois)
+        # Verification only needs the low 16 bits of each hash (b-bit MinHash)
+        self.signatures.append((signatures & 0xFFFF).astype(np.uint16))
+        self.band_keys.append(band_keys)
+        self.shingled.append(shingled)
+        self.rows += len(ids)
+
+class _UnionFind:
+    """Clusters of row numbers. Each cluster remembers its DOI (or -1), and two
+    clusters with different DOIs are never merged, so a DOI-less row similar to
+    two different papers cannot chain them together"""
+
+    def __init__(self, dois: np.ndarray):
+        self.dois = dois
+        self.parent: Dict[int, int] = {}
+        self.cluster_doi: Dict[int, int] = {}
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> bool:
+        doi_a = self.cluster_doi.get(self.find(a), int(self.dois[a]))
+        doi_b = self.cluster_doi.get(self.find(b), int(self.dois[b]))
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return True
+        if doi_a >= 0 and doi_b >= 0 and doi_a != doi_b:
+            return False
+        self.parent[max(a, b)] = min(a, b)
+        self.cluster_doi[min(a, b)] = max(doi_a, doi_b)
+        return True
+
+def _bucket_pairs(keys: np.ndarray, max_bucket: int) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Index pairs of rows sharing a key. Buckets above max_bucket are skipped
+    (a title shared by thousands of unrelated rows would make them quadratic);
+    returns how many were"""
+    order = np.argsort(keys, kind="stable")
+    ordered = keys[order]
+    boundaries = np.flatnonzero(np.diff(ordered)) + 1
+    starts = np.concatenate(([0], boundaries))
+    sizes = np.diff(np.concatenate((starts, [len(keys)])))
+    left, right = [], []
+
+    # Pairs are by far the most common bucket, so they are handled in one go
+    pairs = starts[sizes == 2]
+    left.append(order[pairs])
+    right.append(order[pairs + 1])
+    for start, size in zip(starts[(sizes > 2) & (sizes <= max_bucket)], sizes[(sizes > 2) & (sizes <= max_bucket)]):
+        members = order[start:start + size]
+        i, j = np.triu_indices(size, 1)
+        left.append(members[i])
+        right.append(members[j])
+    skipped = int((sizes > max_bucket).sum())
+    return np.concatenate(left), np.concatenate(right), skipped
+
+def _doi_links(dois: np.ndarray, scopes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Index pairs chaining each group of rows with the same DOI and scope: every
+    row is linked to the next one, so a group of n rows gives n - 1 links and no
+    group is too large to take"""
+    with_doi = np.flatnonzero(dois >= 0)
+    order = with_doi[np.lexsort((dois[with_doi], scopes[with_doi]))]
+    same = (dois[order[1:]] == dois[order[:-1]]) & (scopes[order[1:]] == scopes[order[:-1]])
+    return order[:-1][same], order[1:][same]
+
+def find_clusters(block: Block, hasher: MinHasher, threshold: float, max_bucket: int,
+                  stats: Counter) -> Iterator[dict]:
+    """Duplicate clusters in a block: rows linked by an equal normalized DOI, or
+    by an LSH collision whose estimated Jaccard similarity reaches threshold
+    and whose DOIs (if both have one) agree. Rows with neither a title nor
+    authors are only matched by DOI"""
+    if not block.rows:
+        return
+    ids = np.concatenate(block.ids)
+    scopes = np.concatenate(block.scopes).astype(np.uint64)
+    signatures = np.concatenate(block.signatures)
+    band_keys = np.concatenate(block.band_keys)
+    shingled = np.flatnonzero(np.concatenate(block.shingled))
+    doi_codes: Dict[str, int] = {}
+    dois = np.array([doi_codes.setdefault(doi, len(doi_codes)) if doi else -1 for doi in block.dois],
+                    dtype=np.int64)
+    scope_mix = scopes * np.uint64(0x9E3779B97F4A7C15)
+
+    edges = _UnionFind(dois)
+    reasons: Dict[Tuple[int, int], str] = {}
+
+    left, right = _doi_links(dois, scopes)
+    for a, b in zip(left, right):
+        edges.union(int(a), int(b))
+        reasons[(int(a), int(b))] = "doi"
+    stats["doi_links"] += len(left)
+
+    # Empty shingle sets all get the same all-ones signature, so they stay out of LSH
+    candidates = []
+    for band in range(hasher.bands):
+        left, right, skipped = _bucket_pairs(band_keys[shingled, band] ^ scope_mix[shingled], max_bucket)
+        left, right = shingled[left], shingled[right]
+        stats["oversized_buckets"] += skipped
+        candidates.append(np.minimum(left, right) * block.rows + np.maximum(left, right))
+    candidates = np.unique(np.concatenate(candidates))
+    left, right = candidates // block.rows, candidates % block.rows
+    stats["candidate_pairs"] += len(candidates)
+
+    # b-bit estimate: unrelated 16-bit values still match with probability 2^-16
+    matches = (signatures[left] == signatures[right]).mean(axis=1)
+    similarity = (matches - 2 ** -16) / (1 - 2 ** -16)
+    conflicting = (dois[left] >= 0) & (dois[right] >= 0) & (dois[left] != dois[right])
+    accepted = np.flatnonzero(similarity >= threshold)
+    # Most similar pairs first, so a conflict drops the weaker link
+    for pair in accepted[np.argsort(-similarity[accepted], kind="stable")]:
+        a, b = int(left[pair]), int(right[pair])
+        if conflicting[pair] or not edges.union(a, b):
+            stats["doi_vetoes"] += 1
+            continue
+        reasons.setdefault((a, b), "minhash")
+        stats["minhash_pairs"] += 1
+
+    members = defaultdict(list)
+    for row in list(edges.parent):
+        members[edges.find(row)].append(row)
+    matched_by = defaultdict(set)
+    for (a, _), reason in reasons.items():
+        matched_by[edges.find(a)].add(reason)
+    for root, rows in members.items():
+        if len(rows) < 2:
+            continue
+        cluster_ids = sorted(int(ids[row]) for row in rows)
+        stats["clusters"] += 1
+        stats["duplicate_rows"] += len(rows) - 1
+        yield {
+            "scope": int(scopes[root]),
+            "ids": cluster_ids,
+            "keep": cluster_ids[0],
+            "matched_by": sorted(matched_by[root])
+        }
+
+def stream_citations(conn, per_user: bool, fetch_rows: int) -> Iterator[List[tuple]]:
+    """Chunks of (id, user_id, title, authors, doi) from a server-side cursor,
+    ordered by user when clusters are per user"""
+    with conn.cursor(name="dedupe_citations") as cursor:
+        cursor.itersize = fetch_rows
+        cursor.execute(f"""
+            SELECT id, user_id, title, authors, doi FROM citations
+            {"ORDER BY user_id, id" if per_user else ""}
+        """)
+        while True:
+            rows = cursor.fetchmany(fetch_rows)
+            if not rows:
+                return
+            yield rows
+
+def _block_end(users: Sequence[int], room: int, last_user: Optional[int]) -> Optional[int]:
+    """Index of the first row in a chunk that starts a new user once the block
+    has `room` more rows, or None if the block can take the whole chunk"""
+    if room <= 0 and users[0] != last_user:
+        return 0
+    for i in range(max(room, 1), len(users)):
+        if users[i] != users[i - 1]:
+            return i
+    return None
+
+def dedupe(conn, output, per_user: bool = True, threshold: float = 0.7, num_perm: int = 64,
+           bands: int = 16, fetch_rows: int = 20000, block_rows: int = 200000,
+           max_bucket: int = 200) -> Counter:
+    """Stream the table, write one JSON line per duplicate cluster and return counters"""
+    hasher = MinHasher(num_perm, bands)
+    stats = Counter()
+    block = Block()
+    last_user = None
+    cluster_id = 0
+
+    def flush():
+        nonlocal block, cluster_id
+        for cluster in find_clusters(block, hasher, threshold, max_bucket, stats):
+            if per_user:
+                cluster["user_id"] = cluster.pop("scope")
+            else:
+                del cluster["scope"]
+            cluster_id += 1
+            output.write(json.dumps({"cluster": cluster_id, **cluster}) + "\n")
+        block = Block()
+
+    def add(rows: List[tuple]):
+        titles = [normalize_title(title) for _, _, title, _, _ in rows]
+        codes, shingle_rows = hasher.shingles(titles, [authors for _, _, _, authors, _ in rows])
+        signatures = hasher.signatures(codes, shingle_rows, len(rows))
+        shingled = np.bincount(shingle_rows, minlength=len(rows)) > 0
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        scopes = np.fromiter(((row[1] or 0) if per_user else 0 for row in rows), dtype=np.int64, count=len(rows))
+        dois = [normalize_doi(row[4]) for row in rows]
+        block.add(ids, scopes, dois, signatures, hasher.band_keys(signatures), shingled)
+        stats["rows"] += len(rows)
+        stats["rows_with_doi"] += sum(doi is not None for doi in dois)
+        stats["rows_without_shingles"] += len(rows) - int(shingled.sum())
+
+    for rows in stream_citations(conn, per_user, fetch_rows):
+        # With per-user scope a block ends at the first user change after
+        # block_rows, so no cluster spans two blocks
+        while per_user and rows:
+            end = _block_end([row[1] for row in rows], max(block_rows, 1) - block.rows, last_user)
+            if end is None:
+                break
+            if end:
+                add(rows[:end])
+                last_user = rows[end - 1][1]
+            flush()
+            rows = rows[end:]
+        if rows:
+            add(rows)
+            last_user = rows[-1][1]
+    flush()
+    return stats
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Find near-duplicate citations with DOIs and MinHash/LSH")
+    parser.add_argument("--output", default="citation_duplicates.jsonl",
+                        help="JSON lines file of clusters, or - for stdout")
+    parser.add_argument("--scope", choices=["user", "global"], default="user",
+                        help="user: duplicates within one user's library (bounded memory); "
+                             "global: across all users (holds ~300 bytes per row in memory)")
+    parser.add_argument("--threshold", type=float, default=0.7,
+                        help="Minimum estimated Jaccard similarity of title and author shingles")
+    parser.add_argument("--num-perm", type=int, default=64, help="MinHash functions per signature")
+    parser.add_argument("--bands", type=int, default=16, help="LSH bands; num-perm must be a multiple")
+    parser.add_argument("--fetch-rows", type=int, default=20000, help="Rows per server-side cursor fetch")
+    parser.add_argument("--block-rows", type=int, default=200000,
+                        help="Rows of whole users compared together in user scope")
+    parser.add_argument("--max-bucket", type=int, default=200,
+                        help="Skip LSH buckets larger than this (reported as oversized); DOI groups are never skipped")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    conn = connect()
+    started = time.perf_counter()
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        stats = dedupe(conn, output, per_user=args.scope == "user", threshold=args.threshold,
+                       num_perm=args.num_perm, bands=args.bands, fetch_rows=args.fetch_rows,
+                       block_rows=args.block_rows, max_bucket=args.max_bucket)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        conn.close()
+    elapsed = time.perf_counter() - started
+
+    # The summary goes to stderr so `--output -` stays valid JSON lines
+    report = sys.stderr
+    print(f"✅ Scanned {stats['rows']:,} citations ({stats['rows_with_doi']:,} with a DOI) in {elapsed:.1f}s "
+          f"({stats['rows'] / max(elapsed, 1e-9):,.0f} rows/s)", file=report)
+    print(f"📊 {stats['clusters']:,} clusters, {stats['duplicate_rows']:,} duplicate rows", file=report)
+    print(f"   • DOI matches:      {stats['doi_links']:,} rows joined to another with their DOI", file=report)
+    print(f"   • MinHash matches:  {stats['minhash_pairs']:,} of {stats['candidate_pairs']:,} LSH candidates "
+          f"({stats['doi_vetoes']:,} rejected for conflicting DOIs)", file=report)
+    if stats["oversized_buckets"]:
+        print(f"   • Skipped {stats['oversized_buckets']:,} LSH buckets over {args.max_bucket} rows", file=report)
+    if stats["rows_without_shingles"]:
+        print(f"   • {stats['rows_without_shingles']:,} rows with no title or authors matched by DOI only", file=report)
+    if args.output != "-":
+        print(f"📁 Clusters written to {args.output}", file=report)
+
+if __name__ == "__main__":
+    main()
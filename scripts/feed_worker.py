@@ -0,0 +1,632 @@
+#!/usr/bin/env python3
+"""
+Follower activity feeds for The Research Hub
+Keeps a bounded, time-ordered feed per user in feed_items instead of joining
+user_follows against papers, projects and comments on every read. New and
+updated activity is fanned out on write to each follower's feed; accounts
+with more than pull_threshold followers are exempt and their activity is
+merged in at read time (fan-out on read), so one post never turns into
+hundreds of thousands of writes
+
+The worker polls each source by an (updated_at, id) watermark, so edits that
+make a paper public or a project shared are picked up like new rows. Every
+batch is written and its watermark advanced in one transaction. Trimming
+feeds back to feed_length happens in a separate pass every trim_interval,
+and only for feeds that have grown trim_slack items past it, so a full feed
+is cut once per trim_slack items rather than once per item. --backfill
+rebuilds feeds from scratch, e.g. after seeding or a schema change
+"""
+
+import os
+import time
+import asyncio
+import signal
+import logging
+import weakref
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+FEED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS feed_items (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    item_type VARCHAR(20) NOT NULL, -- 'paper', 'project', 'comment'
+    item_id INTEGER NOT NULL,
+    actor_id INTEGER NOT NULL,
+    PRIMARY KEY (user_id, created_at, item_type, item_id)
+);
+CREATE TABLE IF NOT EXISTS feed_pull_authors (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    followers INTEGER NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+CREATE TABLE IF NOT EXISTS feed_watermarks (
+    source VARCHAR(20) PRIMARY KEY,
+    position_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    position_id INTEGER NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_papers_user_created ON papers(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_papers_updated ON papers(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_research_projects_user_created ON research_projects(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_research_projects_updated ON research_projects(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_research_comments_user_created ON research_comments(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_research_comments_updated ON research_comments(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_user_follows_created ON user_follows(created_at, id);
+"""
+
+# Activity that reaches followers: item type -> (table, alias, visibility predicate on the alias)
+SOURCES: Dict[str, Tuple[str, str, str]] = {
+    "paper": ("papers", "p", "p.visibility = 'public'"),
+    "project": ("research_projects", "r", "r.is_private IS NOT TRUE"),
+    "comment": ("research_comments", "c", """(
+        (c.parent_type = 'paper' AND EXISTS (
+            SELECT 1 FROM papers cp WHERE cp.id = c.parent_id AND cp.visibility = 'public'))
+        OR (c.parent_type = 'project' AND EXISTS (
+            SELECT 1 FROM research_projects cr WHERE cr.id = c.parent_id AND cr.is_private IS NOT TRUE))
+    )""")
+}
+
+NO_POSITION = (datetime.min.replace(year=1970), 0)
+
+# Feeds are ordered newest first, ties broken by item, so trimming and paging agree
+FEED_ORDER = "created_at DESC, item_type DESC, item_id DESC"
+
+# A position in a feed: the (created_at, item_type, item_id) of the last item read
+FeedCursor = Tuple[datetime, str, int]
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def encode_cursor(item: dict) -> str:
+    """URL-safe cursor for the page after a feed item"""
+    micros = (datetime.fromisoformat(item["created_at"]) - EPOCH) // timedelta(microseconds=1)
+    return f"{micros}.{item['type']}.{item['id']}"
+
+def decode_cursor(value: str) -> FeedCursor:
+    """Inverse of encode_cursor; raises ValueError for anything else"""
+    micros, item_type, item_id = value.split(".")
+    if item_type not in SOURCES:
+        raise ValueError(f"Unknown item type {item_type!r}")
+    return EPOCH + timedelta(microseconds=int(micros)), item_type, int(item_id)
+
+def connect():
+    """Connect using DATABASE_URL or the PG* environment variables, like the seeder"""
+    import psycopg2
+
+    dsn = os.getenv("DATABASE_URL")
+    if dsn:
+        return psycopg2.connect(dsn)
+    return psycopg2.connect(
+        host=os.getenv('PGHOST', 'localhost'),
+        database=os.getenv('PGDATABASE', 'research_hub'),
+        user=os.getenv('PGUSER', 'postgres'),
+        password=os.getenv('PGPASSWORD', ''),
+        port=os.getenv('PGPORT', '5432')
+    )
+
+def recent_activity_sql(actor: str, limit: str, before: Optional[Tuple[str, str, str]] = None) -> str:
+    """(item_type, item_id, actor_id, created_at) of an actor's newest visible
+    activity, optionally only that ordered after a (created_at, item_type,
+    item_id) cursor. Each branch is an index scan on (user_id, created_at, id)"""
+    branches = []
+    for kind, (table, alias, visible) in SOURCES.items():
+        bound = ""
+        if before:
+            at, item_type, item_id = before
+            bound = (f" AND {alias}.created_at <= {at}"
+                     f" AND ({alias}.created_at, '{kind}'::varchar, {alias}.id) < ({at}, {item_type}, {item_id})")
+        branches.append(f"""(
+            SELECT '{kind}'::varchar AS item_type, {alias}.id AS item_id, {alias}.user_id AS actor_id,
+                   {alias}.created_at
+            FROM {table} {alias}
+            WHERE {alias}.user_id = {actor} AND {alias}.created_at IS NOT NULL{bound} AND {visible}
+            ORDER BY {alias}.created_at DESC, {alias}.id DESC
+            LIMIT {limit}
+        )""")
+    return f"""
+        SELECT * FROM ({" UNION ALL ".join(branches)}) recent
+        ORDER BY {FEED_ORDER}
+        LIMIT {limit}
+    """
+
+class FeedWorker:
+    """Maintains feed_items from one connection. Methods taking a cursor write
+    without committing and queue the feeds they grew for trim_pending(); the
+    run_* methods commit once per batch"""
+
+    def __init__(self, conn, feed_length: int = 500, pull_threshold: int = 10000,
+                 batch_size: int = 1000, settle_seconds: float = 5.0, trim_interval: float = 60.0,
+                 trim_slack: Optional[int] = None):
+        self.conn = conn
+        self.feed_length = feed_length
+        self.pull_threshold = pull_threshold
+        self.batch_size = batch_size
+        # Rows younger than this are left for the next poll, so a transaction
+        # that commits slightly out of order is not passed by the watermark
+        self.settle_seconds = settle_seconds
+        self.trim_interval = trim_interval
+        self.trim_slack = feed_length // 10 if trim_slack is None else trim_slack
+        # Upper bounds on feed lengths: measured by trim() and raised by every
+        # insert. Feeds this process has not measured yet are always trimmed
+        self.lengths: Dict[int, int] = {}
+        # Feeds due a trim; lost on restart, so a feed can stay over length
+        # until it next receives an item
+        self.untrimmed: set = set()
+        self.stats = {"items": 0, "follows": 0, "rows_written": 0, "rows_trimmed": 0}
+
+    def ensure_schema(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute(FEED_SCHEMA)
+        self.conn.commit()
+
+    # Watermarks
+
+    def _position(self, cursor, source: str) -> Tuple[datetime, int]:
+        cursor.execute("SELECT position_at, position_id FROM feed_watermarks WHERE source = %s", (source,))
+        row = cursor.fetchone()
+        return tuple(row) if row else NO_POSITION
+
+    def _advance(self, cursor, source: str, position: Tuple[datetime, int]):
+        cursor.execute("""
+            INSERT INTO feed_watermarks (source, position_at, position_id, updated_at)
+            VALUES (%s, %s, %s, NOW())
+            ON CONFLICT (source) DO UPDATE
+            SET position_at = EXCLUDED.position_at, position_id = EXCLUDED.position_id, updated_at = NOW()
+        """, (source, position[0], position[1]))
+
+    # Writing and trimming feeds
+
+    def _grew(self, added: Counter):
+        limit = self.feed_length + self.trim_slack
+        for user_id, count in added.items():
+            length = self.lengths.get(user_id)
+            if length is None:
+                self.untrimmed.add(user_id)
+                continue
+            self.lengths[user_id] = length + count
+            if length + count > limit:
+                self.untrimmed.add(user_id)
+
+    def trim(self, cursor, user_ids: Iterable[int]) -> int:
+        """Measure each feed, walking at most feed_length + 1 index entries, and
+        cut those over feed_length back to their newest feed_length items.
+        Returns rows removed"""
+        user_ids = sorted(set(user_ids))
+        if not user_ids:
+            return 0
+        cursor.execute("""
+            SELECT u.user_id, (
+                SELECT count(*) FROM (SELECT 1 FROM feed_items WHERE user_id = u.user_id LIMIT %s) f
+            )
+            FROM unnest(%s::int[]) AS u(user_id)
+        """, (self.feed_length + 1, user_ids))
+        over = []
+        for user_id, length in cursor.fetchall():
+            self.lengths[user_id] = min(length, self.feed_length)
+            if length > self.feed_length:
+                over.append(user_id)
+        if not over:
+            return 0
+        cursor.execute(f"""
+            DELETE FROM feed_items f
+            USING (
+                SELECT u.user_id, cutoff.*
+                FROM unnest(%s::int[]) AS u(user_id)
+                CROSS JOIN LATERAL (
+                    SELECT created_at, item_type, item_id FROM feed_items
+                    WHERE user_id = u.user_id
+                    ORDER BY {FEED_ORDER}
+                    OFFSET %s LIMIT 1
+                ) cutoff
+            ) c
+            WHERE f.user_id = c.user_id
+              AND (f.created_at, f.item_type, f.item_id) <= (c.created_at, c.item_type, c.item_id)
+        """, (over, self.feed_length))
+        self.stats["rows_trimmed"] += cursor.rowcount
+        return cursor.rowcount
+
+    def fan_out(self, cursor, kind: str, items: Sequence[Tuple[int, int, datetime]],
+                exempt_pull_authors: bool = True) -> int:
+        """Write (item_id, actor_id, created_at) items of one type into their
+        actors' followers' feeds. Returns rows written"""
+        if not items:
+            return 0
+        item_ids, actor_ids, created = (list(column) for column in zip(*items))
+        exempt = "WHERE NOT EXISTS (SELECT 1 FROM feed_pull_authors p WHERE p.user_id = a.actor_id)" \
+            if exempt_pull_authors else ""
+        cursor.execute(f"""
+            INSERT INTO feed_items (user_id, created_at, item_type, item_id, actor_id)
+            SELECT f.follower_id, a.created_at, %s, a.item_id, a.actor_id
+            FROM unnest(%s::int[], %s::int[], %s::timestamptz[]) AS a(item_id, actor_id, created_at)
+            JOIN user_follows f ON f.following_id = a.actor_id
+            {exempt}
+            ON CONFLICT DO NOTHING
+            RETURNING user_id
+        """, (kind, item_ids, actor_ids, created))
+        written = cursor.rowcount
+        self.stats["rows_written"] += written
+        self._grew(Counter(row[0] for row in cursor.fetchall()))
+        return written
+
+    def copy_recent(self, cursor, edges_sql: str, params: tuple, replace: bool = False) -> int:
+        """Fill followers' feeds with the newest activity of accounts they follow.
+        edges_sql selects (follower_id, following_id) pairs; pull authors are
+        skipped. With replace, the followers' feeds are cleared first and built
+        already trimmed. Returns rows written"""
+        if replace:
+            cursor.execute(f"""
+                DELETE FROM feed_items WHERE user_id IN (SELECT follower_id FROM ({edges_sql}) e)
+            """, params)
+        cursor.execute(f"""
+            INSERT INTO feed_items (user_id, created_at, item_type, item_id, actor_id)
+            SELECT follower_id, created_at, item_type, item_id, actor_id
+            FROM (
+                SELECT e.follower_id, a.*,
+                       row_number() OVER (PARTITION BY e.follower_id ORDER BY {FEED_ORDER}) AS rank
+                FROM ({edges_sql}) e
+                CROSS JOIN LATERAL ({recent_activity_sql("e.following_id", str(self.feed_length))}) a
+                WHERE NOT EXISTS (SELECT 1 FROM feed_pull_authors p WHERE p.user_id = e.following_id)
+            ) ranked
+            WHERE rank <= %s
+            ON CONFLICT DO NOTHING
+            RETURNING user_id
+        """, params + (self.feed_length,))
+        written = cursor.rowcount
+        self.stats["rows_written"] += written
+        added = Counter(row[0] for row in cursor.fetchall())
+        if replace:
+            self.lengths.update(added)
+        else:
+            self._grew(added)
+        return written
+
+    def trim_pending(self, chunk_users: int = 5000) -> int:
+        """Trim every feed due a trim; returns rows removed"""
+        pending, self.untrimmed = sorted(self.untrimmed), set()
+        removed = 0
+        for start in range(0, len(pending), chunk_users):
+            with self.conn.cursor() as cursor:
+                removed += self.trim(cursor, pending[start:start + chunk_users])
+            self.conn.commit()
+        return removed
+
+    # Pull authors
+
+    def refresh_pull_authors(self) -> Tuple[int, int]:
+        """Recount followers. Accounts reaching pull_threshold switch to fan-out
+        on read; accounts that fall below half of it (the gap stops accounts
+        near the line from flapping) switch back, and their followers' feeds
+        are filled with their recent activity. Returns (promoted, demoted)"""
+        with self.conn.cursor() as cursor:
+            cursor.execute("""
+                CREATE TEMP TABLE follower_counts ON COMMIT DROP AS
+                SELECT following_id AS user_id, count(*) AS followers FROM user_follows GROUP BY following_id
+            """)
+            cursor.execute("""
+                INSERT INTO feed_pull_authors (user_id, followers, updated_at)
+                SELECT user_id, followers, NOW() FROM follower_counts WHERE followers >= %s
+                ON CONFLICT (user_id) DO UPDATE SET followers = EXCLUDED.followers, updated_at = NOW()
+                RETURNING (xmax = 0)
+            """, (self.pull_threshold,))
+            promoted = sum(1 for (inserted,) in cursor.fetchall() if inserted)
+            cursor.execute("""
+                DELETE FROM feed_pull_authors p
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM follower_counts c WHERE c.user_id = p.user_id AND c.followers >= %s
+                )
+                RETURNING p.user_id
+            """, (self.pull_threshold // 2,))
+            demoted = [row[0] for row in cursor.fetchall()]
+            if demoted:
+                self.copy_recent(cursor, "SELECT follower_id, following_id FROM user_follows WHERE following_id = ANY(%s)",
+                                 (demoted,))
+        self.conn.commit()
+        if promoted or demoted:
+            logger.info(f"Pull authors: {promoted} promoted, {len(demoted)} demoted")
+        return promoted, len(demoted)
+
+    # Incremental passes
+
+    def run_source(self, kind: str) -> int:
+        """Fan out one source's new and updated rows; returns rows consumed"""
+        table, alias, visible = SOURCES[kind]
+        consumed = 0
+        while True:
+            with self.conn.cursor() as cursor:
+                position = self._position(cursor, kind)
+                cursor.execute(f"""
+                    SELECT {alias}.id, {alias}.user_id, {alias}.created_at, {alias}.updated_at,
+                           {alias}.user_id IS NOT NULL AND {alias}.created_at IS NOT NULL AND {visible}
+                    FROM {table} {alias}
+                    WHERE ({alias}.updated_at, {alias}.id) > (%s, %s)
+                      AND {alias}.updated_at < NOW() - %s * INTERVAL '1 second'
+                    ORDER BY {alias}.updated_at, {alias}.id
+                    LIMIT %s
+                """, (position[0], position[1], self.settle_seconds, self.batch_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    self.conn.rollback()
+                    return consumed
+                self.fan_out(cursor, kind, [(row_id, actor, created) for row_id, actor, created, _, shown in rows if shown])
+                last = rows[-1]
+                self._advance(cursor, kind, (last[3], last[0]))
+            self.conn.commit()
+            consumed += len(rows)
+            self.stats["items"] += len(rows)
+            if len(rows) < self.batch_size:
+                return consumed
+
+    def run_follows(self) -> int:
+        """Give new follows the followed account's recent activity; returns follows consumed"""
+        consumed = 0
+        while True:
+            with self.conn.cursor() as cursor:
+                position = self._position(cursor, "follow")
+                cursor.execute("""
+                    SELECT id, follower_id, following_id, created_at FROM user_follows
+                    WHERE (created_at, id) > (%s, %s) AND created_at < NOW() - %s * INTERVAL '1 second'
+                    ORDER BY created_at, id
+                    LIMIT %s
+                """, (position[0], position[1], self.settle_seconds, self.batch_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    self.conn.rollback()
+                    return consumed
+                self.copy_recent(cursor, "SELECT * FROM unnest(%s::int[], %s::int[]) AS e(follower_id, following_id)",
+                                 ([row[1] for row in rows], [row[2] for row in rows]))
+                last = rows[-1]
+                self._advance(cursor, "follow", (last[3], last[0]))
+            self.conn.commit()
+            consumed += len(rows)
+            self.stats["follows"] += len(rows)
+            if len(rows) < self.batch_size:
+                return consumed
+
+    def run_once(self) -> Dict[str, int]:
+        consumed = {"follow": self.run_follows()}
+        for kind in SOURCES:
+            consumed[kind] = self.run_source(kind)
+        return consumed
+
+    # Backfill
+
+    def _latest_positions(self) -> Dict[str, Tuple[datetime, int]]:
+        positions = {}
+        with self.conn.cursor() as cursor:
+            for source, table, column in [(kind, table, "updated_at") for kind, (table, _, _) in SOURCES.items()] \
+                    + [("follow", "user_follows", "created_at")]:
+                cursor.execute(f"SELECT {column}, id FROM {table} ORDER BY {column} DESC NULLS LAST, id DESC LIMIT 1")
+                row = cursor.fetchone()
+                positions[source] = tuple(row) if row and row[0] else NO_POSITION
+        self.conn.commit()
+        return positions
+
+    def backfill(self, chunk_users: int = 2000, progress=None) -> int:
+        """Rebuild every feed from user_follows and the activity tables, then
+        start incremental passes from where the rebuild began. Activity written
+        during the rebuild is fanned out again by the next pass, which is
+        harmless. Returns rows written"""
+        self.refresh_pull_authors()
+        positions = self._latest_positions()
+        with self.conn.cursor() as cursor:
+            cursor.execute("SELECT COALESCE(MIN(follower_id), 0), COALESCE(MAX(follower_id), -1) FROM user_follows")
+            low, high = cursor.fetchone()
+        self.conn.commit()
+
+        written = 0
+        for start in range(low, high + 1, chunk_users):
+            end = min(start + chunk_users, high + 1)
+            with self.conn.cursor() as cursor:
+                written += self.copy_recent(cursor, """
+                    SELECT follower_id, following_id FROM user_follows WHERE follower_id >= %s AND follower_id < %s
+                """, (start, end), replace=True)
+            self.conn.commit()
+            if progress:
+                progress(end - low, high + 1 - low, written)
+
+        with self.conn.cursor() as cursor:
+            for source, position in positions.items():
+                self._advance(cursor, source, position)
+        self.conn.commit()
+        return written
+
+    def run(self, interval: float, pull_refresh_interval: float, stop: threading.Event):
+        """Poll until stop is set, then trim whatever is pending"""
+        pull_refreshed = trimmed = time.monotonic() - max(pull_refresh_interval, self.trim_interval)
+        while not stop.is_set():
+            started = time.perf_counter()
+            if time.monotonic() - pull_refreshed >= pull_refresh_interval:
+                self.refresh_pull_authors()
+                pull_refreshed = time.monotonic()
+            consumed = self.run_once()
+            if any(consumed.values()):
+                logger.info(f"Fanned out {consumed} in {(time.perf_counter() - started) * 1000:.0f} ms; "
+                            f"totals {self.stats}")
+            if time.monotonic() - trimmed >= self.trim_interval:
+                started, feeds = time.perf_counter(), len(self.untrimmed)
+                removed = self.trim_pending()
+                if feeds:
+                    logger.info(f"Trimmed {feeds:,} feeds, {removed:,} rows, in {(time.perf_counter() - started) * 1000:.0f} ms")
+                trimmed = time.monotonic()
+            stop.wait(interval)
+        self.trim_pending()
+
+# Whether a materialized item's source row still exists and is visible
+STILL_VISIBLE = "CASE fi.item_type " + " ".join(
+    f"WHEN '{kind}' THEN EXISTS (SELECT 1 FROM {table} {alias} WHERE {alias}.id = fi.item_id AND {visible})"
+    for kind, (table, alias, visible) in SOURCES.items()
+) + " END"
+
+# One page of a feed: $1 user_id, $2 page size, and the exclusive
+# (created_at, item_type, item_id) cursor to continue after in $3, $4, $5.
+# Visibility is checked before the limit, so pages are only short at the end
+FEED_PAGE_SQL = f"""
+    WITH feed AS (
+        (
+            SELECT fi.item_type, fi.item_id, fi.actor_id, fi.created_at
+            FROM feed_items fi
+            WHERE fi.user_id = $1 AND (fi.created_at, fi.item_type, fi.item_id) < ($3, $4, $5)
+              AND EXISTS (
+                  SELECT 1 FROM user_follows f WHERE f.follower_id = fi.user_id AND f.following_id = fi.actor_id
+              )
+              AND {STILL_VISIBLE}
+            ORDER BY {FEED_ORDER}
+            LIMIT $2
+        )
+        UNION
+        SELECT a.*
+        FROM user_follows f
+        JOIN feed_pull_authors pa ON pa.user_id = f.following_id
+        CROSS JOIN LATERAL ({recent_activity_sql("f.following_id", "$2", ("$3", "$4", "$5"))}) a
+        WHERE f.follower_id = $1
+    ), page AS (
+        SELECT * FROM feed ORDER BY {FEED_ORDER} LIMIT $2
+    )
+    SELECT page.item_type, page.item_id, page.actor_id, u.name, page.created_at,
+           COALESCE(p.title, r.title),
+           LEFT(COALESCE(p.abstract, r.description, c.content), 280),
+           c.parent_type, c.parent_id
+    FROM page
+    JOIN users u ON u.id = page.actor_id
+    LEFT JOIN papers p ON page.item_type = 'paper' AND p.id = page.item_id
+    LEFT JOIN research_projects r ON page.item_type = 'project' AND r.id = page.item_id
+    LEFT JOIN research_comments c ON page.item_type = 'comment' AND c.id = page.item_id
+    ORDER BY page.created_at DESC, page.item_type DESC, page.item_id DESC
+"""
+
+# Connections holding a prepared feed_page; planning the query costs twice as much as running it
+_prepared = weakref.WeakSet()
+
+def read_feed(cursor, user_id: int, limit: int = 50, before: Optional[FeedCursor] = None) -> List[dict]:
+    """A page of a user's feed, newest first, after the `before` cursor if
+    given: their materialized items merged with the recent activity of
+    followed pull authors. Items are checked against their source rows, so
+    anything deleted or made private since it was fanned out is dropped, and
+    items from accounts no longer followed are skipped"""
+    if cursor.connection not in _prepared:
+        cursor.execute(f"PREPARE feed_page (integer, integer, timestamptz, varchar, integer) AS {FEED_PAGE_SQL}")
+        _prepared.add(cursor.connection)
+    at, item_type, item_id = before or ("infinity", "", 0)
+    cursor.execute("EXECUTE feed_page (%s, %s, %s, %s, %s)", (user_id, limit, at, item_type, item_id))
+    items = []
+    for item_type, item_id, actor_id, actor_name, created_at, title, snippet, parent_type, parent_id in cursor.fetchall():
+        item = {"type": item_type, "id": item_id, "actor_id": actor_id, "actor_name": actor_name,
+                "created_at": created_at.isoformat(), "title": title, "snippet": snippet}
+        if item_type == "comment":
+            item.update(parent_type=parent_type, parent_id=parent_id)
+        items.append(item)
+    return items
+
+class FeedReader:
+    """Reads feeds for the API from a small connection pool opened on first use"""
+
+    def __init__(self, pool_size: int = 5):
+        self.pool_size = pool_size
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # getconn() raises rather than waits once the pool is empty
+        self._slots = asyncio.Semaphore(pool_size)
+        self.reads = 0
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                from psycopg2.pool import ThreadedConnectionPool
+
+                dsn = os.getenv("DATABASE_URL")
+                if dsn:
+                    self._pool = ThreadedConnectionPool(1, self.pool_size, dsn)
+                else:
+                    self._pool = ThreadedConnectionPool(
+                        1, self.pool_size,
+                        host=os.getenv('PGHOST', 'localhost'),
+                        database=os.getenv('PGDATABASE', 'research_hub'),
+                        user=os.getenv('PGUSER', 'postgres'),
+                        password=os.getenv('PGPASSWORD', ''),
+                        port=os.getenv('PGPORT', '5432')
+                    )
+        return self._pool
+
+    def read(self, user_id: int, limit: int = 50, before: Optional[FeedCursor] = None) -> List[dict]:
+        """Blocking; async code should use aread"""
+        pool = self._get_pool()
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                items = read_feed(cursor, user_id, limit, before)
+            conn.commit()
+        finally:
+            pool.putconn(conn)
+        self.reads += 1
+        return items
+
+    async def aread(self, user_id: int, limit: int = 50, before: Optional[FeedCursor] = None) -> List[dict]:
+        """read in a thread, with at most pool_size at once"""
+        async with self._slots:
+            return await asyncio.to_thread(self.read, user_id, limit, before)
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Materialize follower activity feeds")
+    parser.add_argument("--backfill", action="store_true", help="Rebuild every feed, then exit (or keep polling with --follow)")
+    parser.add_argument("--follow", action="store_true", help="With --backfill, keep polling afterwards")
+    parser.add_argument("--once", action="store_true", help="Run one incremental pass and exit")
+    parser.add_argument("--interval", type=float, default=float(os.getenv("FEED_POLL_SECONDS", "2")),
+                        help="Seconds between incremental passes")
+    parser.add_argument("--feed-length", type=int, default=int(os.getenv("FEED_LENGTH", "500")),
+                        help="Items kept per feed")
+    parser.add_argument("--pull-threshold", type=int, default=int(os.getenv("FEED_PULL_THRESHOLD", "10000")),
+                        help="Followers at which an account's activity is merged at read time instead of fanned out")
+    parser.add_argument("--pull-refresh-seconds", type=float, default=600.0,
+                        help="Seconds between follower recounts for the pull threshold")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Source rows fanned out per transaction")
+    parser.add_argument("--settle-seconds", type=float, default=5.0,
+                        help="Age a row must reach before it is fanned out")
+    parser.add_argument("--trim-seconds", type=float, default=60.0,
+                        help="Seconds between trims of feeds that grew past --feed-length")
+    parser.add_argument("--trim-slack", type=int, help="Items a feed may grow past --feed-length before it is "
+                                                         "trimmed (default: a tenth of it)")
+    parser.add_argument("--chunk-users", type=int, default=2000, help="Followers rebuilt per backfill transaction")
+    return parser.parse_args()
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    args = parse_args()
+    conn = connect()
+    worker = FeedWorker(conn, feed_length=args.feed_length, pull_threshold=args.pull_threshold,
+                        batch_size=args.batch_size, settle_seconds=args.settle_seconds,
+                        trim_interval=args.trim_seconds, trim_slack=args.trim_slack)
+    try:
+        worker.ensure_schema()
+        if args.backfill:
+            started = time.perf_counter()
+
+            def progress(done: int, total: int, written: int):
+                print(f"\r   • {done:,}/{total:,} user ids, {written:,} feed rows", end="", flush=True)
+
+            print("🚀 Rebuilding feeds...")
+            written = worker.backfill(args.chunk_users, progress)
+            elapsed = time.perf_counter() - started
+            print(f"\n✅ Wrote {written:,} feed rows in {elapsed:.1f}s ({written / max(elapsed, 1e-9):,.0f} rows/s)")
+            if not args.follow:
+                return
+        if args.once:
+            worker.refresh_pull_authors()
+            consumed = worker.run_once()
+            worker.trim_pending()
+            print(f"✅ {consumed} rows consumed; {worker.stats}")
+            return
+
+        stop = threading.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: stop.set())
+        worker.run(args.interval, args.pull_refresh_seconds, stop)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
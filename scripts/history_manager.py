@@ -0,0 +1,134 @@
+"""
+Conversation history compaction for the Research Assistant API
+Fills a token budget with the newest turns and folds older turns into a
+cached rolling summary
+"""
+
+import hashlib
+import logging
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from request_coalescing import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Every chat message carries a few tokens of framing on top of its content
+MESSAGE_OVERHEAD_TOKENS = 4
+
+Summarizer = Callable[[Optional[str], List[dict], int], Awaitable[str]]
+
+class TokenCounter:
+    """Counts tokens with tiktoken when it is installed, otherwise estimates
+    roughly four characters per token. Counts are memoized per text"""
+
+    def __init__(self, model: str = "gpt-4", cache_size: int = 8192):
+        self.model = model
+        self._encoding = None
+        self._encoding_loaded = False
+        self.count = lru_cache(maxsize=cache_size)(self._count)
+
+    def _get_encoding(self):
+        if not self._encoding_loaded:
+            self._encoding_loaded = True
+            try:
+                import tiktoken
+                self._encoding = tiktoken.encoding_for_model(self.model)
+            except Exception as e:
+                logger.warning(f"tiktoken unavailable, estimating token counts: {e}")
+        return self._encoding
+
+    def _count(self, text: str) -> int:
+        encoding = self._get_encoding()
+        if encoding is not None:
+            return len(encoding.encode(text))
+        return max(1, (len(text) + 3) // 4)
+
+    def message_tokens(self, message: dict) -> int:
+        return self.count(str(message.get("content", ""))) + MESSAGE_OVERHEAD_TOKENS
+
+def _chain_hash(previous: str, message: dict) -> str:
+    digest = hashlib.sha1(previous.encode("utf-8"))
+    digest.update(f"{message.get('role', '')}\x00{message.get('content', '')}".encode("utf-8"))
+    return digest.hexdigest()
+
+class HistoryManager:
+    """Selects the conversation context sent with each request"""
+
+    def __init__(self, counter: TokenCounter, token_budget: int = 3000,
+                 summary_tokens: int = 300, summarizer: Optional[Summarizer] = None,
+                 summary_cache_size: int = 1024):
+        self.counter = counter
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.summarizer = summarizer
+        self.summary_cache_size = summary_cache_size
+        self._summaries: "OrderedDict[str, str]" = OrderedDict()
+        self._single_flight = SingleFlight()
+
+    def fit(self, history: List[dict], budget: Optional[int] = None) -> Tuple[List[dict], List[dict]]:
+        """Split history into (older, window): the window is the longest run of
+        newest messages that fits the token budget"""
+        budget = self.token_budget if budget is None else budget
+        used = 0
+        start = len(history)
+        while start > 0:
+            tokens = self.counter.message_tokens(history[start - 1])
+            if used + tokens > budget:
+                break
+            used += tokens
+            start -= 1
+        return history[:start], history[start:]
+
+    def window(self, history: List[dict]) -> List[dict]:
+        """Budgeted window without a summary, for callers outside the event loop"""
+        return self.fit(history or [])[1]
+
+    async def prepare(self, history: List[dict]) -> List[dict]:
+        """Context messages for a request: a summary of older turns (if any
+        were dropped and a summarizer is configured) followed by the window"""
+        history = history or []
+        older, window = self.fit(history)
+        if not older or self.summarizer is None:
+            return window
+
+        # Reserve room for the summary by trimming the window further
+        older, window = self.fit(history, self.token_budget - self.summary_tokens)
+        summary = await self.summarize(older)
+        if not summary:
+            return window
+        return [{"role": "system", "content": f"Summary of the earlier conversation: {summary}"}] + window
+
+    async def summarize(self, older: List[dict]) -> Optional[str]:
+        """Rolling summary of `older`, extending the longest already-summarized prefix"""
+        chain = []
+        previous = ""
+        for message in older:
+            previous = _chain_hash(previous, message)
+            chain.append(previous)
+
+        key = chain[-1]
+        if key in self._summaries:
+            self._summaries.move_to_end(key)
+            return self._summaries[key]
+
+        prefix_length, prefix_summary = 0, None
+        for length in range(len(chain) - 1, 0, -1):
+            if chain[length - 1] in self._summaries:
+                prefix_length, prefix_summary = length, self._summaries[chain[length - 1]]
+                break
+
+        try:
+            summary = await self._single_flight.do(
+                key,
+                lambda: self.summarizer(prefix_summary, older[prefix_length:], self.summary_tokens)
+            )
+        except Exception as e:
+            logger.warning(f"History summarization failed: {e}")
+            return prefix_summary
+
+        self._summaries[key] = summary
+        while len(self._summaries) > self.summary_cache_size:
+            self._summaries.popitem(last=False)
+        return summary
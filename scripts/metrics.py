@@ -0,0 +1,280 @@
+"""
+Prometheus-style metrics for the Research Assistant API
+Counters, gauges and histograms kept in plain dicts and rendered in the text
+exposition format at /metrics. Recording a sample is a dict lookup and an
+addition, so instrumentation can stay on in production. Under serve.py's
+pre-forked workers, SharedMetrics merges every worker's figures into one scrape
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+# A family is a JSON-ready dict: name, kind, help and samples, each a [labels dict, value]
+# pair. A histogram's value is [per-bucket counts (last is +Inf), sum] and its family
+# also carries the bucket bounds
+Family = dict
+
+def render_family(family: Family) -> List[str]:
+    name = family["name"]
+    lines = [f"# HELP {name} {family['help']}", f"# TYPE {name} {family['kind']}"]
+    if family["kind"] != "histogram":
+        lines.extend(f"{name}{_format_labels(labels)} {value}" for labels, value in family["samples"])
+        return lines
+    bounds = [repr(float(bound)) for bound in family["buckets"]] + ["+Inf"]
+    for labels, (counts, total) in family["samples"]:
+        cumulative = 0
+        for le, count in zip(bounds, counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels({**labels, 'le': le})} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+        lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    return lines
+
+def render(families: Iterable[Family]) -> str:
+    return "\n".join(line for family in families for line in render_family(family)) + "\n"
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: dict = {}
+
+    def family(self) -> Family:
+        return {"name": self.name, "kind": self.kind, "help": self.help, "samples": [
+            [dict(zip(self.labelnames, labels)), self._sample(value)] for labels, value in self._values.items()
+        ]}
+
+    def _sample(self, value):
+        return value
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str):
+        self._values[labels] = value
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: [per-bucket counts (last is +Inf), sum]
+
+    def observe(self, value: float, *labels: str):
+        entry = self._values.get(labels)
+        if entry is None:
+            entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    @contextmanager
+    def time(self, *labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def family(self) -> Family:
+        return {**super().family(), "buckets": list(self.buckets)}
+
+    def _sample(self, value):
+        # Copied so a snapshot stays fixed while observations continue
+        counts, total = value
+        return [list(counts), total]
+
+# A collector returns (name, kind, help, [(labels dict, value), ...]) tuples read at scrape time
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]]
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Collector] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Collector):
+        self._collectors.append(collector)
+
+    def families(self) -> List[Family]:
+        families = [metric.family() for metric in self._metrics]
+        for collector in self._collectors:
+            for name, kind, help, samples in collector():
+                families.append({"name": name, "kind": kind, "help": help,
+                                 "samples": [[dict(labels), value] for labels, value in samples]})
+        return families
+
+    def render(self) -> str:
+        return render(self.families())
+
+def merge(snapshots: Dict[int, List[Family]], alive: Set[int]) -> List[Family]:
+    """Combine per-worker families. Counters and histograms are summed over
+    every snapshot, including those of workers that have since exited, so
+    totals never go backwards when a worker is replaced. Gauges describe a
+    live process and are kept per live worker under a `pid` label"""
+    merged: Dict[str, Family] = {}
+    for pid, families in snapshots.items():
+        for family in families:
+            entry = merged.setdefault(family["name"], {**family, "samples": {}})
+            if family["kind"] == "gauge":
+                if pid in alive:
+                    for labels, value in family["samples"]:
+                        labels = {**labels, "pid": str(pid)}
+                        entry["samples"][tuple(labels.items())] = [labels, value]
+                continue
+            for labels, value in family["samples"]:
+                key = tuple(labels.items())
+                if key not in entry["samples"]:
+                    entry["samples"][key] = [labels, value]
+                elif family["kind"] == "histogram":
+                    counts, total = entry["samples"][key][1]
+                    entry["samples"][key][1] = [[a + b for a, b in zip(counts, value[0])], total + value[1]]
+                else:
+                    entry["samples"][key][1] += value
+    return [{**family, "samples": list(family["samples"].values())} for family in merged.values()]
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class SharedMetrics:
+    """Serves every worker's metrics from whichever worker is scraped. Each
+    worker writes its registry to `directory` as <pid>.json every `interval`
+    seconds and when it stops; a scrape writes the scraped worker's own file
+    and merges all of them, so other workers' figures lag by up to `interval`"""
+
+    def __init__(self, registry: Registry, directory: str, interval: float = 5.0):
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        os.makedirs(directory, exist_ok=True)
+
+    def flush(self):
+        self._write(self.registry.families())
+
+    def _write(self, families: List[Family]):
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(families, f)
+        # Readers see the previous snapshot or this one, never a partial file
+        os.replace(f"{path}.tmp", path)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                # Snapshot on the event loop, which is what records samples; write off it
+                await asyncio.to_thread(self._write, self.registry.families())
+            except OSError as e:
+                logger.warning(f"Could not write metrics snapshot: {e}")
+
+    def snapshots(self) -> Dict[int, List[Family]]:
+        snapshots = {}
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    snapshots[int(name[:-len(".json")])] = json.load(f)
+            except (OSError, ValueError):
+                continue  # Replaced or removed while listing
+        return snapshots
+
+    def render(self) -> str:
+        self.flush()
+        snapshots = self.snapshots()
+        return render(merge(snapshots, {pid for pid in snapshots if _alive(pid)}))
+
+REGISTRY = Registry()
+
+def counter(name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, help, labelnames))
+
+def gauge(name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, help, labelnames))
+
+def histogram(name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, help, labelnames, buckets))
+
+HTTP_REQUESTS = counter("http_requests_total", "HTTP requests by endpoint, method and status", ("endpoint", "method", "status"))
+HTTP_LATENCY = histogram("http_request_duration_seconds", "Time until the full response body is sent", ("endpoint",))
+HTTP_IN_FLIGHT = gauge("http_requests_in_flight", "HTTP requests currently being served")
+STAGE_LATENCY = histogram("chat_stage_duration_seconds", "Time spent per chat processing stage", ("stage",))
+UPSTREAM_REQUESTS = counter("upstream_requests_total", "Completion API calls by outcome", ("outcome",))
+UPSTREAM_IN_FLIGHT = gauge("upstream_requests_in_flight", "Completion API calls in progress")
+UPSTREAM_TOKENS = counter("upstream_tokens_total", "Tokens reported by the completion API", ("model", "kind"))
+
+def observe_stage(stage: str, started: float):
+    """Record a stage that began at `started` (a perf_counter reading) and ends now"""
+    STAGE_LATENCY.observe(time.perf_counter() - started, stage)
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts, in-flight requests and latency
+    per route template. Duration covers the whole body, so streams are timed to their end"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        # Exposed to endpoints as request.state.received_at
+        scope.setdefault("state", {})["received_at"] = started
+        status = ["500"]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            # The router records the matched route in the scope; templates keep label cardinality bounded
+            route = scope.get("route")
+            endpoint = getattr(route, "path", "unmatched")
+            HTTP_REQUESTS.inc(endpoint, scope["method"], status[0])
+            HTTP_LATENCY.observe(time.perf_counter() - started, endpoint)
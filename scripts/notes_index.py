@@ -0,0 +1,339 @@
+"""
+Retrieval over a user's own notes and citations for the Research Assistant API
+An in-process BM25 inverted index per user, built from research_notes and
+citations, kept current by diffing row versions and queried without any
+external search service
+"""
+
+import os
+import re
+import math
+import time
+import heapq
+import asyncio
+import threading
+import logging
+from array import array
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from history_manager import TokenCounter
+from request_coalescing import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+STOPWORDS = frozenset("""
+    a about above after again against all am an and any are as at be because been before being below
+    between both but by can could did do does doing down during each few for from further had has have
+    having he her here hers herself him himself his how i if in into is it its itself just me more most
+    my myself no nor not now of off on once only or other our ours ourselves out over own same she
+    should so some such than that the their theirs them themselves then there these they this those
+    through to too under until up very was we were what when where which while who whom why will with
+    would you your yours yourself yourselves
+""".split())
+
+# A document is keyed by its source table and row ID, e.g. ("note", 42)
+DocKey = Tuple[str, int]
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords or single characters"""
+    return [token for token in TOKEN_PATTERN.findall(text.lower())
+            if len(token) > 1 and token not in STOPWORDS]
+
+class SearchHit:
+    __slots__ = ("key", "title", "score", "snippet")
+
+    def __init__(self, key: DocKey, title: str, score: float, snippet: str):
+        self.key = key
+        self.title = title
+        self.score = score
+        self.snippet = snippet
+
+    def to_dict(self) -> dict:
+        return {"source": self.key[0], "id": self.key[1], "title": self.title,
+                "score": round(self.score, 4), "snippet": self.snippet}
+
+class UserIndex:
+    """BM25 index over one user's documents. Each term's postings are two
+    parallel arrays (document slots and term frequencies). Updates append a
+    new slot and tombstone the old one; the index is compacted once dead
+    slots outnumber live ones"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._slots: Dict[DocKey, int] = {}
+        self._keys: List[Optional[DocKey]] = []
+        self._titles: List[str] = []
+        self._texts: List[str] = []
+        self._lengths = array("I")
+        self._live = bytearray()
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._df: Counter = Counter()
+        self._total_length = 0
+        self.versions: Dict[DocKey, object] = {}
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def upsert(self, key: DocKey, title: str, text: str, version: object = None):
+        """Add a document, replacing any previous version with the same key"""
+        self.remove(key)
+        terms = Counter(tokenize(f"{title} {text}"))
+        slot = len(self._keys)
+        self._slots[key] = slot
+        self._keys.append(key)
+        self._titles.append(title)
+        self._texts.append(text)
+        length = sum(terms.values())
+        self._lengths.append(length)
+        self._live.append(1)
+        self._total_length += length
+        for term, tf in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array("I"), array("H"))
+            postings[0].append(slot)
+            postings[1].append(min(tf, 0xFFFF))
+            self._df[term] += 1
+        self.versions[key] = version
+
+    def remove(self, key: DocKey):
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            return
+        self.versions.pop(key, None)
+        self._live[slot] = 0
+        self._total_length -= self._lengths[slot]
+        for term in set(tokenize(f"{self._titles[slot]} {self._texts[slot]}")):
+            self._df[term] -= 1
+            if not self._df[term]:
+                del self._df[term]
+        self._keys[slot] = None
+        if len(self._keys) - len(self._slots) > max(64, len(self._slots)):
+            self._compact()
+
+    def _compact(self):
+        documents = [(key, self._titles[slot], self._texts[slot], self.versions.get(key))
+                     for key, slot in self._slots.items()]
+        self.__init__(self.k1, self.b)
+        for key, title, text, version in documents:
+            self.upsert(key, title, text, version)
+
+    def _idf(self, term: str) -> float:
+        df = self._df.get(term, 0)
+        return math.log(1 + (len(self._slots) - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, k: int = 5, snippet_chars: int = 400) -> List[SearchHit]:
+        """Top-k documents for `query` by BM25, each with its best-matching passage"""
+        if not self._slots:
+            return []
+        terms = {term: self._idf(term) for term in set(tokenize(query)) if term in self._df}
+        if not terms:
+            return []
+
+        k1, b = self.k1, self.b
+        average = self._total_length / len(self._slots) or 1.0
+        lengths, live = self._lengths, self._live
+        scores: Dict[int, float] = {}
+        for term, idf in terms.items():
+            slots, freqs = self._postings[term]
+            for slot, tf in zip(slots, freqs):
+                if live[slot]:
+                    norm = k1 * (1 - b + b * lengths[slot] / average)
+                    scores[slot] = scores.get(slot, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [
+            SearchHit(self._keys[slot], self._titles[slot], score,
+                      best_passage(self._texts[slot], terms, snippet_chars))
+            for slot, score in best
+        ]
+
+    def stats(self) -> dict:
+        return {"documents": len(self._slots), "slots": len(self._keys), "terms": len(self._postings)}
+
+def best_passage(text: str, weights: Dict[str, float], max_chars: int) -> str:
+    """The run of sentences starting at the one with the highest summed weight
+    of distinct query terms, cut to max_chars on a word boundary"""
+    sentences = SENTENCE_PATTERN.split(text.strip())
+    start = max(range(len(sentences)),
+                key=lambda i: sum(weights.get(term, 0.0) for term in set(tokenize(sentences[i]))))
+    passage = " ".join(sentences[start:])
+    if len(passage) > max_chars:
+        passage = passage[:max_chars].rsplit(" ", 1)[0] + " …"
+    return passage
+
+def citation_text(authors: Optional[List[str]], journal: Optional[str], year: Optional[int],
+                  notes: Optional[str], tags: Optional[List[str]]) -> str:
+    parts = []
+    if authors:
+        parts.append(", ".join(authors) + ".")
+    if journal or year:
+        parts.append(" ".join(str(part) for part in (journal, year) if part) + ".")
+    if notes:
+        parts.append(notes)
+    if tags:
+        parts.append(" ".join(tags))
+    return " ".join(parts)
+
+class NotesIndex:
+    """Per-user indexes held in an LRU. A user's index is built on first use
+    and refreshed at most every refresh_interval seconds: a cheap query of
+    (id, updated_at) for their rows finds added, edited and deleted documents,
+    and only those are fetched and re-indexed"""
+
+    def __init__(self, max_users: int = 2000, refresh_interval: float = 30.0, pool_size: int = 5):
+        self.max_users = max_users
+        self.refresh_interval = refresh_interval
+        self.pool_size = pool_size
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # getconn() raises rather than waits once the pool is empty, so loads
+        # for different users never run more queries at once than it holds
+        self._slots = asyncio.Semaphore(pool_size)
+        self._users: "OrderedDict[int, Tuple[UserIndex, float]]" = OrderedDict()
+        self._single_flight = SingleFlight()
+        self.builds = 0
+        self.refreshes = 0
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                from psycopg2.pool import ThreadedConnectionPool
+
+                dsn = os.getenv("DATABASE_URL")
+                if dsn:
+                    self._pool = ThreadedConnectionPool(1, self.pool_size, dsn)
+                else:
+                    self._pool = ThreadedConnectionPool(
+                        1, self.pool_size,
+                        host=os.getenv('PGHOST', 'localhost'),
+                        database=os.getenv('PGDATABASE', 'research_hub'),
+                        user=os.getenv('PGUSER', 'postgres'),
+                        password=os.getenv('PGPASSWORD', ''),
+                        port=os.getenv('PGPORT', '5432')
+                    )
+        return self._pool
+
+    def _query(self, sql: str, params: tuple) -> List[tuple]:
+        pool = self._get_pool()
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+            conn.commit()
+        finally:
+            pool.putconn(conn)
+        return rows
+
+    def _fetch_versions(self, user_id: int) -> Dict[DocKey, object]:
+        rows = self._query("""
+            SELECT 'note', id, updated_at FROM research_notes WHERE user_id = %s
+            UNION ALL
+            SELECT 'citation', id, updated_at FROM citations WHERE user_id = %s
+        """, (user_id, user_id))
+        return {(source, row_id): updated_at for source, row_id, updated_at in rows}
+
+    def _fetch_documents(self, user_id: int, keys: Iterable[DocKey]) -> List[Tuple[DocKey, str, str, object]]:
+        note_ids = [row_id for source, row_id in keys if source == "note"]
+        citation_ids = [row_id for source, row_id in keys if source == "citation"]
+        documents = []
+        if note_ids:
+            for row_id, title, content, tags, updated_at in self._query("""
+                SELECT id, title, content, tags, updated_at FROM research_notes
+                WHERE user_id = %s AND id = ANY(%s)
+            """, (user_id, note_ids)):
+                text = " ".join(part for part in (content, " ".join(tags or [])) if part)
+                documents.append((("note", row_id), title, text, updated_at))
+        if citation_ids:
+            for row_id, title, authors, journal, year, notes, tags, updated_at in self._query("""
+                SELECT id, title, authors, journal, year, notes, tags, updated_at FROM citations
+                WHERE user_id = %s AND id = ANY(%s)
+            """, (user_id, citation_ids)):
+                documents.append((("citation", row_id), title, citation_text(authors, journal, year, notes, tags), updated_at))
+        return documents
+
+    def _build(self, user_id: int) -> UserIndex:
+        index = UserIndex()
+        for key, title, text, version in self._fetch_documents(user_id, self._fetch_versions(user_id)):
+            index.upsert(key, title, text, version)
+        return index
+
+    def _changes(self, user_id: int, index: UserIndex) -> Tuple[List[DocKey], List[Tuple[DocKey, str, str, object]]]:
+        versions = self._fetch_versions(user_id)
+        removed = [key for key in index.versions if key not in versions]
+        changed = [key for key, version in versions.items()
+                   if key not in index.versions or index.versions[key] != version]
+        return removed, self._fetch_documents(user_id, changed)
+
+    async def _load(self, user_id: int) -> UserIndex:
+        entry = self._users.get(user_id)
+        if entry is None:
+            # A full build tokenizes every document, so it stays off the event loop
+            async with self._slots:
+                index = await asyncio.to_thread(self._build, user_id)
+            self.builds += 1
+        else:
+            index = entry[0]
+            async with self._slots:
+                removed, changed = await asyncio.to_thread(self._changes, user_id, index)
+            # Applied on the event loop so searches never see a half-updated index
+            for key in removed:
+                index.remove(key)
+            for key, title, text, version in changed:
+                index.upsert(key, title, text, version)
+            self.refreshes += 1
+        self._users[user_id] = (index, time.monotonic())
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+        return index
+
+    async def get(self, user_id: int) -> UserIndex:
+        """The user's index, built or refreshed first if it is missing or stale"""
+        entry = self._users.get(user_id)
+        if entry is not None and time.monotonic() - entry[1] < self.refresh_interval:
+            self._users.move_to_end(user_id)
+            return entry[0]
+        return await self._single_flight.do(f"notes-index:{user_id}", lambda: self._load(user_id))
+
+    async def search(self, user_id: int, query: str, k: int = 5, snippet_chars: int = 400) -> List[SearchHit]:
+        return (await self.get(user_id)).search(query, k, snippet_chars)
+
+    def invalidate(self, user_id: int):
+        """Force a refresh on the user's next query, e.g. right after they edit a note"""
+        entry = self._users.get(user_id)
+        if entry is not None:
+            self._users[user_id] = (entry[0], float("-inf"))
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._users),
+            "documents": sum(len(index) for index, _ in self._users.values()),
+            "builds": self.builds,
+            "refreshes": self.refreshes
+        }
+
+def format_grounding(hits: List[SearchHit], counter: TokenCounter, token_budget: int) -> Optional[str]:
+    """System message content quoting the hits best-first, stopping before the
+    token budget is exceeded. None when nothing fits"""
+    header = ("Excerpts from the user's own research notes and citations that may be relevant. "
+              "Use them where they help and refer to them by title:")
+    used = counter.count(header)
+    lines = []
+    for hit in hits:
+        label = "Note" if hit.key[0] == "note" else "Citation"
+        line = f"- [{label}] {hit.title}: {hit.snippet}"
+        tokens = counter.count(line)
+        if used + tokens > token_budget:
+            break
+        lines.append(line)
+        used += tokens
+    if not lines:
+        return None
+    return "\n".join([header] + lines)
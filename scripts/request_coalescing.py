@@ -0,0 +1,97 @@
+"""
+Request coalescing for the Research Assistant API
+Concurrent requests with the same key share a single upstream completion
+(single-flight), for both whole responses and token streams
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+class _Broadcast:
+    """Buffers a token stream so any number of subscribers can replay it from the start"""
+
+    def __init__(self):
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        # The task feeding this broadcast; the event loop only keeps weak references to tasks
+        self.pump: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def publish(self, chunk: Any):
+        self.chunks.append(chunk)
+        self._notify()
+
+    def finish(self, error: Optional[BaseException] = None):
+        self.done = True
+        self.error = error
+        self._notify()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def subscribe(self) -> AsyncIterator[Any]:
+        position = 0
+        while True:
+            while position < len(self.chunks):
+                yield self.chunks[position]
+                position += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+class SingleFlight:
+    """Deduplicates identical in-flight upstream calls"""
+
+    def __init__(self):
+        self.upstream_calls = 0
+        self.coalesced = 0
+        self._calls: Dict[str, asyncio.Future] = {}
+        self._streams: Dict[str, _Broadcast] = {}
+
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Await `call()`, or the identical call already in flight for `key`"""
+        task = self._calls.get(key)
+        if task is None:
+            # Run upstream as its own task so a disconnecting caller cannot cancel it for the others
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+            self.upstream_calls += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stream(self, key: str, open_stream: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """Subscribe to the stream in flight for `key`, starting it if there is none.
+        Late subscribers replay the chunks already received before following live"""
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            broadcast = _Broadcast()
+            self._streams[key] = broadcast
+            self.upstream_calls += 1
+            broadcast.pump = asyncio.ensure_future(self._pump(key, broadcast, open_stream()))
+        else:
+            self.coalesced += 1
+        return broadcast.subscribe()
+
+    async def _pump(self, key: str, broadcast: _Broadcast, source: AsyncIterator[Any]):
+        try:
+            async for chunk in source:
+                broadcast.publish(chunk)
+        except Exception as e:
+            broadcast.finish(e)
+        else:
+            broadcast.finish()
+        finally:
+            self._streams.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "upstream_calls": self.upstream_calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls) + len(self._streams)
+        }
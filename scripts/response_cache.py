@@ -0,0 +1,151 @@
+"""
+Response cache for the Research Assistant API
+Stores model replies keyed on a normalized hash of the prompt context so that
+repeated research questions are answered without a new completion call
+"""
+
+import time
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, List, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+def normalize_text(text: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    return " ".join(text.lower().split()).rstrip("?!. ")
+
+def make_cache_key(system_prompt: str, history: List[dict], message: str) -> str:
+    """Hash the system prompt, the history window and the message into a cache key"""
+    payload = json.dumps({
+        "system": normalize_text(system_prompt),
+        "history": [
+            [entry.get("role", ""), normalize_text(str(entry.get("content", "")))]
+            for entry in history or []
+        ],
+        "message": normalize_text(message)
+    }, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class CacheBackend:
+    """Storage interface for cached replies"""
+
+    async def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: str, ttl: int):
+        raise NotImplementedError
+
+    async def clear(self):
+        raise NotImplementedError
+
+    def size(self) -> Optional[int]:
+        return None
+
+class InMemoryCacheBackend(CacheBackend):
+    """Per-process cache with size-bounded LRU and per-entry TTL eviction"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    async def set(self, key: str, value: str, ttl: int):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    async def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self) -> Optional[int]:
+        return len(self._entries)
+
+class RedisCacheBackend(CacheBackend):
+    """Cache shared between workers and replicas. TTL is enforced per key;
+    LRU eviction comes from the server's maxmemory-policy (allkeys-lru)"""
+
+    def __init__(self, url: str, prefix: str = "research-assistant:reply:"):
+        import redis.asyncio as redis
+
+        self.prefix = prefix
+        self._redis = redis.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._redis.get(self.prefix + key)
+
+    async def set(self, key: str, value: str, ttl: int):
+        await self._redis.set(self.prefix + key, value, ex=ttl)
+
+    async def clear(self):
+        async for key in self._redis.scan_iter(match=self.prefix + "*"):
+            await self._redis.delete(key)
+
+class ResponseCache:
+    """Counts hits and misses in front of a cache backend"""
+
+    def __init__(self, backend: CacheBackend, ttl: int = 3600):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            # A shared backend being unavailable must not fail the request
+            logger.warning(f"Response cache lookup failed: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: str):
+        try:
+            await self.backend.set(key, value, self.ttl)
+        except Exception as e:
+            logger.warning(f"Response cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": self.backend.size(),
+            "evictions": getattr(self.backend, "evictions", None),
+            "ttl_seconds": self.ttl
+        }
+
+def create_response_cache(url: Optional[str], max_entries: int, ttl: int) -> ResponseCache:
+    """Build the cache: a shared backend when a URL is configured, in-process otherwise"""
+    if url:
+        backend = RedisCacheBackend(url)
+    else:
+        backend = InMemoryCacheBackend(max_entries)
+    return ResponseCache(backend, ttl)
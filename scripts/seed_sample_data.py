@@ -4,16 +4,30 @@ Sample Data Seeder for The Research Hub
 Generates realistic sample data for testing and demonstration
 """
 
+import io
 import os
+import gzip
+import atexit
 import sys
 import json
+import hashlib
+import time
 import random
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
+import argparse
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from array import array
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple
+import numpy as np
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import execute_values
 import bcrypt
 
+from text_corpus import TOPIC_WORDS, TextCorpus, reading_time, stable_hash, word_count
+
 # Database connection
 def get_db_connection():
     """Get database connection using environment variables"""
@@ -30,9 +44,110 @@ def get_db_connection():
         print(f"Error connecting to database: {e}")
         sys.exit(1)
 
+def configure_session(conn, fast_load: bool = False):
+    if fast_load:
+        # Commits return without waiting for the WAL flush; a crash can lose
+        # the last few transactions, which a reseed recovers
+        with conn.cursor() as cursor:
+            cursor.execute("SET synchronous_commit = off")
+        conn.commit()
+
 # Sample data generators
+# Timestamps are offsets from a reference time. Unseeded runs use the current
+# time; seeded runs use the start of the current day, so upcoming events and
+# deadlines are still ahead while the same seed reproduces the same rows all
+# day. --reference-date pins it to reproduce a dataset on another day
+def reference_time(seed: Optional[int], on: Optional[date] = None) -> datetime:
+    if on is not None:
+        return datetime.combine(on, datetime.min.time())
+    if seed is not None:
+        return datetime.combine(date.today(), datetime.min.time())
+    return datetime.now()
+
+DEFAULT_USERS = 50
+
+class Scale:
+    """How much data to generate. Per-user counts are inclusive (min, max) ranges.
+    users may be None to mean DEFAULT_USERS, or the target of a resumed run"""
+
+    def __init__(self, users: Optional[int] = DEFAULT_USERS, projects_per_user=(1, 5), notes_per_user=(5, 20),
+                 citations_per_user=(10, 50), events_per_project=(1, 3), papers_per_user=(0, 3),
+                 note_words: int = 150, abstract_words: int = 200, avg_follows: float = 2.0,
+                 follow_skew: float = 1.0, chunk_users: int = 1000, duplicate_citations: float = 0.0):
+        self.users = users
+        self.projects_per_user = projects_per_user
+        self.notes_per_user = notes_per_user
+        self.citations_per_user = citations_per_user
+        self.events_per_project = events_per_project
+        self.papers_per_user = papers_per_user
+        self.note_words = note_words
+        self.abstract_words = abstract_words
+        self.avg_follows = avg_follows
+        self.follow_skew = follow_skew
+        self.chunk_users = chunk_users
+        self.duplicate_citations = duplicate_citations
+
+    def per_user(self) -> Dict[str, Any]:
+        """The settings that shape each user's rows (everything but how many users and how they are chunked)"""
+        settings = {
+            "projects_per_user": list(self.projects_per_user),
+            "notes_per_user": list(self.notes_per_user),
+            "citations_per_user": list(self.citations_per_user),
+            "events_per_project": list(self.events_per_project),
+            "papers_per_user": list(self.papers_per_user),
+            "note_words": self.note_words,
+            "abstract_words": self.abstract_words,
+            "avg_follows": self.avg_follows,
+            "follow_skew": self.follow_skew
+        }
+        # Only present when used, so runs from before the option keep their run keys
+        if self.duplicate_citations:
+            settings["duplicate_citations"] = self.duplicate_citations
+        return settings
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.per_user(), users=self.users, chunk_users=self.chunk_users)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], **overrides) -> "Scale":
+        values = dict(data)
+        values.update({name: value for name, value in overrides.items() if value is not None})
+        for name in ("projects_per_user", "notes_per_user", "citations_per_user", "events_per_project",
+                     "papers_per_user"):
+            values[name] = tuple(values[name])
+        return cls(**values)
+
+SAMPLE_PASSWORD = "password123"
+
+class PasswordHasher:
+    """bcrypt hashes for seeded email users. With pool_size 0 every user gets a
+    fresh hash (slow by design: ~0.25s each at the default cost of 12);
+    otherwise a pool of pool_size hashes is computed once and reused"""
+
+    def __init__(self, pool_size: int = 0, rounds: int = 12, password: str = SAMPLE_PASSWORD):
+        self.pool_size = pool_size
+        self.rounds = rounds
+        self.password = password.encode('utf-8')
+        self.pool = [self._hash() for _ in range(pool_size)]
+
+    def _hash(self) -> str:
+        return bcrypt.hashpw(self.password, bcrypt.gensalt(rounds=self.rounds)).decode('utf-8')
+
+    def hash_for(self, index: int) -> str:
+        if self.pool:
+            return self.pool[index % len(self.pool)]
+        return self._hash()
+
 class DataGenerator:
-    def __init__(self):
+    """Lazily yields sample rows. Every row is drawn from a random stream keyed by
+    (seed, table, user index), so a user's rows do not depend on how many users
+    came before it or how the run is chunked"""
+
+    def __init__(self, seed: int = None, now: datetime = None, hasher: PasswordHasher = None):
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.hasher = hasher or PasswordHasher()
+        self.now = now or reference_time(seed)
+
         self.research_fields = [
             "Computer Science", "Biology", "Chemistry", "Physics", "Mathematics",
             "Psychology", "Medicine", "Engineering", "Environmental Science", "Economics"
@@ -84,184 +199,237 @@ class DataGenerator:
             "Future Research Directions"
         ]
 
-    def generate_users(self, count: int = 50) -> List[Dict[str, Any]]:
-        """Generate sample users"""
-        users = []
-        for i in range(count):
-            first_names = ["John", "Jane", "Michael", "Sarah", "David", "Emily", "Robert", "Lisa", "James", "Maria"]
-            last_names = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez"]
-            
-            first_name = random.choice(first_names)
-            last_name = random.choice(last_names)
+        self.citation_titles = [
+            "Advanced {method} in {field}: A Comprehensive Study",
+            "Novel Approaches to {problem} Using {technique}",
+            "The Impact of {factor} on {outcome} in {domain}",
+            "Computational Analysis of {phenomenon} in {field}",
+            "Machine Learning Applications for {application}",
+            "Sustainable {solution} for {challenge} in {area}",
+            "Optimization of {process} Through {approach}",
+            "Predictive Modeling of {target} Using {method}"
+        ]
+
+        self.journals = [
+            "Nature", "Science", "Cell", "The Lancet", "PNAS", "Nature Biotechnology",
+            "IEEE Transactions", "ACM Computing Surveys", "Journal of Machine Learning Research",
+            "Physical Review Letters", "Chemical Reviews", "Psychological Science"
+        ]
+        
+        self.author_names = [
+            "Smith, J.", "Johnson, A.", "Williams, M.", "Brown, S.", "Jones, R.",
+            "Garcia, L.", "Miller, K.", "Davis, P.", "Rodriguez, C.", "Martinez, E.",
+            "Anderson, T.", "Taylor, N.", "Thomas, D.", "Jackson, B.", "White, H."
+        ]
+
+        self.tag_slugs = [t.lower().replace(' ', '-') for t in self.research_interests]
+        self.method_slugs = [m.lower().replace(' ', '-') for m in self.methodologies]
+        self._corpus = None
+
+    @property
+    def corpus(self) -> TextCorpus:
+        # Built on first use: every worker process derives the same vocabularies from the seed
+        if self._corpus is None:
+            self._corpus = TextCorpus(self.research_interests, seed=self.seed)
+        return self._corpus
+
+    def rng(self, table: str, index: int) -> random.Random:
+        return random.Random(f"{self.seed}:{table}:{index}")
+
+    def np_rng(self, table: str, index: int) -> np.random.Generator:
+        return np.random.default_rng([self.seed, stable_hash(table), index])
+
+    def generate_users(self, start: int = 0, count: int = 50) -> Iterator[Dict[str, Any]]:
+        """Generate sample users with global indexes start .. start + count - 1"""
+        first_names = ["John", "Jane", "Michael", "Sarah", "David", "Emily", "Robert", "Lisa", "James", "Maria"]
+        last_names = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez"]
+
+        for i in range(start, start + count):
+            rng = self.rng("users", i)
+            first_name = rng.choice(first_names)
+            last_name = rng.choice(last_names)
             
-            user = {
+            yield {
                 'name': f"Dr. {first_name} {last_name}",
-                'email': f"{first_name.lower()}.{last_name.lower()}{i}@{random.choice(['university.edu', 'institute.org', 'research.gov'])}",
-                'provider': random.choice(['email', 'google']),
-                'email_verified': random.choice([True, False]),
-                'created_at': datetime.now() - timedelta(days=random.randint(1, 365))
+                # The index keeps emails unique across chunks and reruns
+                'email': f"{first_name.lower()}.{last_name.lower()}{i}@{rng.choice(['university.edu', 'institute.org', 'research.gov'])}",
+                'provider': rng.choice(['email', 'google']),
+                'email_verified': rng.choice([True, False]),
+                'created_at': self.now - timedelta(days=rng.randint(1, 365))
             }
-            users.append(user)
-        
-        return users
 
-    def generate_user_profiles(self, user_ids: List[int]) -> List[Dict[str, Any]]:
-        """Generate user profiles for given user IDs"""
-        profiles = []
+    def generate_user_profiles(self, users: Sequence[Tuple[int, int]]) -> Iterator[Dict[str, Any]]:
+        """Generate user profiles for (user index, user ID) pairs"""
         titles = ["Professor", "Associate Professor", "Assistant Professor", "Research Scientist", 
                  "Postdoctoral Researcher", "Graduate Student", "Research Fellow", "Principal Investigator"]
         
-        for user_id in user_ids:
-            profile = {
+        for index, user_id in users:
+            rng = self.rng("profiles", index)
+            yield {
                 'user_id': user_id,
-                'title': random.choice(titles),
-                'institution': random.choice(self.institutions),
-                'department': f"Department of {random.choice(self.research_fields)}",
-                'bio': f"Passionate researcher with {random.randint(3, 20)} years of experience in {random.choice(self.research_fields).lower()}. Focused on advancing knowledge through innovative research and collaboration.",
-                'research_interests': random.sample(self.research_interests, random.randint(3, 6)),
-                'methodologies': random.sample(self.methodologies, random.randint(2, 5)),
-                'specializations': random.sample(self.research_interests, random.randint(2, 4)),
-                'location': random.choice(["Boston, MA", "San Francisco, CA", "New York, NY", "London, UK", "Berlin, Germany", "Tokyo, Japan"]),
-                'collaboration_open': random.choice([True, False]),
+                'title': rng.choice(titles),
+                'institution': rng.choice(self.institutions),
+                'department': f"Department of {rng.choice(self.research_fields)}",
+                'bio': f"Passionate researcher with {rng.randint(3, 20)} years of experience in {rng.choice(self.research_fields).lower()}. Focused on advancing knowledge through innovative research and collaboration.",
+                'research_interests': rng.sample(self.research_interests, rng.randint(3, 6)),
+                'methodologies': rng.sample(self.methodologies, rng.randint(2, 5)),
+                'specializations': rng.sample(self.research_interests, rng.randint(2, 4)),
+                'location': rng.choice(["Boston, MA", "San Francisco, CA", "New York, NY", "London, UK", "Berlin, Germany", "Tokyo, Japan"]),
+                'collaboration_open': rng.choice([True, False]),
                 'profile_completed': True,
-                'created_at': datetime.now() - timedelta(days=random.randint(1, 300))
+                'created_at': self.now - timedelta(days=rng.randint(1, 300))
             }
-            profiles.append(profile)
-        
-        return profiles
 
-    def generate_projects(self, user_ids: List[int]) -> List[Dict[str, Any]]:
+    def generate_projects(self, users: Sequence[Tuple[int, int]], per_user=(1, 5)) -> Iterator[Dict[str, Any]]:
         """Generate research projects"""
-        projects = []
         statuses = ['planning', 'active', 'completed', 'on_hold']
         
-        for user_id in user_ids:
-            num_projects = random.randint(1, 5)
-            for _ in range(num_projects):
-                field = random.choice(self.research_fields)
-                topic = random.choice(self.research_interests)
+        for index, user_id in users:
+            rng = self.rng("projects", index)
+            for _ in range(rng.randint(*per_user)):
+                field = rng.choice(self.research_fields)
+                topic = rng.choice(self.research_interests)
                 
-                title_template = random.choice(self.project_titles)
+                title_template = rng.choice(self.project_titles)
                 title = title_template.format(
                     field=field,
                     topic=topic,
-                    method=random.choice(self.methodologies),
-                    application=random.choice(self.research_interests),
+                    method=rng.choice(self.methodologies),
+                    application=rng.choice(self.research_interests),
                     phenomenon=topic,
                     domain=field,
                     problem=f"{topic} challenges",
                     technology=topic,
                     concept=topic,
                     process=f"{topic} optimization",
-                    technique=random.choice(self.methodologies),
+                    technique=rng.choice(self.methodologies),
                     outcome=f"{topic} prediction"
                 )
                 
-                status = random.choice(statuses)
-                start_date = datetime.now() - timedelta(days=random.randint(30, 365))
+                status = rng.choice(statuses)
+                start_date = self.now - timedelta(days=rng.randint(30, 365))
                 
-                project = {
+                yield {
                     'user_id': user_id,
                     'title': title,
-                    'description': f"This project aims to investigate {topic.lower()} using advanced {random.choice(self.methodologies).lower()} techniques. The research will contribute to our understanding of {field.lower()} and provide practical applications for the scientific community.",
+                    'description': f"This project aims to investigate {topic.lower()} using advanced {rng.choice(self.methodologies).lower()} techniques. The research will contribute to our understanding of {field.lower()} and provide practical applications for the scientific community.",
                     'status': status,
-                    'progress': random.randint(0, 100) if status != 'planning' else random.randint(0, 20),
+                    'progress': rng.randint(0, 100) if status != 'planning' else rng.randint(0, 20),
                     'start_date': start_date,
-                    'end_date': start_date + timedelta(days=random.randint(180, 730)),
-                    'tags': random.sample([field.lower(), topic.lower()] + [m.lower().replace(' ', '-') for m in self.methodologies], random.randint(3, 6)),
-                    'is_private': random.choice([True, False]),
+                    'end_date': start_date + timedelta(days=rng.randint(180, 730)),
+                    'tags': rng.sample([field.lower(), topic.lower()] + self.method_slugs, rng.randint(3, 6)),
+                    'is_private': rng.choice([True, False]),
                     'created_at': start_date
                 }
-                projects.append(project)
-        
-        return projects
 
-    def generate_notes(self, user_ids: List[int], project_ids: List[int]) -> List[Dict[str, Any]]:
-        """Generate research notes"""
-        notes = []
+    def generate_notes(self, users: Sequence[Tuple[int, int]], projects_by_user: Dict[int, List[int]],
+                       per_user=(5, 20), mean_words: int = 150) -> Iterator[Dict[str, Any]]:
+        """Generate research notes, each optionally attached to one of its author's
+        projects. Content comes from the text corpus on the note's topic; word
+        count and reading time are measured from it"""
         note_types = ['research', 'personal', 'meeting', 'idea']
         
-        for user_id in user_ids:
-            num_notes = random.randint(5, 20)
-            for _ in range(num_notes):
-                title_template = random.choice(self.note_titles)
-                title = title_template.format(date=datetime.now().strftime("%Y-%m-%d"))
+        for index, user_id in users:
+            rng = self.rng("notes", index)
+            project_choices = projects_by_user.get(user_id, []) + [None]
+            topics = [rng.choice(self.research_interests) for _ in range(rng.randint(*per_user))]
+            contents = self.corpus.documents(self.np_rng("notes", index), topics, mean_words)
+            for topic, content in zip(topics, contents):
+                created_at = self.now - timedelta(days=rng.randint(1, 180))
+                title_template = rng.choice(self.note_titles)
+                words = word_count(content)
+                topic_tag = topic.lower().replace(' ', '-')
                 
-                content_templates = [
-                    "Today's research session revealed interesting patterns in the data. The correlation between variables A and B is stronger than initially hypothesized. Need to investigate further with additional samples.",
-                    "Literature review findings: Recent studies by Smith et al. (2023) and Johnson (2022) support our hypothesis. However, there's a gap in the research regarding long-term effects.",
-                    "Experimental setup completed successfully. Initial results show promising trends. Statistical significance achieved with p < 0.05. Planning to expand sample size for validation.",
-                    "Meeting with collaborators was productive. Discussed methodology improvements and timeline adjustments. Action items: 1) Revise protocol, 2) Collect additional data, 3) Schedule follow-up.",
-                    "New research idea: What if we applied machine learning techniques to this problem? Could potentially improve accuracy by 20-30%. Worth exploring in next phase."
-                ]
+                yield {
+                    'user_id': user_id,
+                    'title': title_template.format(date=created_at.strftime("%Y-%m-%d")),
+                    'content': content,
+                    'type': rng.choice(note_types),
+                    'tags': [topic_tag] + [tag for tag in rng.sample(self.tag_slugs, rng.randint(1, 4)) if tag != topic_tag],
+                    'project_id': rng.choice(project_choices),
+                    'is_favorite': rng.choice([True, False]),
+                    'is_private': rng.choice([True, False]),
+                    'word_count': words,
+                    'reading_time': reading_time(words),
+                    'created_at': created_at
+                }
+
+    def generate_papers(self, users: Sequence[Tuple[int, int]], per_user=(0, 3),
+                        abstract_words: int = 200) -> Iterator[Dict[str, Any]]:
+        """Generate papers with corpus abstracts on their field's topics"""
+        statuses = ['draft', 'published', 'under_review', 'rejected', 'accepted']
+        visibilities = ['public', 'private', 'institutional']
+
+        for index, user_id in users:
+            rng = self.rng("papers", index)
+            topics = [rng.choice(self.research_interests) for _ in range(rng.randint(*per_user))]
+            abstracts = self.corpus.documents(self.np_rng("papers", index), topics, abstract_words, sigma=0.3)
+            for topic, abstract in zip(topics, abstracts):
+                field = rng.choice(self.research_fields)
+                status = rng.choice(statuses)
+                published = status in ('published', 'accepted')
+                visibility = rng.choice(visibilities)
+                created_at = self.now - timedelta(days=rng.randint(1, 730))
+                # Engagement is heavy-tailed: most papers get little, a few get a lot
+                views = int(rng.paretovariate(1.2) * 20) if visibility != 'private' else rng.randint(0, 5)
                 
-                note = {
+                yield {
                     'user_id': user_id,
-                    'title': title,
-                    'content': random.choice(content_templates),
-                    'type': random.choice(note_types),
-                    'tags': random.sample([t.lower().replace(' ', '-') for t in self.research_interests], random.randint(2, 5)),
-                    'project_id': random.choice(project_ids + [None]) if project_ids else None,
-                    'is_favorite': random.choice([True, False]),
-                    'is_private': random.choice([True, False]),
-                    'word_count': random.randint(50, 500),
-                    'reading_time': random.randint(1, 10),
-                    'created_at': datetime.now() - timedelta(days=random.randint(1, 180))
+                    'title': rng.choice(self.citation_titles).format(
+                        method=rng.choice(self.methodologies), field=field,
+                        problem=f"{topic} challenges", technique=rng.choice(self.methodologies),
+                        factor=topic, outcome=f"{topic} outcomes", domain=field, phenomenon=topic,
+                        application=f"{field} applications", solution=f"{topic} solutions",
+                        challenge=f"{field} challenges", area=field, process=f"{topic} processes",
+                        approach=rng.choice(self.methodologies), target=topic
+                    ),
+                    'abstract': abstract,
+                    'authors': rng.sample(self.author_names, rng.randint(1, 6)),
+                    'keywords': [topic.lower()] + rng.sample(TOPIC_WORDS.get(topic, self.tag_slugs), 3),
+                    'field': field,
+                    'status': status,
+                    'visibility': visibility,
+                    'doi': f"10.{rng.randint(1000, 9999)}/{field.split()[0].lower()}.{created_at.year}.{rng.randint(100000, 999999)}" if published else None,
+                    'journal': rng.choice(self.journals) if published else None,
+                    'publication_date': (created_at + timedelta(days=rng.randint(30, 300))).date() if published else None,
+                    'views': views,
+                    'downloads': views // rng.randint(3, 10),
+                    'likes': views // rng.randint(5, 30),
+                    'created_at': created_at
                 }
-                notes.append(note)
-        
-        return notes
 
-    def generate_citations(self, user_ids: List[int]) -> List[Dict[str, Any]]:
-        """Generate sample citations"""
-        citations = []
+    def generate_citations(self, users: Sequence[Tuple[int, int]], per_user=(10, 50),
+                           duplicate_rate: float = 0.0) -> Iterator[Dict[str, Any]]:
+        """Generate sample citations. With duplicate_rate, that share of citations is
+        imported again with the small differences real re-imports show, as ground
+        truth for dedupe_citations.py. Duplicates come from their own random
+        stream, so the original rows are the same with or without them"""
         citation_types = ['article', 'book', 'website', 'conference', 'thesis', 'report']
-        journals = [
-            "Nature", "Science", "Cell", "The Lancet", "PNAS", "Nature Biotechnology",
-            "IEEE Transactions", "ACM Computing Surveys", "Journal of Machine Learning Research",
-            "Physical Review Letters", "Chemical Reviews", "Psychological Science"
-        ]
-        
-        author_names = [
-            "Smith, J.", "Johnson, A.", "Williams, M.", "Brown, S.", "Jones, R.",
-            "Garcia, L.", "Miller, K.", "Davis, P.", "Rodriguez, C.", "Martinez, E.",
-            "Anderson, T.", "Taylor, N.", "Thomas, D.", "Jackson, B.", "White, H."
-        ]
         
-        for user_id in user_ids:
-            num_citations = random.randint(10, 50)
-            for _ in range(num_citations):
-                citation_type = random.choice(citation_types)
-                year = random.randint(2015, 2024)
-                authors = random.sample(author_names, random.randint(1, 4))
+        for index, user_id in users:
+            rng = self.rng("citations", index)
+            duplicate_rng = self.rng("citation-duplicates", index) if duplicate_rate else None
+            for _ in range(rng.randint(*per_user)):
+                citation_type = rng.choice(citation_types)
+                year = rng.randint(2015, 2024)
+                authors = rng.sample(self.author_names, rng.randint(1, 4))
                 
-                title_templates = [
-                    "Advanced {method} in {field}: A Comprehensive Study",
-                    "Novel Approaches to {problem} Using {technique}",
-                    "The Impact of {factor} on {outcome} in {domain}",
-                    "Computational Analysis of {phenomenon} in {field}",
-                    "Machine Learning Applications for {application}",
-                    "Sustainable {solution} for {challenge} in {area}",
-                    "Optimization of {process} Through {approach}",
-                    "Predictive Modeling of {target} Using {method}"
-                ]
-                
-                title = random.choice(title_templates).format(
-                    method=random.choice(self.methodologies),
-                    field=random.choice(self.research_fields),
-                    problem=f"{random.choice(self.research_interests)} challenges",
-                    technique=random.choice(self.methodologies),
-                    factor=random.choice(self.research_interests),
-                    outcome=f"{random.choice(self.research_interests)} outcomes",
-                    domain=random.choice(self.research_fields),
-                    phenomenon=random.choice(self.research_interests),
-                    application=f"{random.choice(self.research_fields)} applications",
-                    solution=f"{random.choice(self.research_interests)} solutions",
-                    challenge=f"{random.choice(self.research_fields)} challenges",
-                    area=random.choice(self.research_fields),
-                    process=f"{random.choice(self.research_interests)} processes",
-                    approach=random.choice(self.methodologies),
-                    target=random.choice(self.research_interests)
+                title = rng.choice(self.citation_titles).format(
+                    method=rng.choice(self.methodologies),
+                    field=rng.choice(self.research_fields),
+                    problem=f"{rng.choice(self.research_interests)} challenges",
+                    technique=rng.choice(self.methodologies),
+                    factor=rng.choice(self.research_interests),
+                    outcome=f"{rng.choice(self.research_interests)} outcomes",
+                    domain=rng.choice(self.research_fields),
+                    phenomenon=rng.choice(self.research_interests),
+                    application=f"{rng.choice(self.research_fields)} applications",
+                    solution=f"{rng.choice(self.research_interests)} solutions",
+                    challenge=f"{rng.choice(self.research_fields)} challenges",
+                    area=rng.choice(self.research_fields),
+                    process=f"{rng.choice(self.research_interests)} processes",
+                    approach=rng.choice(self.methodologies),
+                    target=rng.choice(self.research_interests)
                 )
                 
                 citation = {
@@ -269,199 +437,1094 @@ class DataGenerator:
                     'type': citation_type,
                     'title': title,
                     'authors': authors,
-                    'journal': random.choice(journals) if citation_type == 'article' else None,
+                    'journal': rng.choice(self.journals) if citation_type == 'article' else None,
                     'year': year,
-                    'doi': f"10.{random.randint(1000, 9999)}/{random.choice(['nature', 'science', 'cell'])}.{year}.{random.randint(100000, 999999)}",
-                    'pages': f"{random.randint(1, 50)}-{random.randint(51, 100)}" if citation_type == 'article' else None,
-                    'volume': str(random.randint(1, 100)) if citation_type == 'article' else None,
-                    'issue': str(random.randint(1, 12)) if citation_type == 'article' else None,
-                    'tags': random.sample([t.lower().replace(' ', '-') for t in self.research_interests], random.randint(2, 4)),
-                    'is_favorite': random.choice([True, False]),
-                    'created_at': datetime.now() - timedelta(days=random.randint(1, 365))
+                    'doi': f"10.{rng.randint(1000, 9999)}/{rng.choice(['nature', 'science', 'cell'])}.{year}.{rng.randint(100000, 999999)}",
+                    'pages': f"{rng.randint(1, 50)}-{rng.randint(51, 100)}" if citation_type == 'article' else None,
+                    'volume': str(rng.randint(1, 100)) if citation_type == 'article' else None,
+                    'issue': str(rng.randint(1, 12)) if citation_type == 'article' else None,
+                    'tags': rng.sample(self.tag_slugs, rng.randint(2, 4)),
+                    'is_favorite': rng.choice([True, False]),
+                    'created_at': self.now - timedelta(days=rng.randint(1, 365))
                 }
-                citations.append(citation)
-        
-        return citations
+                yield citation
+                if duplicate_rng is not None and duplicate_rng.random() < duplicate_rate:
+                    yield self._reimported_citation(duplicate_rng, citation)
 
-def insert_sample_data():
-    """Main function to insert all sample data"""
-    print("🚀 Starting sample data generation...")
-    
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
-    
-    try:
-        generator = DataGenerator()
-        
-        # Generate and insert users
-        print("👥 Generating users...")
-        users = generator.generate_users(50)
-        user_ids = []
-        
-        for user in users:
-            # Hash password for email users
-            password_hash = None
-            if user['provider'] == 'email':
-                password_hash = bcrypt.hashpw("password123".encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-            
+    def _reimported_citation(self, rng: random.Random, citation: Dict[str, Any]) -> Dict[str, Any]:
+        """A copy of a citation as another import of the same paper might produce it:
+        recased or re-punctuated title, a typo, shuffled or reformatted authors, a
+        DOI as a URL or missing"""
+        title = citation['title']
+        edit = rng.choice(['lower', 'upper-words', 'punctuation', 'typo', 'subtitle-dash'])
+        if edit == 'lower':
+            title = title.lower()
+        elif edit == 'upper-words':
+            title = title.title()
+        elif edit == 'punctuation':
+            title = title.replace(':', '.') + '.'
+        elif edit == 'typo':
+            words = title.split()
+            i = rng.randrange(len(words))
+            if len(words[i]) > 3:
+                j = rng.randrange(1, len(words[i]) - 1)
+                words[i] = words[i][:j] + words[i][j + 1:]
+            title = ' '.join(words)
+        else:
+            title = title.replace(': ', ' - ')
+
+        authors = list(citation['authors'])
+        if len(authors) > 1 and rng.random() < 0.5:
+            rng.shuffle(authors)
+        if rng.random() < 0.3:
+            # "Smith, J." -> "J. Smith"
+            authors = [' '.join(reversed(name.split(', '))) for name in authors]
+
+        doi = citation['doi']
+        doi = rng.choice([doi, doi.upper(), f"https://doi.org/{doi}", f"doi:{doi}", None])
+        return dict(citation, title=title, authors=authors, doi=doi,
+                    created_at=citation['created_at'] + timedelta(days=rng.randint(0, 60)))
+
+    def generate_timeline_events(self, users: Sequence[Tuple[int, int]], projects_by_user: Dict[int, List[int]],
+                                 per_project=(1, 3)) -> Iterator[Dict[str, Any]]:
+        """Generate timeline events for each user's projects. Events of the same
+        type on the same day of a project are generated once"""
+        event_types = ['milestone', 'deadline', 'meeting', 'presentation']
+        priorities = ['low', 'medium', 'high']
+
+        for index, user_id in users:
+            rng = self.rng("timeline", index)
+            for project_id in projects_by_user.get(user_id, []):
+                seen = set()
+                for _ in range(rng.randint(*per_project)):
+                    event_type = rng.choice(event_types)
+                    days_ahead = rng.randint(1, 90)
+                    priority = rng.choice(priorities)
+                    if (event_type, days_ahead) in seen:
+                        continue
+                    seen.add((event_type, days_ahead))
+                    yield {
+                        'user_id': user_id,
+                        'project_id': project_id,
+                        'title': f"Project {event_type.title()}",
+                        'description': f"Important {event_type} for the research project.",
+                        'type': event_type,
+                        'event_date': self.now + timedelta(days=days_ahead),
+                        'priority': priority,
+                        'created_at': self.now
+                    }
+
+    def generate_follows(self, user_ids: Sequence[int], avg_follows: float = 2.0, skew: float = 1.0,
+                         start: int = 0, end: int = None) -> Iterator[Dict[str, Any]]:
+        """Generate a follow graph with power-law degrees. Out-degrees are
+        Pareto distributed around avg_follows; targets are drawn with
+        Zipf-like popularity (user index i weighted (i + 1) ** -skew). Each
+        follower's targets are deduplicated and self-follows dropped, so rows
+        can be COPYed without ON CONFLICT. Only followers with indexes in
+        start .. end - 1 are generated; targets range over every user.
+        user_ids is indexed by user index, so a user's popularity rank is
+        fixed however many users before it were never inserted; those hold
+        MISSING_USER and neither follow nor are followed"""
+        count = len(user_ids)
+        if count < 2 or avg_follows <= 0:
+            return
+        cum_weights = array('d', accumulate((i + 1) ** -skew for i in range(count)))
+        population = range(count)
+        # Pareto with shape 1.5 has mean 3 * scale
+        scale = avg_follows / 3
+
+        for follower in range(start, count if end is None else min(end, count)):
+            rng = self.rng("follows", follower)
+            # Stochastic rounding keeps the mean degree at avg_follows
+            degree = min(count - 1, int(scale * rng.paretovariate(1.5) + rng.random()))
+            follower_id = user_ids[follower]
+            if not degree or follower_id == MISSING_USER:
+                continue
+            targets = set()
+            # Popular targets repeat; bound the draws so hubs cannot stall the loop
+            for _ in range(4):
+                for target in rng.choices(population, cum_weights=cum_weights, k=degree - len(targets)):
+                    if target != follower:
+                        targets.add(target)
+                if len(targets) >= degree:
+                    break
+            for target in sorted(targets):
+                if user_ids[target] == MISSING_USER:
+                    continue
+                yield {
+                    'follower_id': follower_id,
+                    'following_id': user_ids[target],
+                    'created_at': self.now - timedelta(days=rng.randint(0, 365))
+                }
+
+# Table loaders
+def _copy_array(items: Sequence[Any]) -> str:
+    """Format a Python list as a PostgreSQL array literal"""
+    quoted = (str(item).replace('\\', '\\\\').replace('"', '\\"') for item in items)
+    return "{" + ",".join(f'"{item}"' for item in quoted) + "}"
+
+def _copy_value(value: Any) -> str:
+    """Encode one value for COPY ... FROM STDIN in text format"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (list, tuple)):
+        value = _copy_array(value)
+    elif isinstance(value, datetime):
+        value = value.isoformat(sep=" ")
+    else:
+        value = str(value)
+    return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+def _batches(rows: Iterable[Dict[str, Any]], size: int) -> Iterable[List[Dict[str, Any]]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+class LoadReport:
+    """Rows and wall-clock seconds per table, printed as rows/sec at the end of a run"""
+
+    def __init__(self):
+        self.tables = OrderedDict()
+        self.phases = OrderedDict()
+        self.wall_seconds = None
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def add(self, table: str, rows: int, seconds: float):
+        total_rows, total_seconds = self.tables.get(table, (0, 0.0))
+        self.tables[table] = (total_rows + rows, total_seconds + seconds)
+
+    def merge(self, tables: Dict[str, Tuple[int, float]]):
+        for table, (rows, seconds) in tables.items():
+            self.add(table, rows, seconds)
+
+    def print_summary(self):
+        # With several workers, per-table seconds are summed across processes
+        print("⏱️  Load throughput:")
+        for table, (rows, seconds) in self.tables.items():
+            rate = rows / seconds if seconds else 0
+            print(f"   • {table:<18} {rows:>10,} rows  {seconds:>8.2f}s  {rate:>12,.0f} rows/s")
+        if self.wall_seconds:
+            rows = sum(rows for rows, _ in self.tables.values())
+            print(f"   • {'all tables':<18} {rows:>10,} rows  {self.wall_seconds:>8.2f}s  "
+                  f"{rows / self.wall_seconds:>12,.0f} rows/s wall clock")
+        if self.phases:
+            print("⏱️  Phases:")
+            for name, seconds in self.phases.items():
+                print(f"   • {name:<18} {seconds:>8.2f}s")
+
+class BulkLoader:
+    """Loads rows in batches: COPY FROM STDIN where no generated IDs are needed,
+    multi-row INSERT via execute_values with RETURNING where they are"""
+
+    def __init__(self, conn, batch_size: int = 5000, report: LoadReport = None):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.report = report or LoadReport()
+
+    def copy_rows(self, table: str, columns: Sequence[str], rows: Iterable[Dict[str, Any]]) -> int:
+        started = time.perf_counter()
+        count = 0
+        sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+        with self.conn.cursor() as cursor:
+            for batch in _batches(rows, self.batch_size):
+                buffer = io.StringIO()
+                for row in batch:
+                    buffer.write("\t".join(_copy_value(row[column]) for column in columns))
+                    buffer.write("\n")
+                buffer.seek(0)
+                cursor.copy_expert(sql, buffer)
+                count += len(batch)
+        self.report.add(table, count, time.perf_counter() - started)
+        return count
+
+    def insert_returning(self, table: str, columns: Sequence[str], rows: Iterable[Dict[str, Any]],
+                         returning: str, on_conflict: str = "") -> List[tuple]:
+        started = time.perf_counter()
+        results = []
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s {on_conflict} RETURNING {returning}"
+        with self.conn.cursor() as cursor:
+            for batch in _batches(rows, self.batch_size):
+                values = [tuple(row[column] for column in columns) for row in batch]
+                results.extend(execute_values(cursor, sql, values, page_size=len(values), fetch=True))
+        self.report.add(table, len(results), time.perf_counter() - started)
+        return results
+
+class RowLoader(BulkLoader):
+    """The original row-at-a-time loop, one round trip per row, kept for comparison"""
+
+    def copy_rows(self, table: str, columns: Sequence[str], rows: Iterable[Dict[str, Any]]) -> int:
+        started = time.perf_counter()
+        count = 0
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+        with self.conn.cursor() as cursor:
+            for row in rows:
+                cursor.execute(sql, tuple(row[column] for column in columns))
+                count += 1
+        self.report.add(table, count, time.perf_counter() - started)
+        return count
+
+    def insert_returning(self, table: str, columns: Sequence[str], rows: Iterable[Dict[str, Any]],
+                         returning: str, on_conflict: str = "") -> List[tuple]:
+        started = time.perf_counter()
+        results = []
+        sql = (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+               f"{on_conflict} RETURNING {returning}")
+        with self.conn.cursor() as cursor:
+            for row in rows:
+                cursor.execute(sql, tuple(row[column] for column in columns))
+                result = cursor.fetchone()
+                if result:
+                    results.append(result)
+        self.report.add(table, len(results), time.perf_counter() - started)
+        return results
+
+USER_COLUMNS = ['name', 'email', 'password_hash', 'provider', 'email_verified', 'created_at']
+PROFILE_COLUMNS = [
+    'user_id', 'title', 'institution', 'department', 'bio', 'research_interests',
+    'methodologies', 'specializations', 'location', 'collaboration_open',
+    'profile_completed', 'created_at'
+]
+PROJECT_COLUMNS = [
+    'user_id', 'title', 'description', 'status', 'progress', 'start_date',
+    'end_date', 'tags', 'is_private', 'created_at'
+]
+NOTE_COLUMNS = [
+    'user_id', 'title', 'content', 'type', 'tags', 'project_id', 'is_favorite',
+    'is_private', 'word_count', 'reading_time', 'created_at'
+]
+TIMELINE_COLUMNS = [
+    'user_id', 'project_id', 'title', 'description', 'type', 'event_date',
+    'priority', 'created_at'
+]
+PAPER_COLUMNS = [
+    'user_id', 'title', 'abstract', 'authors', 'keywords', 'field', 'status', 'visibility',
+    'doi', 'journal', 'publication_date', 'views', 'downloads', 'likes', 'created_at'
+]
+FOLLOW_COLUMNS = ['follower_id', 'following_id', 'created_at']
+CITATION_COLUMNS = [
+    'user_id', 'type', 'title', 'authors', 'journal', 'year', 'doi', 'pages',
+    'volume', 'issue', 'tags', 'is_favorite', 'created_at'
+]
+
+def _ranges(start: int, end: int, size: int) -> Iterator[Tuple[int, int]]:
+    for position in range(start, end, size):
+        yield position, min(position + size, end)
+
+def _plan_ranges(total: int, size: int, done: Dict[int, int]) -> List[Tuple[int, int]]:
+    """Index ranges covering 0 .. total - 1: ranges that already have a
+    checkpoint are kept as they are, and the gaps between them are chunked"""
+    ranges = []
+    position = 0
+    for start, end in sorted(done.items()):
+        if start >= total:
+            break
+        ranges.extend(_ranges(position, start, size))
+        ranges.append((start, end))
+        position = max(position, end)
+    ranges.extend(_ranges(position, total, size))
+    return ranges
+
+SEED_TABLES = [
+    'users', 'user_profiles', 'research_projects', 'research_notes', 'citations',
+    'timeline_events', 'papers', 'user_follows'
+]
+
+class FastLoad:
+    """Index- and trigger-free loading into a fresh schema. Secondary indexes
+    on the seeded tables are dropped before the load and rebuilt afterwards,
+    several at a time and each with parallel maintenance workers. Primary
+    keys, unique indexes and constraint-backed indexes stay, since ON
+    CONFLICT and foreign keys rely on them"""
+
+    def __init__(self, rebuild_workers: int = 2, maintenance_workers: int = 4,
+                 maintenance_work_mem: str = "1GB"):
+        self.rebuild_workers = rebuild_workers
+        self.maintenance_workers = maintenance_workers
+        self.maintenance_work_mem = maintenance_work_mem
+        self.dropped: List[Tuple[str, str]] = []
+        self.triggers_disabled = False
+
+    def prepare(self, conn):
+        with conn.cursor() as cursor:
             cursor.execute("""
-                INSERT INTO users (name, email, password_hash, provider, email_verified, created_at)
-                VALUES (%(name)s, %(email)s, %(password_hash)s, %(provider)s, %(email_verified)s, %(created_at)s)
-                ON CONFLICT (email) DO NOTHING
-                RETURNING id
-            """, {**user, 'password_hash': password_hash})
-            
-            result = cursor.fetchone()
-            if result:
-                user_ids.append(result['id'])
-        
+                SELECT i.relname, pg_get_indexdef(ix.indexrelid)
+                FROM pg_index ix
+                JOIN pg_class i ON i.oid = ix.indexrelid
+                JOIN pg_class t ON t.oid = ix.indrelid
+                JOIN pg_namespace n ON n.oid = t.relnamespace
+                WHERE n.nspname = current_schema()
+                  AND t.relname = ANY(%s)
+                  AND NOT ix.indisprimary
+                  AND NOT ix.indisunique
+                  AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = ix.indexrelid)
+            """, (SEED_TABLES,))
+            indexes = cursor.fetchall()
+            for name, _ in indexes:
+                cursor.execute(f'DROP INDEX "{name}"')
+            # Only user triggers (updated_at maintenance); foreign key triggers stay on
+            for table in SEED_TABLES:
+                cursor.execute(f"ALTER TABLE {table} DISABLE TRIGGER USER")
         conn.commit()
-        print(f"✅ Created {len(user_ids)} users")
-        
-        # Generate and insert user profiles
-        print("📋 Generating user profiles...")
-        profiles = generator.generate_user_profiles(user_ids)
-        
-        for profile in profiles:
+        # Recorded only once committed, so a failed prepare has nothing to restore
+        self.dropped = indexes
+        self.triggers_disabled = True
+        print(f"🧹 Dropped {len(self.dropped)} secondary indexes and disabled user triggers")
+        for name, definition in self.dropped:
+            # Printed so the indexes can be recreated by hand if the process dies mid-load
+            print(f"   {definition};")
+
+    def _build_index(self, definition: str):
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SET maintenance_work_mem = %s", (self.maintenance_work_mem,))
+                cursor.execute("SET max_parallel_maintenance_workers = %s", (self.maintenance_workers,))
+                cursor.execute(definition)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def restore(self, conn):
+        conn.rollback()
+        if self.dropped:
+            with ThreadPoolExecutor(max_workers=self.rebuild_workers) as pool:
+                for future in [pool.submit(self._build_index, definition) for _, definition in self.dropped]:
+                    future.result()
+            print(f"🔨 Rebuilt {len(self.dropped)} indexes")
+            self.dropped = []
+        if self.triggers_disabled:
+            with conn.cursor() as cursor:
+                for table in SEED_TABLES:
+                    cursor.execute(f"ALTER TABLE {table} ENABLE TRIGGER USER")
+            conn.commit()
+            self.triggers_disabled = False
+
+    def analyze(self, conn):
+        with conn.cursor() as cursor:
+            for table in SEED_TABLES:
+                cursor.execute(f"ANALYZE {table}")
+        conn.commit()
+
+class Checkpoints:
+    """Per-stage progress of a seeding run, kept in the database. A stage's
+    checkpoint row is written in the same transaction as its rows, so a
+    checkpoint exists exactly when the data does.
+
+    A run is identified by everything that determines its rows except the
+    user count: the seed, the reference time and the per-user scale. Rerunning
+    with the same seed and a larger --users therefore only loads the missing
+    users (a top-up), and rerunning after a failure only redoes the stages
+    that never committed"""
+
+    def __init__(self, run_key: str):
+        self.run_key = run_key
+        # stage -> {range start: range end}
+        self.done: Dict[str, Dict[int, int]] = {}
+
+    @staticmethod
+    def run_key_for(generator: DataGenerator, scale: Scale) -> str:
+        identity = {"seed": generator.seed, "reference_time": generator.now.isoformat()}
+        identity.update(scale.per_user())
+        return hashlib.sha1(json.dumps(identity, sort_keys=True).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def ensure_tables(conn):
+        with conn.cursor() as cursor:
             cursor.execute("""
-                INSERT INTO user_profiles (
-                    user_id, title, institution, department, bio, research_interests,
-                    methodologies, specializations, location, collaboration_open,
-                    profile_completed, created_at
-                ) VALUES (
-                    %(user_id)s, %(title)s, %(institution)s, %(department)s, %(bio)s,
-                    %(research_interests)s, %(methodologies)s, %(specializations)s,
-                    %(location)s, %(collaboration_open)s, %(profile_completed)s, %(created_at)s
+                CREATE TABLE IF NOT EXISTS seed_runs (
+                    run_key TEXT PRIMARY KEY,
+                    seed BIGINT NOT NULL,
+                    reference_time TIMESTAMP NOT NULL,
+                    scale JSONB NOT NULL,
+                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
                 )
-            """, profile)
-        
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS seed_checkpoints (
+                    run_key TEXT NOT NULL REFERENCES seed_runs(run_key) ON DELETE CASCADE,
+                    stage VARCHAR(50) NOT NULL,
+                    range_start INTEGER NOT NULL,
+                    range_end INTEGER NOT NULL,
+                    row_count INTEGER NOT NULL,
+                    completed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                    PRIMARY KEY (run_key, stage, range_start)
+                )
+            """)
         conn.commit()
-        print(f"✅ Created {len(profiles)} user profiles")
-        
-        # Generate and insert projects
-        print("📊 Generating research projects...")
-        projects = generator.generate_projects(user_ids)
-        project_ids = []
-        
-        for project in projects:
+
+    @staticmethod
+    def latest_run(conn) -> Optional[Dict[str, Any]]:
+        with conn.cursor() as cursor:
             cursor.execute("""
-                INSERT INTO research_projects (
-                    user_id, title, description, status, progress, start_date,
-                    end_date, tags, is_private, created_at
-                ) VALUES (
-                    %(user_id)s, %(title)s, %(description)s, %(status)s, %(progress)s,
-                    %(start_date)s, %(end_date)s, %(tags)s, %(is_private)s, %(created_at)s
-                ) RETURNING id
-            """, project)
-            
-            result = cursor.fetchone()
-            if result:
-                project_ids.append(result['id'])
-        
+                SELECT seed, reference_time, scale FROM seed_runs
+                ORDER BY updated_at DESC LIMIT 1
+            """)
+            row = cursor.fetchone()
         conn.commit()
-        print(f"✅ Created {len(project_ids)} research projects")
-        
-        # Generate and insert notes
-        print("📝 Generating research notes...")
-        notes = generator.generate_notes(user_ids, project_ids)
-        
-        for note in notes:
+        if row is None:
+            return None
+        seed, reference_time, scale = row
+        return {"seed": seed, "reference_time": reference_time, "scale": scale}
+
+    def open(self, conn, generator: DataGenerator, scale: Scale):
+        """Register the run (or touch it when resuming) and load its completed stages"""
+        with conn.cursor() as cursor:
             cursor.execute("""
-                INSERT INTO research_notes (
-                    user_id, title, content, type, tags, project_id, is_favorite,
-                    is_private, word_count, reading_time, created_at
-                ) VALUES (
-                    %(user_id)s, %(title)s, %(content)s, %(type)s, %(tags)s,
-                    %(project_id)s, %(is_favorite)s, %(is_private)s, %(word_count)s,
-                    %(reading_time)s, %(created_at)s
-                )
-            """, note)
-        
+                INSERT INTO seed_runs (run_key, seed, reference_time, scale)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (run_key) DO UPDATE SET scale = EXCLUDED.scale, updated_at = NOW()
+            """, (self.run_key, generator.seed, generator.now, json.dumps(scale.to_dict())))
+            cursor.execute("""
+                SELECT stage, range_start, range_end FROM seed_checkpoints WHERE run_key = %s
+            """, (self.run_key,))
+            for stage, start, end in cursor.fetchall():
+                self.done.setdefault(stage, {})[start] = end
         conn.commit()
-        print(f"✅ Created {len(notes)} research notes")
-        
-        # Generate and insert citations
-        print("📚 Generating citations...")
-        citations = generator.generate_citations(user_ids)
-        
-        for citation in citations:
+
+    def is_done(self, stage: str, start: int, end: int) -> bool:
+        return self.done.get(stage, {}).get(start) == end
+
+    def record(self, conn, stage: str, start: int, end: int, rows: int):
+        """Add the checkpoint to the caller's open transaction"""
+        with conn.cursor() as cursor:
             cursor.execute("""
-                INSERT INTO citations (
-                    user_id, type, title, authors, journal, year, doi, pages,
-                    volume, issue, tags, is_favorite, created_at
-                ) VALUES (
-                    %(user_id)s, %(type)s, %(title)s, %(authors)s, %(journal)s,
-                    %(year)s, %(doi)s, %(pages)s, %(volume)s, %(issue)s,
-                    %(tags)s, %(is_favorite)s, %(created_at)s
-                )
-            """, citation)
-        
+                INSERT INTO seed_checkpoints (run_key, stage, range_start, range_end, row_count)
+                VALUES (%s, %s, %s, %s, %s)
+            """, (self.run_key, stage, start, end, rows))
+        self.done.setdefault(stage, {})[start] = end
+
+# Per-chunk stages. Users, profiles and projects must land before the notes,
+# citations, timeline events and papers that reference them; those are independent
+def load_core(loader: BulkLoader, generator: DataGenerator, scale: Scale, start: int, end: int):
+    """Users, profiles and projects for user indexes start .. end - 1.
+    Returns ([(user index, user ID)], {user ID: [project IDs]}, row counts)"""
+    users = list(generator.generate_users(start, end - start))
+    
+    for offset, user in enumerate(users):
+        # Hash password for email users
+        user['password_hash'] = None
+        if user['provider'] == 'email':
+            user['password_hash'] = generator.hasher.hash_for(start + offset)
+    
+    inserted = loader.insert_returning(
+        "users", USER_COLUMNS, users, returning="id, email",
+        on_conflict="ON CONFLICT (email) DO NOTHING"
+    )
+    # Map generated IDs back by email: RETURNING order is not guaranteed
+    ids_by_email = {email: user_id for user_id, email in inserted}
+    chunk_users = [
+        (start + offset, ids_by_email[user['email']])
+        for offset, user in enumerate(users) if user['email'] in ids_by_email
+    ]
+    
+    profiles = loader.copy_rows(
+        "user_profiles", PROFILE_COLUMNS, generator.generate_user_profiles(chunk_users)
+    )
+    
+    projects_by_user: Dict[int, List[int]] = {}
+    for project_id, user_id in loader.insert_returning(
+        "research_projects", PROJECT_COLUMNS,
+        generator.generate_projects(chunk_users, scale.projects_per_user),
+        returning="id, user_id"
+    ):
+        projects_by_user.setdefault(user_id, []).append(project_id)
+    for owned in projects_by_user.values():
+        owned.sort()
+    counts = {"users": len(chunk_users), "profiles": profiles,
+              "projects": sum(len(owned) for owned in projects_by_user.values())}
+    return chunk_users, projects_by_user, counts
+
+def lookup_core(conn, generator: DataGenerator, start: int, end: int):
+    """IDs for a range whose core stage committed in an earlier run: users are
+    found by their regenerated emails, projects by owner"""
+    emails = [user['email'] for user in generator.generate_users(start, end - start)]
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT email, id FROM users WHERE email = ANY(%s)", (emails,))
+        ids_by_email = dict(cursor.fetchall())
+        chunk_users = [
+            (start + offset, ids_by_email[email])
+            for offset, email in enumerate(emails) if email in ids_by_email
+        ]
+        cursor.execute("""
+            SELECT id, user_id FROM research_projects WHERE user_id = ANY(%s) ORDER BY id
+        """, ([user_id for _, user_id in chunk_users],))
+        projects_by_user: Dict[int, List[int]] = {}
+        for project_id, user_id in cursor.fetchall():
+            projects_by_user.setdefault(user_id, []).append(project_id)
+    conn.commit()
+    return chunk_users, projects_by_user
+
+def load_notes(loader: BulkLoader, generator: DataGenerator, scale: Scale,
+               chunk_users: List[Tuple[int, int]], projects_by_user: Dict[int, List[int]]) -> int:
+    return loader.copy_rows(
+        "research_notes", NOTE_COLUMNS,
+        generator.generate_notes(chunk_users, projects_by_user, scale.notes_per_user, scale.note_words)
+    )
+
+def load_citations(loader: BulkLoader, generator: DataGenerator, scale: Scale,
+                   chunk_users: List[Tuple[int, int]], projects_by_user: Dict[int, List[int]]) -> int:
+    return loader.copy_rows(
+        "citations", CITATION_COLUMNS,
+        generator.generate_citations(chunk_users, scale.citations_per_user, scale.duplicate_citations)
+    )
+
+def load_timeline(loader: BulkLoader, generator: DataGenerator, scale: Scale,
+                  chunk_users: List[Tuple[int, int]], projects_by_user: Dict[int, List[int]]) -> int:
+    # Owners come from the project index built by load_core, not a per-project SELECT
+    return loader.copy_rows(
+        "timeline_events", TIMELINE_COLUMNS,
+        generator.generate_timeline_events(chunk_users, projects_by_user, scale.events_per_project)
+    )
+
+def load_papers(loader: BulkLoader, generator: DataGenerator, scale: Scale,
+                chunk_users: List[Tuple[int, int]], projects_by_user: Dict[int, List[int]]) -> int:
+    return loader.copy_rows(
+        "papers", PAPER_COLUMNS,
+        generator.generate_papers(chunk_users, scale.papers_per_user, scale.abstract_words)
+    )
+
+# Stages that follow load_core for each range, in checkpoint order
+STAGES = OrderedDict([
+    ("notes", load_notes), ("citations", load_citations), ("timeline", load_timeline), ("papers", load_papers)
+])
+
+# Placeholder ID for a user index whose row was not inserted (its email already existed)
+MISSING_USER = 0
+
+class SeedTotals:
+    """User IDs by user index and rows created across ranges"""
+
+    def __init__(self):
+        self._user_ranges: Dict[int, array] = {}
+        self.counts = {"users": 0, "profiles": 0, "projects": 0, "notes": 0, "citations": 0,
+                       "timeline": 0, "papers": 0, "follows": 0}
+        self.skipped = 0
+
+    def add_users(self, start: int, chunk_users: List[Tuple[int, int]]):
+        ids = array('q', bytes(8 * (max((index for index, _ in chunk_users), default=start - 1) + 1 - start)))
+        for index, user_id in chunk_users:
+            ids[index - start] = user_id
+        self._user_ranges[start] = ids
+
+    def add(self, counts: Dict[str, int]):
+        for name, rows in counts.items():
+            self.counts[name] += rows
+
+    def user_ids(self, total: int) -> array:
+        """IDs of user indexes 0 .. total - 1, MISSING_USER where none was inserted"""
+        ids = array('q', bytes(8 * total))
+        for start, chunk_ids in self._user_ranges.items():
+            ids[start:start + len(chunk_ids)] = chunk_ids[:max(0, total - start)]
+        return ids
+
+def load_sequential(conn, loader: BulkLoader, generator: DataGenerator, scale: Scale,
+                    checkpoints: Checkpoints, totals: SeedTotals):
+    """Each range is one transaction holding its pending stages and their checkpoints"""
+    for start, end in _plan_ranges(scale.users, scale.chunk_users, checkpoints.done.get("core", {})):
+        if checkpoints.is_done("core", start, end):
+            chunk_users, projects_by_user = lookup_core(conn, generator, start, end)
+            totals.skipped += 1
+        else:
+            chunk_users, projects_by_user, counts = load_core(loader, generator, scale, start, end)
+            checkpoints.record(conn, "core", start, end, counts["users"])
+            totals.add(counts)
+        totals.add_users(start, chunk_users)
+
+        for name, stage in STAGES.items():
+            if checkpoints.is_done(name, start, end):
+                totals.skipped += 1
+                continue
+            rows = stage(loader, generator, scale, chunk_users, projects_by_user)
+            checkpoints.record(conn, name, start, end, rows)
+            totals.counts[name] += rows
         conn.commit()
-        print(f"✅ Created {len(citations)} citations")
-        
-        # Generate some timeline events
-        print("📅 Generating timeline events...")
-        for project_id in project_ids[:20]:  # Only for first 20 projects
-            cursor.execute("SELECT user_id FROM research_projects WHERE id = %s", (project_id,))
-            user_id = cursor.fetchone()['user_id']
-            
-            event_types = ['milestone', 'deadline', 'meeting', 'presentation']
-            priorities = ['low', 'medium', 'high']
-            
-            for _ in range(random.randint(1, 3)):
-                cursor.execute("""
-                    INSERT INTO timeline_events (
-                        user_id, project_id, title, description, type, event_date,
-                        priority, created_at
-                    ) VALUES (
-                        %s, %s, %s, %s, %s, %s, %s, %s
-                    )
-                """, (
-                    user_id,
-                    project_id,
-                    f"Project {random.choice(event_types).title()}",
-                    f"Important {random.choice(event_types)} for the research project.",
-                    random.choice(event_types),
-                    datetime.now() + timedelta(days=random.randint(1, 90)),
-                    random.choice(priorities),
-                    datetime.now()
-                ))
-        
+        print(f"   … {end:,}/{scale.users:,} users loaded")
+
+# State of a pool worker process: its own connection, loader and generator
+_worker: Dict[str, Any] = {}
+
+def _init_worker(seed: int, now: datetime, hasher: PasswordHasher, scale: Scale, mode: str, batch_size: int,
+                 fast_load: bool, run_key: str):
+    conn = get_db_connection()
+    atexit.register(conn.close)
+    configure_session(conn, fast_load)
+    loader_class = RowLoader if mode == "row" else BulkLoader
+    _worker.update(
+        conn=conn,
+        loader=loader_class(conn, batch_size=batch_size),
+        generator=DataGenerator(seed=seed, now=now, hasher=hasher),
+        scale=scale,
+        checkpoints=Checkpoints(run_key)
+    )
+
+def _run_stage(name: str, start: int, end: int, *args):
+    """Run one stage of a range in a worker as its own transaction, checkpoint
+    included; returns (result, report tables)"""
+    conn, loader = _worker["conn"], _worker["loader"]
+    loader.report = LoadReport()
+    try:
+        if name == "core":
+            result = load_core(loader, _worker["generator"], _worker["scale"], start, end)
+            rows = result[2]["users"]
+        else:
+            result = rows = STAGES[name](loader, _worker["generator"], _worker["scale"], *args)
+        _worker["checkpoints"].record(conn, name, start, end, rows)
         conn.commit()
-        print("✅ Created timeline events")
-        
-        # Generate some social interactions
-        print("👥 Generating social interactions...")
-        for _ in range(100):  # 100 random follows
-            follower_id = random.choice(user_ids)
-            following_id = random.choice(user_ids)
-            
-            if follower_id != following_id:
-                cursor.execute("""
-                    INSERT INTO user_follows (follower_id, following_id, created_at)
-                    VALUES (%s, %s, %s)
-                    ON CONFLICT (follower_id, following_id) DO NOTHING
-                """, (follower_id, following_id, datetime.now()))
-        
+    except Exception:
+        conn.rollback()
+        raise
+    return result, loader.report.tables
+
+def load_parallel(conn, workers: int, generator: DataGenerator, scale: Scale, mode: str, batch_size: int,
+                  report: LoadReport, checkpoints: Checkpoints, totals: SeedTotals, fast_load: bool = False):
+    """Fan ranges out over a process pool. A range's notes, citations,
+    timeline events and papers are submitted as separate tasks once its core
+    stage has committed, so different tables load at the same time on different
+    connections. At most 2 x workers core stages are outstanding, which
+    bounds memory"""
+    ranges = iter(_plan_ranges(scale.users, scale.chunk_users, checkpoints.done.get("core", {})))
+    pending = {}
+    loaded_users = 0
+
+    def submit_stages(start, end, chunk_users, projects_by_user):
+        totals.add_users(start, chunk_users)
+        for name in STAGES:
+            if checkpoints.is_done(name, start, end):
+                totals.skipped += 1
+            else:
+                pending[pool.submit(_run_stage, name, start, end, chunk_users, projects_by_user)] = (name, start, end)
+
+    def submit_core():
+        # Ranges whose core stage already committed are looked up here and
+        # only their pending stages go to the pool
+        for start, end in ranges:
+            if not checkpoints.is_done("core", start, end):
+                pending[pool.submit(_run_stage, "core", start, end)] = ("core", start, end)
+                return
+            totals.skipped += 1
+            submit_stages(start, end, *lookup_core(conn, generator, start, end))
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker,
+        initargs=(generator.seed, generator.now, generator.hasher, scale, mode, batch_size, fast_load,
+                  checkpoints.run_key)
+    ) as pool:
+        for _ in range(2 * workers):
+            submit_core()
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, start, end = pending.pop(future)
+                result, tables = future.result()
+                report.merge(tables)
+                checkpoints.done.setdefault(name, {})[start] = end
+                if name == "core":
+                    chunk_users, projects_by_user, counts = result
+                    totals.add(counts)
+                    submit_stages(start, end, chunk_users, projects_by_user)
+                    loaded_users += end - start
+                    print(f"   … {loaded_users:,}/{scale.users:,} users loaded")
+                    submit_core()
+                else:
+                    totals.counts[name] += result
+
+def load_follows(conn, loader: BulkLoader, generator: DataGenerator, scale: Scale,
+                 checkpoints: Checkpoints, totals: SeedTotals):
+    """The follow graph spans all users, so it is built once every range has
+    loaded. Ranges are of user indexes, like every other stage. Follower ranges
+    with a checkpoint are skipped; after a top-up only the new users' follows
+    are generated"""
+    user_ids = totals.user_ids(scale.users)
+    for start, end in _plan_ranges(len(user_ids), max(len(user_ids), 1), checkpoints.done.get("follows", {})):
+        if checkpoints.is_done("follows", start, end):
+            totals.skipped += 1
+            continue
+        rows = loader.copy_rows(
+            "user_follows", FOLLOW_COLUMNS,
+            generator.generate_follows(user_ids, scale.avg_follows, scale.follow_skew, start, end)
+        )
+        checkpoints.record(conn, "follows", start, end, rows)
         conn.commit()
-        print("✅ Created social interactions")
+        totals.counts["follows"] += rows
+
+def insert_sample_data(scale: Scale = None, seed: int = None, mode: str = "bulk", batch_size: int = 5000,
+                       workers: int = 1, hasher: PasswordHasher = None, fast_load: FastLoad = None,
+                       resume: bool = False, reference_date: date = None):
+    """Main function to insert all sample data. Users are processed in ranges of
+    scale.chunk_users, each flowing through users -> profiles -> projects ->
+    notes / citations / timeline events / papers, so memory stays flat however large
+    the run is. Completed stages are checkpointed; with resume the latest run's
+    seed and scale are reused and only missing stages (or users) are loaded"""
+    scale = scale or Scale()
+    print("🚀 Starting sample data generation...")
+    
+    conn = get_db_connection()
+    configure_session(conn, fast_load is not None)
+    report = LoadReport()
+    loader_class = RowLoader if mode == "row" else BulkLoader
+    loader = loader_class(conn, batch_size=batch_size, report=report)
+    
+    try:
+        Checkpoints.ensure_tables(conn)
+        generator = DataGenerator(seed=seed, now=reference_time(seed, reference_date), hasher=hasher)
+        if resume:
+            run = Checkpoints.latest_run(conn)
+            if run is None:
+                raise RuntimeError("No earlier seeding run to resume")
+            generator = DataGenerator(seed=run["seed"], now=run["reference_time"], hasher=hasher)
+            scale = Scale.from_dict(run["scale"], users=scale.users, chunk_users=scale.chunk_users)
+        elif scale.users is None:
+            scale.users = DEFAULT_USERS
+
+        checkpoints = Checkpoints(Checkpoints.run_key_for(generator, scale))
+        checkpoints.open(conn, generator, scale)
+        print(f"🎲 Seed {generator.seed} (run {checkpoints.run_key[:12]}, dated {generator.now:%Y-%m-%d}), {scale.users:,} users "
+              f"in chunks of {scale.chunk_users:,} on {workers} worker{'s' if workers != 1 else ''}")
+
+        if fast_load is not None:
+            with report.phase("drop indexes"):
+                fast_load.prepare(conn)
+
+        totals = SeedTotals()
+        started = time.perf_counter()
+        with report.phase("load"):
+            if workers > 1:
+                load_parallel(conn, workers, generator, scale, mode, batch_size, report,
+                              checkpoints, totals, fast_load is not None)
+            else:
+                load_sequential(conn, loader, generator, scale, checkpoints, totals)
+            counts = totals.counts
+
+            print(f"✅ Created {counts['users']} users, {counts['profiles']} profiles, {counts['projects']} projects, "
+                  f"{counts['notes']} notes, {counts['citations']} citations, {counts['timeline']} timeline events "
+                  f"and {counts['papers']} papers")
+            
+            print("👥 Generating social interactions...")
+            load_follows(conn, loader, generator, scale, checkpoints, totals)
+            print(f"✅ Created {counts['follows']} follows")
+        report.wall_seconds = time.perf_counter() - started
+
+        if fast_load is not None:
+            with report.phase("rebuild indexes"):
+                fast_load.restore(conn)
+            with report.phase("analyze"):
+                fast_load.analyze(conn)
         
         print("\n🎉 Sample data generation completed successfully!")
         print(f"📊 Summary:")
-        print(f"   • {len(user_ids)} users created")
-        print(f"   • {len(profiles)} user profiles created")
-        print(f"   • {len(project_ids)} research projects created")
-        print(f"   • {len(notes)} research notes created")
-        print(f"   • {len(citations)} citations created")
-        print(f"   • Timeline events and social interactions added")
+        print(f"   • {counts['users']} users created")
+        print(f"   • {counts['profiles']} user profiles created")
+        print(f"   • {counts['projects']} research projects created")
+        print(f"   • {counts['notes']} research notes created")
+        print(f"   • {counts['citations']} citations created")
+        print(f"   • {counts['timeline']} timeline events created")
+        print(f"   • {counts['papers']} papers created")
+        print(f"   • {counts['follows']} follows created")
+        if totals.skipped:
+            print(f"   • {totals.skipped} stages already completed by an earlier run were skipped")
+        report.print_summary()
         
     except Exception as e:
         print(f"❌ Error inserting sample data: {e}")
         conn.rollback()
+        if fast_load is not None:
+            # Never leave the schema without its indexes
+            fast_load.restore(conn)
         raise
     finally:
-        cursor.close()
         conn.close()
 
+# Dataset snapshots: the seeded tables as compressed binary COPY files plus a
+# manifest, restored by streaming them back with COPY FROM
+SNAPSHOT_FORMAT = 1
+# Restore order: each group only references tables in earlier groups, and the
+# tables within a group load concurrently
+SNAPSHOT_GROUPS = [
+    ['users', 'seed_runs'],
+    ['user_profiles', 'research_projects', 'citations', 'papers', 'user_follows', 'seed_checkpoints'],
+    ['research_notes', 'timeline_events']
+]
+SNAPSHOT_TABLES = [table for group in SNAPSHOT_GROUPS for table in group]
+
+def _table_columns(conn, table: str) -> List[str]:
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = %s
+            ORDER BY ordinal_position
+        """, (table,))
+        return [row[0] for row in cursor.fetchall()]
+
+def _export_table(directory: str, table: str, snapshot_id: str, compress_level: int) -> Dict[str, Any]:
+    conn = get_db_connection()
+    try:
+        # Every table is read from the exporting transaction's snapshot
+        conn.set_session(isolation_level='REPEATABLE READ', readonly=True)
+        with conn.cursor() as cursor:
+            cursor.execute("SET TRANSACTION SNAPSHOT %s", (snapshot_id,))
+        columns = _table_columns(conn, table)
+        filename = f"{table}.copy.gz"
+        path = os.path.join(directory, filename)
+        with gzip.open(path, "wb", compresslevel=compress_level) as f, conn.cursor() as cursor:
+            cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) TO STDOUT (FORMAT binary)", f)
+            rows = cursor.rowcount
+        conn.rollback()
+    finally:
+        conn.close()
+    return {"file": filename, "columns": columns, "rows": rows, "bytes": os.path.getsize(path)}
+
+def export_snapshot(directory: str, workers: int = 4, compress_level: int = 1) -> Dict[str, Any]:
+    """Write the seeded tables, read from one consistent snapshot, to `directory`"""
+    os.makedirs(directory, exist_ok=True)
+    conn = get_db_connection()
+    try:
+        Checkpoints.ensure_tables(conn)
+        run = Checkpoints.latest_run(conn)
+        conn.set_session(isolation_level='REPEATABLE READ', readonly=True)
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_export_snapshot()")
+            snapshot_id = cursor.fetchone()[0]
+
+        started = time.perf_counter()
+        # The exporting transaction stays open until every table is written
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {
+                table: pool.submit(_export_table, directory, table, snapshot_id, compress_level)
+                for table in SNAPSHOT_TABLES
+            }
+            tables = {table: future.result() for table, future in futures.items()}
+        conn.rollback()
+
+        manifest = {
+            "format": SNAPSHOT_FORMAT,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "server_version": conn.server_version,
+            "run": run and {
+                "seed": run["seed"],
+                "reference_time": run["reference_time"].isoformat(),
+                "scale": run["scale"]
+            },
+            "tables": tables
+        }
+    finally:
+        conn.close()
+
+    with open(os.path.join(directory, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    rows = sum(table["rows"] for table in tables.values())
+    size = sum(table["bytes"] for table in tables.values())
+    print(f"📦 Exported {rows:,} rows ({size / 2 ** 20:,.1f} MiB) to {directory} "
+          f"in {time.perf_counter() - started:.1f}s")
+    return manifest
+
+def _import_table(directory: str, table: str, entry: Dict[str, Any], fast_load: bool) -> Tuple[int, float]:
+    conn = get_db_connection()
+    configure_session(conn, fast_load)
+    started = time.perf_counter()
+    try:
+        with gzip.open(os.path.join(directory, entry["file"]), "rb") as f, conn.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {table} ({', '.join(entry['columns'])}) FROM STDIN (FORMAT binary)", f, size=1 << 20
+            )
+        conn.commit()
+    finally:
+        conn.close()
+    return entry["rows"], time.perf_counter() - started
+
+def import_snapshot(directory: str, workers: int = 4, fast_load: FastLoad = None, truncate: bool = False):
+    """Restore a snapshot written by export_snapshot into an empty schema. IDs
+    are restored as they were, and the tables' sequences are moved past them"""
+    with open(os.path.join(directory, "manifest.json")) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise RuntimeError(f"Unsupported snapshot format {manifest.get('format')!r}")
+
+    report = LoadReport()
+    conn = get_db_connection()
+    try:
+        Checkpoints.ensure_tables(conn)
+        if manifest["server_version"] // 10000 != conn.server_version // 10000:
+            print(f"⚠️  Snapshot was taken on server version {manifest['server_version']}, "
+                  f"restoring into {conn.server_version}")
+
+        with conn.cursor() as cursor:
+            if truncate:
+                cursor.execute(f"TRUNCATE {', '.join(SNAPSHOT_TABLES)} RESTART IDENTITY CASCADE")
+            else:
+                for table in SNAPSHOT_TABLES:
+                    cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {table})")
+                    if cursor.fetchone()[0]:
+                        raise RuntimeError(f"{table} is not empty; pass --truncate to replace its contents")
+        conn.commit()
+
+        run = manifest.get("run")
+        if run:
+            print(f"📦 Restoring snapshot of seed {run['seed']} from {manifest['created_at']}")
+
+        if fast_load is not None:
+            with report.phase("drop indexes"):
+                fast_load.prepare(conn)
+
+        started = time.perf_counter()
+        with report.phase("load"):
+            for group in SNAPSHOT_GROUPS:
+                with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                    futures = {
+                        table: pool.submit(_import_table, directory, table, manifest["tables"][table],
+                                           fast_load is not None)
+                        for table in group
+                    }
+                    for table, future in futures.items():
+                        report.add(table, *future.result())
+
+            with conn.cursor() as cursor:
+                for table in SNAPSHOT_TABLES:
+                    cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", (table,))
+                    sequence = cursor.fetchone()[0]
+                    if sequence:
+                        cursor.execute(
+                            f"SELECT setval(%s, COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)",
+                            (sequence,)
+                        )
+            conn.commit()
+        report.wall_seconds = time.perf_counter() - started
+
+        if fast_load is not None:
+            with report.phase("rebuild indexes"):
+                fast_load.restore(conn)
+        with report.phase("analyze"):
+            with conn.cursor() as cursor:
+                for table in SNAPSHOT_TABLES:
+                    cursor.execute(f"ANALYZE {table}")
+            conn.commit()
+
+        print("🎉 Snapshot restored")
+        report.print_summary()
+    except Exception as e:
+        print(f"❌ Error restoring snapshot: {e}")
+        conn.rollback()
+        if fast_load is not None:
+            fast_load.restore(conn)
+        raise
+    finally:
+        conn.close()
+
+def _count_range(value: str) -> Tuple[int, int]:
+    """Parse "N" or "MIN-MAX" into an inclusive range"""
+    low, _, high = value.partition("-")
+    try:
+        low, high = int(low), int(high or low)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected N or MIN-MAX, got {value!r}")
+    if low < 0 or high < low:
+        raise argparse.ArgumentTypeError(f"invalid range {value!r}")
+    return low, high
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Seed The Research Hub database with sample data")
+    parser.add_argument("--mode", choices=["bulk", "row"], default="bulk",
+                        help="bulk: COPY/execute_values batches; row: one INSERT per row (for comparison)")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per COPY or INSERT batch")
+    parser.add_argument("--seed", type=int,
+                        help="Random seed; the same seed and scale reproduce the same dataset. Timestamps are "
+                             "relative to the start of today, so to reproduce it on a later day also pass "
+                             "the day it was generated as --reference-date")
+    parser.add_argument("--reference-date", type=date.fromisoformat, metavar="YYYY-MM-DD",
+                        help="Date generated timestamps are relative to (default: today). Upcoming events "
+                             "and deadlines fall after it")
+    parser.add_argument("--users", type=int,
+                        help=f"Number of users to generate (default: {DEFAULT_USERS}, or the resumed run's target)")
+    parser.add_argument("--projects-per-user", type=_count_range, default=(1, 5), metavar="N|MIN-MAX")
+    parser.add_argument("--notes-per-user", type=_count_range, default=(5, 20), metavar="N|MIN-MAX")
+    parser.add_argument("--citations-per-user", type=_count_range, default=(10, 50), metavar="N|MIN-MAX")
+    parser.add_argument("--duplicate-citations", type=float, default=0.0, metavar="RATE",
+                        help="Share of citations imported a second time with small differences "
+                             "(test data for dedupe_citations.py)")
+    parser.add_argument("--events-per-project", type=_count_range, default=(1, 3), metavar="N|MIN-MAX")
+    parser.add_argument("--papers-per-user", type=_count_range, default=(0, 3), metavar="N|MIN-MAX")
+    parser.add_argument("--note-words", type=int, default=150, help="Mean words per note (log-normal lengths)")
+    parser.add_argument("--abstract-words", type=int, default=200, help="Mean words per paper abstract")
+    parser.add_argument("--avg-follows", type=float, default=2.0,
+                        help="Mean follows per user; out-degrees are power-law distributed around it")
+    parser.add_argument("--follow-skew", type=float, default=1.0,
+                        help="Zipf exponent of follow-target popularity; higher concentrates followers on fewer users")
+    parser.add_argument("--chunk-users", type=int, default=1000,
+                        help="Users generated and loaded per chunk; bounds peak memory")
+    parser.add_argument("--password-hash-pool", type=int, default=0, metavar="N",
+                        help="Hash the sample password N times up front and reuse the hashes "
+                             "(default: 0, a fresh hash per user)")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12, choices=range(4, 32), metavar="4-31",
+                        help="bcrypt cost factor for seeded passwords (default: 12, as the app uses); "
+                             "lower it for non-production data")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes, each with its own connection (default: 1, in-process)")
+    parser.add_argument("--fast-load", action="store_true",
+                        help="For fresh schemas: drop secondary indexes and user triggers, load with "
+                             "synchronous_commit=off, then rebuild indexes and ANALYZE")
+    parser.add_argument("--maintenance-workers", type=int, default=4,
+                        help="max_parallel_maintenance_workers per index rebuild with --fast-load")
+    parser.add_argument("--maintenance-work-mem", default="1GB",
+                        help="maintenance_work_mem per index rebuild with --fast-load")
+    parser.add_argument("--export-snapshot", metavar="DIR",
+                        help="After seeding, write the seeded tables to DIR as compressed binary COPY files")
+    parser.add_argument("--import-snapshot", metavar="DIR",
+                        help="Restore a snapshot from DIR instead of generating data")
+    parser.add_argument("--truncate", action="store_true",
+                        help="With --import-snapshot, TRUNCATE ... CASCADE the seeded tables first")
+    parser.add_argument("--compress-level", type=int, default=1, choices=range(1, 10), metavar="1-9",
+                        help="gzip level for --export-snapshot (default: 1, fastest)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue the latest run with its seed, reference date and per-user scale, loading only what is "
+                             "missing; combine with a larger --users to top it up")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    insert_sample_data()
+    args = parse_args()
+    scale = Scale(
+        users=args.users,
+        projects_per_user=args.projects_per_user,
+        notes_per_user=args.notes_per_user,
+        citations_per_user=args.citations_per_user,
+        events_per_project=args.events_per_project,
+        papers_per_user=args.papers_per_user,
+        note_words=args.note_words,
+        abstract_words=args.abstract_words,
+        avg_follows=args.avg_follows,
+        follow_skew=args.follow_skew,
+        chunk_users=args.chunk_users,
+        duplicate_citations=args.duplicate_citations
+    )
+    hasher = PasswordHasher(pool_size=args.password_hash_pool, rounds=args.bcrypt_rounds)
+    fast_load = None
+    if args.fast_load:
+        fast_load = FastLoad(
+            rebuild_workers=max(2, args.workers),
+            maintenance_workers=args.maintenance_workers,
+            maintenance_work_mem=args.maintenance_work_mem
+        )
+    if args.import_snapshot:
+        import_snapshot(args.import_snapshot, workers=max(4, args.workers), fast_load=fast_load,
+                        truncate=args.truncate)
+    else:
+        insert_sample_data(scale, seed=args.seed, mode=args.mode, batch_size=args.batch_size,
+                           workers=args.workers, hasher=hasher, fast_load=fast_load, resume=args.resume,
+                           reference_date=args.reference_date)
+    if args.export_snapshot:
+        export_snapshot(args.export_snapshot, workers=max(4, args.workers), compress_level=args.compress_level)
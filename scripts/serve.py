@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Production launcher for the Research Assistant API
+Imports and warms the app once, binds the listening socket, then forks
+uvicorn workers that share both. SIGHUP rolls the workers over to a fresh
+generation running the current code: a preloading launcher re-executes
+itself to re-import the app, keeping the socket and adopting the old
+workers. SIGTERM shuts down. Either way old workers stop accepting and
+drain their in-flight requests before exiting
+"""
+
+import os
+import sys
+import math
+import time
+import signal
+import socket
+import logging
+import argparse
+import shutil
+import tempfile
+import importlib
+import subprocess
+from typing import Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(process)d] %(levelname)s %(message)s")
+logger = logging.getLogger("serve")
+
+# Handed across a re-exec: the listening socket's fd and the workers to retire
+LISTEN_FD_ENV = "SERVE_LISTEN_FD"
+RETIRING_ENV = "SERVE_RETIRING_PIDS"
+# Where workers share state such as the collaborator index; created here unless set
+SHARED_STATE_ENV = "SHARED_STATE_DIR"
+OWNS_SHARED_STATE_ENV = "SERVE_OWNS_SHARED_STATE_DIR"
+SIGNALS = (signal.SIGTERM, signal.SIGINT, signal.SIGHUP)
+
+def cgroup_cpu_limit() -> Optional[int]:
+    """CPUs granted by a cgroup v2 quota (e.g. a Kubernetes CPU limit), if any"""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return max(1, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return None
+
+def default_workers() -> int:
+    """WEB_CONCURRENCY if set, otherwise one worker per usable core. Workers are
+    async, so more than one per core only adds memory and context switches"""
+    if os.getenv("WEB_CONCURRENCY"):
+        return max(1, int(os.environ["WEB_CONCURRENCY"]))
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    return max(1, min(cores, limit) if limit else cores)
+
+def load_app(target: str, warm: bool = True):
+    """Import `module:attribute`, then run the module's warm() if it has one"""
+    module_name, _, attribute = target.partition(":")
+    started = time.perf_counter()
+    module = importlib.import_module(module_name)
+    app = getattr(module, attribute or "app")
+    imported = time.perf_counter() - started
+    timings = {}
+    if warm and hasattr(module, "warm"):
+        timings = module.warm()
+    logger.info(f"Loaded {target} in {imported * 1000:.0f} ms, warmed "
+                + (", ".join(f"{step} {seconds * 1000:.0f} ms" for step, seconds in timings.items()) or "nothing"))
+    return app
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def run_worker(app, sock: socket.socket, args: argparse.Namespace, ready_fd: Optional[int]):
+    """Serve on the shared socket until told to stop. uvicorn stops accepting on
+    SIGTERM and waits up to graceful_timeout for in-flight requests"""
+    import asyncio
+    import uvicorn
+
+    started = time.perf_counter()
+    if app is None:
+        app = load_app(args.app)
+    server = uvicorn.Server(uvicorn.Config(
+        app,
+        log_level=args.log_level,
+        access_log=False,
+        lifespan="on",
+        timeout_keep_alive=args.keep_alive,
+        timeout_graceful_shutdown=args.graceful_timeout
+    ))
+
+    async def serve():
+        serving = asyncio.ensure_future(server.serve(sockets=[sock]))
+        while not server.started and not serving.done():
+            await asyncio.sleep(0.005)
+        if ready_fd is not None and server.started:
+            os.write(ready_fd, f"{os.getpid()} {time.perf_counter() - started:.6f}\n".encode())
+        await serving
+
+    asyncio.run(serve())
+
+class Arbiter:
+    """Parent process: forks workers, replaces ones that die, rolls them over
+    on SIGHUP and drains them on SIGTERM/SIGINT"""
+
+    def __init__(self, app, sock: socket.socket, args: argparse.Namespace, inherited: Optional[List[int]] = None):
+        self.app = app
+        self.sock = sock
+        self.args = args
+        self.workers: Dict[int, int] = {}  # pid -> generation
+        self.spawned_at: Dict[int, float] = {}
+        self.ready: set = set()
+        self.generation = 0
+        # Workers of the launcher this process re-executed from, retired once ours accept
+        self.inherited = inherited or []
+        for pid in self.inherited:
+            self.workers[pid] = -1
+        self.retiring: List[int] = []
+        self.pending: List[int] = []
+        self._ready_r, self._ready_w = os.pipe()
+        os.set_blocking(self._ready_r, False)
+        self._buffer = b""
+
+    def _on_signal(self, signum, frame):
+        self.pending.append(signum)
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            # Own process group, so a terminal Ctrl-C reaches only the parent, which then drains
+            os.setpgid(0, 0)
+            for signum in SIGNALS:
+                signal.signal(signum, signal.SIG_DFL)
+            os.close(self._ready_r)
+            code = 0
+            try:
+                run_worker(self.app, self.sock, self.args, self._ready_w)
+            except BaseException:
+                logger.exception("Worker crashed")
+                code = 1
+            finally:
+                os._exit(code)
+        self.workers[pid] = self.generation
+        self.spawned_at[pid] = time.perf_counter()
+
+    def _read_ready(self):
+        try:
+            self._buffer += os.read(self._ready_r, 65536)
+        except BlockingIOError:
+            return
+        *lines, self._buffer = self._buffer.split(b"\n")
+        for line in lines:
+            pid, seconds = line.decode().split()
+            self.ready.add(int(pid))
+            logger.debug(f"Worker {pid} accepting after {float(seconds) * 1000:.0f} ms")
+
+    def _current(self) -> List[int]:
+        return [pid for pid, generation in self.workers.items() if generation == self.generation]
+
+    def _reap(self, stopping: bool):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            generation = self.workers.pop(pid, None)
+            spawned_at = self.spawned_at.pop(pid, 0.0)
+            self.ready.discard(pid)
+            if pid in self.retiring:
+                self.retiring.remove(pid)
+                continue
+            if generation == self.generation and not stopping:
+                logger.warning(f"Worker {pid} exited with status {status}, replacing it")
+                if time.perf_counter() - spawned_at < 1.0:
+                    time.sleep(1.0)  # Crashing on startup; don't spin
+                self.spawn()
+
+    def _signal_all(self, pids: List[int], signum: int):
+        for pid in pids:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def _wait_ready(self, started: float) -> bool:
+        """Wait for every current-generation worker, replacements included, to accept"""
+        deadline = started + self.args.ready_timeout
+        while time.perf_counter() < deadline:
+            self._read_ready()
+            if all(pid in self.ready for pid in self._current()):
+                return True
+            self._reap(stopping=False)
+            time.sleep(0.01)
+        return False
+
+    def reload(self):
+        """Start a new generation, then retire the old one once the new one is accepting.
+        Without preloading each worker imports the app, so it runs the current code"""
+        started = time.perf_counter()
+        old = self._current()
+        self.generation += 1
+        for _ in range(self.args.workers):
+            self.spawn()
+        if not self._wait_ready(started):
+            logger.warning("New workers not ready in time; retiring the old ones anyway")
+        self._retire(old, started)
+
+    def _retire(self, old: List[int], started: float):
+        self.retiring.extend(old)
+        self._signal_all(old, signal.SIGTERM)
+        logger.info(f"Reloaded: {self.args.workers} workers (generation {self.generation}) ready in "
+                    f"{(time.perf_counter() - started) * 1000:.0f} ms, draining {len(old)} old workers")
+
+    def _importable(self) -> bool:
+        """Whether the app imports in a fresh interpreter, checked before re-executing"""
+        module_name = self.args.app.partition(":")[0]
+        check = "import sys, importlib; sys.path.insert(0, sys.argv[1]); importlib.import_module(sys.argv[2])"
+        try:
+            result = subprocess.run([sys.executable, "-c", check, os.path.dirname(os.path.abspath(__file__)),
+                                     module_name], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                    text=True, timeout=self.args.ready_timeout)
+        except subprocess.TimeoutExpired:
+            logger.error(f"Importing {module_name} timed out")
+            return False
+        if result.returncode:
+            logger.error(f"Importing {module_name} failed:\n{result.stderr.strip()}")
+        return result.returncode == 0
+
+    def reexec(self):
+        """Replace this process with a fresh launcher so the preloaded app is
+        imported again from the current code. The pid stays the same, so the
+        running workers remain our children; the new image adopts them and
+        retires them once its own workers accept. Signals are blocked across
+        the exec and delivered once the new image has its handlers"""
+        if not self._importable():
+            logger.error("Keeping the running workers; fix the app and send SIGHUP again")
+            return
+        logger.info(f"Re-executing to load new code; {len(self.workers)} workers keep serving meanwhile")
+        self.sock.set_inheritable(True)
+        os.environ[LISTEN_FD_ENV] = str(self.sock.fileno())
+        os.environ[RETIRING_ENV] = ",".join(str(pid) for pid in self.workers)
+        signal.pthread_sigmask(signal.SIG_BLOCK, SIGNALS)
+        try:
+            os.execv(sys.executable, [sys.executable, os.path.abspath(sys.argv[0])] + sys.argv[1:])
+        except OSError:
+            logger.exception("Re-executing failed; keeping the running workers")
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, SIGNALS)
+
+    def shutdown(self):
+        logger.info(f"Draining {len(self.workers)} workers")
+        self._signal_all(list(self.workers), signal.SIGTERM)
+        deadline = time.perf_counter() + self.args.graceful_timeout + 5
+        while self.workers and time.perf_counter() < deadline:
+            self._reap(stopping=True)
+            time.sleep(0.05)
+        if self.workers:
+            logger.warning(f"Killing {len(self.workers)} workers that did not drain in time")
+            self._signal_all(list(self.workers), signal.SIGKILL)
+            while self.workers:
+                pid, _ = os.waitpid(-1, 0)
+                self.workers.pop(pid, None)
+
+    def run(self, launched: float):
+        for signum in SIGNALS:
+            signal.signal(signum, self._on_signal)
+        # Blocked by the launcher this process re-executed from, if any
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, SIGNALS)
+        for _ in range(self.args.workers):
+            self.spawn()
+        ready = self._wait_ready(launched)
+        if self.inherited:
+            if not ready:
+                logger.warning("New workers not ready in time; retiring the old ones anyway")
+            self._retire(self.inherited, launched)
+        elif ready:
+            logger.info(f"Workers ready: {self.args.workers}/{self.args.workers} in "
+                        f"{(time.perf_counter() - launched) * 1000:.0f} ms, listening on "
+                        f"{self.args.host}:{self.args.port}")
+        else:
+            logger.warning("Not every worker became ready in time")
+
+        while True:
+            while self.pending:
+                signum = self.pending.pop(0)
+                if signum == signal.SIGHUP:
+                    if self.app is None:
+                        self.reload()
+                    else:
+                        self.reexec()
+                else:
+                    self.shutdown()
+                    return
+            self._read_ready()
+            self._reap(stopping=False)
+            time.sleep(0.1)
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the Research Assistant API with pre-forked uvicorn workers")
+    parser.add_argument("--app", default="chatbot_server:app", help="ASGI app as module:attribute")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="Worker processes (default: WEB_CONCURRENCY, else usable cores)")
+    parser.add_argument("--no-preload", dest="preload", action="store_false",
+                        help="Import the app in each worker instead of once before forking")
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.getenv("GRACEFUL_TIMEOUT", "30")),
+                        help="Seconds a stopping worker waits for in-flight requests")
+    parser.add_argument("--ready-timeout", type=float, default=60.0,
+                        help="Seconds to wait for workers to accept connections")
+    parser.add_argument("--keep-alive", type=int, default=5, help="Idle keep-alive timeout in seconds")
+    parser.add_argument("--backlog", type=int, default=2048, help="Listen backlog of the shared socket")
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info"))
+    return parser.parse_args()
+
+def main():
+    launched = time.perf_counter()
+    args = parse_args()
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    # Set when a SIGHUP re-executed the launcher: keep its socket and adopt its workers
+    listen_fd = os.environ.pop(LISTEN_FD_ENV, None)
+    inherited = [int(pid) for pid in os.environ.pop(RETIRING_ENV, "").split(",") if pid]
+
+    if args.workers > 1 and os.getenv("SESSION_STORE", "memory") == "memory":
+        # Each worker would hold its own sessions, and a follow-up landing on another worker gets a 404
+        logger.warning(f"SESSION_STORE=memory keeps sessions inside each of the {args.workers} workers, so "
+                       f"session follow-ups fail on whichever worker did not start them. Set "
+                       f"SESSION_STORE=postgres or --workers 1 to use server-side sessions")
+
+    if SHARED_STATE_ENV not in os.environ and not (args.workers == 1 and args.preload):
+        # Set before the app is imported, which reads it; kept across a SIGHUP re-exec
+        os.environ[SHARED_STATE_ENV] = tempfile.mkdtemp(prefix="research-assistant-")
+        os.environ[OWNS_SHARED_STATE_ENV] = "1"
+    elif SHARED_STATE_ENV in os.environ and listen_fd is None:
+        # Counters from a previous run would otherwise be added to this one's
+        shutil.rmtree(os.path.join(os.environ[SHARED_STATE_ENV], "metrics"), ignore_errors=True)
+
+    # Preloading shares imported modules and warmed state copy-on-write between workers
+    app = load_app(args.app) if args.preload else None
+    if listen_fd is not None:
+        sock = socket.socket(fileno=int(listen_fd))
+        sock.set_inheritable(True)
+    else:
+        sock = bind_socket(args.host, args.port, args.backlog)
+    if args.workers == 1 and args.preload and listen_fd is None:
+        # Nothing to supervise; uvicorn handles the signals itself, so SIGHUP stops it
+        run_worker(app, sock, args, None)
+        return
+    try:
+        Arbiter(app, sock, args, inherited).run(launched)
+    finally:
+        if os.environ.get(OWNS_SHARED_STATE_ENV):
+            shutil.rmtree(os.environ[SHARED_STATE_ENV], ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
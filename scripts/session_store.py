@@ -0,0 +1,198 @@
+"""
+Server-side conversation sessions for the Research Assistant API
+Clients send a session ID with each new message instead of the full history.
+A session belongs to the user who started it (None for anonymous sessions)
+and is only found again for that same user
+"""
+
+import os
+import json
+import uuid
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
+class InMemorySessionStore:
+    """Per-process session histories with LRU eviction of whole sessions and a
+    cap on the messages kept per session. Each worker of a pre-forking launcher
+    has its own, so use the postgres store with more than one worker"""
+
+    def __init__(self, max_sessions: int = 10000, max_messages: int = 200):
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        # session_id -> (owning user, history)
+        self._sessions: "OrderedDict[str, Tuple[Optional[int], List[dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, session_id: str) -> Optional[Tuple[Optional[int], List[dict]]]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                self._sessions.move_to_end(session_id)
+            return entry
+
+    def _put(self, session_id: str, messages: List[dict], user_id: Optional[int]):
+        with self._lock:
+            history = self._sessions.setdefault(session_id, (user_id, []))[1]
+            history.extend(messages)
+            del history[:-self.max_messages]
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    async def load(self, session_id: str, user_id: Optional[int] = None) -> Optional[List[dict]]:
+        """The session's history, or None if there is no such session for this user"""
+        entry = self._get(session_id)
+        if entry is None or entry[0] != user_id:
+            return None
+        return list(entry[1])
+
+    async def seed(self, session_id: str, history: List[dict], user_id: Optional[int] = None):
+        """Start a session owned by user_id, from any history the client already holds"""
+        self._put(session_id, [
+            {"role": entry.get("role", "user"), "content": entry.get("content", "")}
+            for entry in history
+        ], user_id)
+
+    async def append_turn(self, session_id: str, message: str, reply: str, user_id: Optional[int] = None):
+        self._put(session_id, [
+            {"role": "user", "content": message},
+            {"role": "assistant", "content": reply}
+        ], user_id)
+
+    def stats(self) -> dict:
+        return {"backend": type(self).__name__, "sessions": len(self._sessions)}
+
+def history_turns(history: List[dict]) -> List[Tuple[str, Optional[str]]]:
+    """(message, reply) pairs in the shape of chat_messages rows. Each user
+    message opens a turn and the next assistant message answers it; other
+    roles have no column to go in and are dropped"""
+    turns = []
+    for entry in history:
+        role, content = entry.get("role", "user"), entry.get("content", "")
+        if role == "user":
+            turns.append((content, None))
+        elif role == "assistant":
+            if turns and turns[-1][1] is None:
+                turns[-1] = (turns[-1][0], content)
+            else:
+                turns.append(("", content))
+    return turns
+
+class PostgresSessionStore(InMemorySessionStore):
+    """Write-through store persisting each turn to the chat_messages table
+    (session ID kept in the context JSONB, owner in user_id). The in-memory
+    LRU serves hot sessions; evicted or restarted sessions, and sessions
+    started by another worker, are reloaded from the database"""
+
+    def __init__(self, max_sessions: int = 10000, max_messages: int = 200, pool_size: int = 10):
+        super().__init__(max_sessions, max_messages)
+        self.pool_size = pool_size
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # getconn() raises rather than waits once the pool is empty, and
+        # to_thread can run more queries at once than the pool holds
+        self._slots = asyncio.Semaphore(pool_size)
+
+    def _get_pool(self):
+        # Opened on first use so a pre-forking launcher never shares connections between workers
+        with self._pool_lock:
+            if self._pool is None:
+                from psycopg2.pool import ThreadedConnectionPool
+
+                dsn = os.getenv("DATABASE_URL")
+                if dsn:
+                    self._pool = ThreadedConnectionPool(1, self.pool_size, dsn)
+                else:
+                    self._pool = ThreadedConnectionPool(
+                        1, self.pool_size,
+                        host=os.getenv('PGHOST', 'localhost'),
+                        database=os.getenv('PGDATABASE', 'research_hub'),
+                        user=os.getenv('PGUSER', 'postgres'),
+                        password=os.getenv('PGPASSWORD', ''),
+                        port=os.getenv('PGPORT', '5432')
+                    )
+        return self._pool
+
+    def _query_history(self, session_id: str, user_id: Optional[int]) -> List[dict]:
+        pool = self._get_pool()
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT message, response FROM chat_messages
+                    WHERE context->>'session_id' = %s AND user_id IS NOT DISTINCT FROM %s
+                    ORDER BY created_at DESC, id DESC
+                    LIMIT %s
+                """, (session_id, user_id, self.max_messages // 2))
+                rows = cursor.fetchall()
+            conn.commit()
+        finally:
+            pool.putconn(conn)
+
+        history = []
+        for message, response in reversed(rows):
+            if message:  # Empty for a seeded reply with no question before it
+                history.append({"role": "user", "content": message})
+            if response:
+                history.append({"role": "assistant", "content": response})
+        return history
+
+    def _insert_turns(self, session_id: str, turns: List[Tuple[str, Optional[str]]], user_id: Optional[int]):
+        pool = self._get_pool()
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                # One transaction shares created_at, so ids keep the turns in order
+                cursor.executemany("""
+                    INSERT INTO chat_messages (user_id, message, response, context)
+                    VALUES (%s, %s, %s, %s)
+                """, [(user_id, message, reply, json.dumps({"session_id": session_id})) for message, reply in turns])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            pool.putconn(conn)
+
+    async def load(self, session_id: str, user_id: Optional[int] = None) -> Optional[List[dict]]:
+        entry = self._get(session_id)
+        if entry is not None:
+            return list(entry[1]) if entry[0] == user_id else None
+        async with self._slots:
+            history = await asyncio.to_thread(self._query_history, session_id, user_id)
+        if not history:
+            # Sessions are only persisted with their first turn
+            return None
+        self._put(session_id, history, user_id)
+        return history
+
+    async def _persist(self, session_id: str, turns: List[Tuple[str, Optional[str]]], user_id: Optional[int]):
+        try:
+            async with self._slots:
+                await asyncio.to_thread(self._insert_turns, session_id, turns, user_id)
+        except Exception as e:
+            # The turns are still in memory; losing persistence must not fail the reply
+            logger.warning(f"Persisting chat turns failed: {e}")
+
+    async def seed(self, session_id: str, history: List[dict], user_id: Optional[int] = None):
+        await super().seed(session_id, history, user_id)
+        turns = history_turns(history)
+        if turns:
+            await self._persist(session_id, turns, user_id)
+
+    async def append_turn(self, session_id: str, message: str, reply: str, user_id: Optional[int] = None):
+        await super().append_turn(session_id, message, reply, user_id)
+        await self._persist(session_id, [(message, reply)], user_id)
+
+def create_session_store(backend: str, max_sessions: int, max_messages: int) -> InMemorySessionStore:
+    if backend == "postgres":
+        return PostgresSessionStore(max_sessions, max_messages)
+    return InMemorySessionStore(max_sessions, max_messages)
@@ -0,0 +1,181 @@
+"""
+Keyword rule engine for assistant suggestions and action items
+A declarative rule table is compiled once into word-boundary keyword matchers,
+and the rules that fire are ranked by score rather than table order
+"""
+
+import json
+from typing import List, Dict, Any, Tuple
+
+PRIORITY_WEIGHTS = {"high": 3, "medium": 2, "low": 1}
+
+# Keywords match whole words; a trailing "*" matches any word starting with the stem
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {
+        "name": "methodology",
+        "keywords": ["method*", "approach*"],
+        "weight": 1.0,
+        "suggestions": [
+            "Explore quantitative vs qualitative approaches",
+            "Consider mixed-methods research design",
+            "Review ethical considerations for your study"
+        ],
+        "actions": []
+    },
+    {
+        "name": "methodology-planning",
+        "keywords": ["methodolog*", "research design"],
+        "weight": 1.0,
+        "suggestions": [],
+        "actions": [
+            {"task": "Select appropriate research design", "priority": "high", "estimated_time": "1-2 hours"},
+            {"task": "Identify data collection methods", "priority": "medium", "estimated_time": "2-3 hours"}
+        ]
+    },
+    {
+        "name": "literature-review",
+        "keywords": ["literature", "review*", "sources", "references"],
+        "weight": 1.0,
+        "suggestions": [
+            "Set up systematic search strategies",
+            "Use citation management tools",
+            "Identify key databases for your field"
+        ],
+        "actions": []
+    },
+    {
+        "name": "data-analysis",
+        "keywords": ["data", "dataset*", "analy*", "statistic*"],
+        "weight": 1.0,
+        "suggestions": [
+            "Choose appropriate statistical tests",
+            "Consider sample size requirements",
+            "Plan for data visualization"
+        ],
+        "actions": [
+            {"task": "Choose statistical software (R, SPSS, Python)", "priority": "medium", "estimated_time": "1 hour"},
+            {"task": "Prepare data cleaning protocol", "priority": "high", "estimated_time": "2-4 hours"}
+        ]
+    },
+    {
+        "name": "writing-publication",
+        "keywords": ["writ*", "paper*", "manuscript*", "publi*", "journal*"],
+        "weight": 1.0,
+        "suggestions": [
+            "Identify target journals",
+            "Follow journal formatting guidelines",
+            "Plan peer review timeline"
+        ],
+        "actions": []
+    },
+    {
+        "name": "research-planning",
+        "keywords": ["start*", "begin*", "plan*"],
+        "weight": 1.0,
+        "suggestions": [],
+        "actions": [
+            {"task": "Define research question and objectives", "priority": "high", "estimated_time": "2-3 hours"},
+            {"task": "Conduct preliminary literature search", "priority": "high", "estimated_time": "4-6 hours"}
+        ]
+    }
+]
+
+def load_rules(path: str) -> List[Dict[str, Any]]:
+    """Load a rule table from a JSON file with the same shape as DEFAULT_RULES"""
+    with open(path) as f:
+        return json.load(f)
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+class _Keyword:
+    """A keyword compiled for whole-word matching with plain substring search"""
+
+    __slots__ = ("literal", "is_prefix", "rules")
+
+    def __init__(self, keyword: str):
+        self.is_prefix = keyword.endswith("*")
+        self.literal = keyword[:-1] if self.is_prefix else keyword
+        self.rules: List[int] = []
+
+    def occurs_in(self, text: str) -> bool:
+        """True if the literal starts a word in `text` (and ends one, unless it is a prefix)"""
+        literal = self.literal
+        start = text.find(literal)
+        while start != -1:
+            end = start + len(literal)
+            if (start == 0 or not _is_word_char(text[start - 1])) and (
+                self.is_prefix or end == len(text) or not _is_word_char(text[end])
+            ):
+                return True
+            start = text.find(literal, start + 1)
+        return False
+
+class RuleEngine:
+    """Matches messages against a compiled rule table"""
+
+    def __init__(self, rules: List[Dict[str, Any]] = None):
+        self.rules = rules if rules is not None else DEFAULT_RULES
+
+        # Each distinct keyword is compiled once and shared by every rule that lists it
+        keywords: Dict[str, _Keyword] = {}
+        for index, rule in enumerate(self.rules):
+            for keyword in {keyword.lower() for keyword in rule["keywords"]}:
+                if keyword not in keywords:
+                    keywords[keyword] = _Keyword(keyword)
+                keywords[keyword].rules.append(index)
+        self._keywords = list(keywords.values())
+        self._action_weights = [
+            [PRIORITY_WEIGHTS.get(action.get("priority"), 1) for action in rule["actions"]]
+            for rule in self.rules
+        ]
+
+    def match(self, text: str) -> Dict[int, float]:
+        """Score every rule that fires on `text`: its weight times the number of
+        distinct keywords it matched. The message is lowercased once, then
+        probed once per distinct keyword with C-level substring search, each
+        hit checked for word boundaries"""
+        text = text.lower()
+        scores: Dict[int, float] = {}
+        for keyword in self._keywords:
+            if keyword.occurs_in(text):
+                for index in keyword.rules:
+                    scores[index] = scores.get(index, 0.0) + self.rules[index].get("weight", 1.0)
+        return scores
+
+    def _ranked_rules(self, scores: Dict[int, float]) -> List[int]:
+        # Stable sort: equal scores keep rule-table order
+        return sorted(scores, key=lambda index: (-scores[index], index))
+
+    def suggestions(self, scores: Dict[int, float], limit: int = 3) -> List[str]:
+        ranked = []
+        for index in self._ranked_rules(scores):
+            for suggestion in self.rules[index]["suggestions"]:
+                if suggestion not in ranked:
+                    ranked.append(suggestion)
+            if len(ranked) >= limit:
+                break
+        return ranked[:limit]
+
+    def action_items(self, scores: Dict[int, float], limit: int = 3) -> List[dict]:
+        # An action ranks by its rule's score scaled by its own priority; ties keep table order
+        candidates = sorted(
+            (-scores[index] * weight, index, position)
+            for index in scores
+            for position, weight in enumerate(self._action_weights[index])
+        )
+
+        ranked, seen = [], set()
+        for _, index, position in candidates:
+            action = self.rules[index]["actions"][position]
+            if action["task"] not in seen:
+                seen.add(action["task"])
+                ranked.append(dict(action))
+                if len(ranked) == limit:
+                    break
+        return ranked
+
+    def evaluate(self, text: str, limit: int = 3) -> Tuple[List[str], List[dict]]:
+        """Suggestions and action items for `text`, ranked from one call to match"""
+        scores = self.match(text)
+        return self.suggestions(scores, limit), self.action_items(scores, limit)
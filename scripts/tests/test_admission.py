@@ -0,0 +1,80 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import admission as admission_module
+from admission import AdmissionController, AdmissionRejected, TokenBucket
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    # Only admission's view of the clock; the event loop keeps the real one
+    monkeypatch.setattr(admission_module, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+def test_token_bucket_refills_at_its_rate(clock):
+    bucket = TokenBucket(rate=2.0, burst=4)
+    assert all(bucket.take() == 0 for _ in range(4))
+    assert bucket.take() == pytest.approx(0.5)
+    clock.now += 0.5
+    assert bucket.take() == 0
+    clock.now += 100
+    assert bucket.tokens == 0
+    bucket.take(0)
+    assert bucket.tokens == 4  # Never above the burst
+
+def test_token_bucket_lets_a_full_bucket_go_into_debt(clock):
+    bucket = TokenBucket(rate=1.0, burst=5)
+    bucket.take(2)
+    assert bucket.take(12) == pytest.approx(2.0)  # Waits for a full bucket, not for 12 tokens
+    clock.now += 2
+    assert bucket.take(12) == 0
+    assert bucket.take() == pytest.approx(8.0)  # Repays the 7 tokens of debt first
+
+def test_charge_rejects_with_retry_after(clock):
+    controller = AdmissionController(rate_per_minute=60, burst=3)
+    controller.charge("client", cost=3)
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.charge("client", cost=2)
+    assert (rejected.value.status_code, rejected.value.retry_after) == (429, 2)
+    controller.charge("other")  # Buckets are per client
+    assert controller.stats()["rejected"]["rate_limited"] == 1
+
+def test_slot_release_is_idempotent():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=0)
+        slot = await controller.acquire("client")
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("client")
+        assert rejected.value.status_code == 503
+        slot.release()
+        slot.release()
+        assert controller.in_flight == 0
+        # A double release must not have freed a second slot
+        second = await controller.acquire(None)
+        with pytest.raises(AdmissionRejected):
+            await controller.acquire(None)
+        second.release()
+        return controller
+
+    assert asyncio.run(scenario()).stats()["rejected"]["queue_full"] == 2
+
+def test_queued_request_times_out():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=1, queue_timeout=0.01)
+        async with controller.admit("client"):
+            with pytest.raises(AdmissionRejected) as rejected:
+                await controller.acquire("client")
+        return controller, rejected.value
+
+    controller, rejected = asyncio.run(scenario())
+    assert rejected.detail == "Timed out waiting for capacity"
+    assert controller.stats()["in_flight"] == controller.stats()["waiting"] == 0
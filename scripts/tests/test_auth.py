@@ -0,0 +1,66 @@
+import asyncio
+import threading
+import time
+
+from auth import SessionAuthenticator, session_token
+
+def test_session_token_prefers_a_bearer_header():
+    assert session_token({"authorization": "Bearer abc"}, {"session_token": "cookie"}) == "abc"
+    assert session_token({"authorization": "Basic abc"}, {"session_token": "cookie"}) == "cookie"
+    assert session_token({}, {}) is None
+    assert session_token({"authorization": "Bearer "}, {}) is None
+
+def authenticator(sessions, **kwargs):
+    auth = SessionAuthenticator(**kwargs)
+    active = {"now": 0, "most": 0}
+    lock = threading.Lock()
+
+    def lookup(token):
+        with lock:
+            active["now"] += 1
+            active["most"] = max(active["most"], active["now"])
+        time.sleep(0.005)
+        with lock:
+            active["now"] -= 1
+        return sessions.get(token, (None, None))
+
+    auth._lookup = lookup
+    return auth, active
+
+def test_lookups_are_cached_including_misses():
+    auth, _ = authenticator({"good": (7, 3600.0)})
+
+    async def scenario():
+        return [await auth.user_id(token) for token in ("good", "good", "bad", "bad", None)]
+
+    assert asyncio.run(scenario()) == [7, 7, None, None, None]
+    assert auth.lookups == 2
+
+def test_cached_sessions_expire_with_the_session():
+    auth, _ = authenticator({"short": (7, 0.0)}, cache_ttl=60)
+
+    async def scenario():
+        await auth.user_id("short")
+        await auth.user_id("short")
+
+    asyncio.run(scenario())
+    assert auth.lookups == 2
+
+def test_concurrent_lookups_stay_within_the_pool():
+    auth, active = authenticator({f"t{n}": (n, 60.0) for n in range(30)}, pool_size=3)
+
+    async def scenario():
+        return await asyncio.gather(*(auth.user_id(f"t{n}") for n in range(30)))
+
+    assert asyncio.run(scenario()) == list(range(30))
+    assert active["most"] <= 3
+
+def test_cache_is_bounded():
+    auth, _ = authenticator({}, cache_size=2)
+
+    async def scenario():
+        for token in ("a", "b", "c"):
+            await auth.user_id(token)
+
+    asyncio.run(scenario())
+    assert auth.stats()["cached_tokens"] == 2
@@ -0,0 +1,22 @@
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from benchmark_queries import compare
+
+def stats(p95_ms):
+    return {"count": 100, "errors": 0, "qps": 10.0, "p50_ms": 1.0, "p95_ms": p95_ms, "p99_ms": 9.0, "max_ms": 9.0}
+
+def test_compare_flags_slower_and_failing_queries():
+    baseline = {"queries": {"fast": stats(2.0), "slow": stats(2.0), "broken": stats(2.0)}}
+    report = {"queries": {
+        "fast": stats(2.1),
+        "slow": stats(3.0),
+        "broken": {"count": 0, "errors": 12, "failed": True, "error": 'column "x" does not exist'},
+        "added": stats(1.0),
+    }}
+    assert compare(report, baseline, threshold=1.25) == ["slow: p95 1.50x", "broken: every run failed"]
+
+def test_compare_accepts_a_query_that_failed_in_the_baseline():
+    baseline = {"queries": {"fixed": {"count": 0, "errors": 3, "failed": True, "error": "boom"}}}
+    assert compare({"queries": {"fixed": stats(5.0)}}, baseline, threshold=1.25) == []
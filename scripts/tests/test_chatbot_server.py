@@ -0,0 +1,207 @@
+import json
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+import chatbot_server
+from admission import AdmissionController
+from chatbot_server import AdmittedStreamingResponse, ChatResponse
+from session_store import InMemorySessionStore
+
+@pytest.fixture
+def admission(monkeypatch):
+    controller = AdmissionController(max_concurrency=2, max_queue=100, rate_per_minute=60, burst=5)
+    monkeypatch.setattr(chatbot_server, "admission", controller)
+    return controller
+
+@pytest.fixture
+def client():
+    return TestClient(chatbot_server.app)
+
+def test_streaming_response_releases_its_slot_if_the_body_never_starts(admission):
+    async def body():
+        yield "never sent"
+
+    async def scenario():
+        slot = await admission.acquire("client")
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            raise OSError("client went away")
+
+        with pytest.raises(OSError):
+            await AdmittedStreamingResponse(body(), slot)({"type": "http"}, receive, send)
+
+    asyncio.run(scenario())
+    assert admission.in_flight == 0
+
+def test_batch_items_are_rate_limited_and_hold_slots(admission, client, monkeypatch):
+    running = {"now": 0, "most": 0}
+
+    async def generate(message, history=None, user_id=None):
+        running["now"] += 1
+        running["most"] = max(running["most"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        return ChatResponse(response=message.upper(), suggestions=[], action_items=[], timestamp="now")
+
+    monkeypatch.setattr(chatbot_server.research_assistant, "agenerate_response", generate)
+    items = [{"id": str(n), "message": f"question {n}"} for n in range(8)]
+    response = client.post("/chat/batch", json={"items": items, "concurrency": 8})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["result"]["response"] for line in lines) == sorted(f"QUESTION {n}" for n in range(8))
+    # Batch concurrency is capped by the global slots, and every slot is back
+    assert running["most"] <= 2
+    assert admission.in_flight == 0
+
+    # Eight items from a bucket of five leave the client in debt
+    rejected = client.post("/chat/batch", json={"items": items[:1]})
+    assert rejected.status_code == 429
+    assert int(rejected.headers["retry-after"]) >= 3
+
+class FakeAuthenticator:
+    def __init__(self, sessions):
+        self.sessions = sessions
+        self.lookups = 0
+
+    async def user_id(self, token):
+        return self.sessions.get(token)
+
+class FakeNotesIndex:
+    def __init__(self):
+        self.searched = []
+
+    async def search(self, user_id, query, k, snippet_chars):
+        self.searched.append(user_id)
+        return []
+
+    def invalidate(self, user_id):
+        self.searched.append(user_id)
+
+@pytest.fixture
+def signed_in(monkeypatch):
+    monkeypatch.setattr(chatbot_server, "authenticator", FakeAuthenticator({"alice-token": 1, "bob-token": 2}))
+
+def test_retrieval_searches_only_the_signed_in_users_notes(client, signed_in, monkeypatch):
+    notes = FakeNotesIndex()
+    monkeypatch.setattr(chatbot_server, "notes_index", notes)
+    assert client.get("/retrieval/search", params={"q": "methods", "user_id": 1}).status_code == 401
+    assert client.get("/retrieval/search", params={"q": "methods"},
+                      headers={"Authorization": "Bearer nobody"}).status_code == 401
+
+    response = client.get("/retrieval/search", params={"q": "methods", "user_id": 1},
+                          headers={"Authorization": "Bearer bob-token"})
+    assert response.json() == {"user_id": 2, "hits": []}
+    client.cookies.set("session_token", "alice-token")
+    assert client.post("/retrieval/refresh").json()["user_id"] == 1
+    assert notes.searched == [2, 1]
+
+def test_chat_grounds_on_the_session_user_not_the_request_body(admission, client, signed_in, monkeypatch):
+    grounded = []
+
+    async def generate(message, history=None, user_id=None):
+        grounded.append(user_id)
+        return ChatResponse(response="ok", suggestions=[], action_items=[], timestamp="now")
+
+    monkeypatch.setattr(chatbot_server.research_assistant, "agenerate_response", generate)
+    client.post("/chat", json={"message": "hi", "user_id": 1})
+    client.post("/chat", json={"message": "hi", "user_id": 1}, headers={"Authorization": "Bearer bob-token"})
+    assert grounded == [None, 2]
+
+class FakeRecommender:
+    index = object()
+
+    def recommend(self, user_id, k):
+        return [{"user_id": user_id + 100, "score": 1.0}][:k]
+
+def test_collaborators_are_recommended_for_the_signed_in_user(client, signed_in, monkeypatch):
+    monkeypatch.setattr(chatbot_server, "collaborators", FakeRecommender())
+    assert client.get("/collaborators").status_code == 401
+    assert client.get("/collaborators/1").status_code == 404
+
+    response = client.get("/collaborators", headers={"Authorization": "Bearer bob-token"})
+    assert response.json() == {"user_id": 2, "collaborators": [{"user_id": 102, "score": 1.0}]}
+
+class FakeFeedReader:
+    def __init__(self):
+        self.pages = []
+
+    async def aread(self, user_id, limit=50, before=None):
+        self.pages.append((user_id, before))
+        return [{"type": "paper", "id": 7, "created_at": "2025-03-01T12:00:00+00:00"}]
+
+def test_feed_is_read_for_the_signed_in_user_with_a_keyset_cursor(client, signed_in, monkeypatch):
+    import feed_worker
+
+    feeds = FakeFeedReader()
+    monkeypatch.setattr(chatbot_server, "feed_reader", feeds)
+    monkeypatch.setattr(chatbot_server, "decode_cursor", feed_worker.decode_cursor, raising=False)
+    monkeypatch.setattr(chatbot_server, "encode_cursor", feed_worker.encode_cursor, raising=False)
+    assert client.get("/feed").status_code == 401
+    assert client.get("/feed/1").status_code == 404
+
+    alice = {"Authorization": "Bearer alice-token"}
+    next_before = client.get("/feed", headers=alice).json()["next_before"]
+    assert client.get("/feed", params={"before": next_before}, headers=alice).json()["user_id"] == 1
+    assert client.get("/feed", params={"before": "yesterday"}, headers=alice).status_code == 400
+    assert feeds.pages == [(1, None), (1, feed_worker.decode_cursor(next_before))]
+
+def test_sessions_are_private_to_the_user_who_started_them(admission, client, signed_in, monkeypatch):
+    async def generate(message, history=None, user_id=None):
+        return ChatResponse(response=f"reply to {message}", suggestions=[], action_items=[], timestamp="now")
+
+    monkeypatch.setattr(chatbot_server, "session_store", InMemorySessionStore())
+    monkeypatch.setattr(chatbot_server.research_assistant, "agenerate_response", generate)
+    alice, bob = {"Authorization": "Bearer alice-token"}, {"Authorization": "Bearer bob-token"}
+    session_id = client.post("/chat", json={"message": "hi", "start_session": True}, headers=alice).json()["session_id"]
+
+    assert client.get(f"/sessions/{session_id}", headers=alice).json()["history"][1]["content"] == "reply to hi"
+    for headers in (bob, {}):
+        assert client.get(f"/sessions/{session_id}", headers=headers).status_code == 404
+        assert client.post("/chat", json={"message": "more", "session_id": session_id}, headers=headers).status_code == 404
+        assert client.post("/chat/stream", json={"message": "more", "session_id": session_id},
+                           headers=headers).status_code == 404
+    assert len(client.get(f"/sessions/{session_id}", headers=alice).json()["history"]) == 2
+    assert admission.in_flight == 0
+
+def test_unknown_sessions_are_not_started_implicitly(admission, client, monkeypatch):
+    store = InMemorySessionStore()
+    monkeypatch.setattr(chatbot_server, "session_store", store)
+    assert client.post("/chat", json={"message": "hi", "session_id": "made-up"}).status_code == 404
+    assert store.stats()["sessions"] == 0
+
+class FakeCompletionClient:
+    closed = False
+
+    async def aclose(self):
+        self.closed = True
+
+class RefreshingRecommender(FakeRecommender):
+    index = None
+    refresh_interval = 3600
+
+    def __init__(self):
+        self.refreshed = threading.Event()
+
+    def refresh(self):
+        self.index = object()
+        self.refreshed.set()
+
+def test_lifespan_starts_index_refresh_and_closes_the_client(monkeypatch):
+    completion = FakeCompletionClient()
+    recommender = RefreshingRecommender()
+    monkeypatch.setattr(chatbot_server, "completion_client", completion)
+    monkeypatch.setattr(chatbot_server, "collaborators", recommender)
+    with TestClient(chatbot_server.app):
+        assert recommender.refreshed.wait(5)
+        assert not completion.closed
+    assert completion.closed
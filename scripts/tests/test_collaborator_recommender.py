@@ -0,0 +1,82 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from collaborator_recommender import CollaboratorRecommender
+
+START = datetime(2025, 1, 1)
+TOPICS = ["genomics", "ecology", "optics", "number theory"]
+
+def profiles(count, changed_at=START):
+    return [(user_id, [TOPICS[user_id % 4], f"area {user_id % 7}"], ["surveys"], [TOPICS[user_id % 4]],
+             True, "public", changed_at + timedelta(seconds=user_id)) for user_id in range(1, count + 1)]
+
+class FakeDatabase:
+    """Stands in for the profile and follow queries of one recommender"""
+
+    def __init__(self, recommender, rows):
+        self.rows = rows
+        self.queries = 0
+        recommender._connect = lambda: self
+        recommender._profiles = self.profiles
+        recommender._follows = lambda conn, since: []
+
+    def profiles(self, conn, since):
+        self.queries += 1
+        return [row for row in self.rows if since is None or row[6] >= since]
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def workers(tmp_path):
+    shared = str(tmp_path / "collaborators")
+    leader = CollaboratorRecommender(top_k=3, shared_dir=shared)
+    follower = CollaboratorRecommender(top_k=3, shared_dir=shared)
+    rows = profiles(40)
+    yield leader, FakeDatabase(leader, rows), follower, FakeDatabase(follower, rows)
+    for recommender in (leader, follower):
+        if recommender._leader_fd is not None:
+            os.close(recommender._leader_fd)
+
+def test_only_the_leader_queries_and_followers_map_its_index(workers):
+    leader, leader_db, follower, follower_db = workers
+    leader.refresh()
+    follower.refresh()
+    assert leader.stats()["leader"] and not follower.stats()["leader"]
+    assert follower_db.queries == 0
+    assert isinstance(follower.index.neighbors, np.memmap)
+    assert all(follower.recommend(user_id) == leader.recommend(user_id) for user_id in range(1, 41))
+
+def test_followers_pick_up_incremental_refreshes(workers):
+    leader, leader_db, follower, _ = workers
+    leader.refresh()
+    follower.refresh()
+    before = follower.published
+
+    # User 1 moves to optics
+    changed = START + timedelta(days=1)
+    leader_db.rows[0] = (1, ["optics"], ["surveys"], ["optics"], True, "public", changed)
+    leader.refresh()
+    follower.refresh()
+    assert follower.published != before and follower.profiles_seen == changed
+    assert follower.recommend(1) == leader.recommend(1)
+    assert {TOPICS[neighbor["user_id"] % 4] for neighbor in follower.recommend(1)} == {"optics"}
+    # Only the current and previous generations are kept
+    assert len([name for name in os.listdir(leader.shared_dir) if name.isdigit()]) == 2
+
+def test_a_follower_takes_over_from_the_published_index_when_the_leader_exits(workers):
+    leader, leader_db, follower, follower_db = workers
+    leader.refresh()
+    os.close(leader._leader_fd)
+    leader._leader_fd = None
+
+    follower.refresh()
+    # It continued from the leader's watermarks instead of rebuilding
+    assert follower.stats()["leader"]
+    assert follower_db.queries == 1 and follower.refreshes == 1
+    assert follower.recommend(5) == leader.recommend(5)
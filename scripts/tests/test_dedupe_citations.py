@@ -0,0 +1,95 @@
+import io
+import json
+from collections import Counter
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("psycopg2")
+
+import dedupe_citations
+from dedupe_citations import Block, MinHasher, dedupe, find_clusters, normalize_doi, normalize_title
+
+def signatures(hasher, rows):
+    titles = [normalize_title(title) for title, _ in rows]
+    codes, shingle_rows = hasher.shingles(titles, [authors for _, authors in rows])
+    return hasher.signatures(codes, shingle_rows, len(rows))
+
+def test_identical_rows_share_every_band_and_unrelated_rows_none():
+    hasher = MinHasher(num_perm=64, bands=16)
+    keys = hasher.band_keys(signatures(hasher, [
+        ("Deep Learning for Protein Folding", ["Smith, J."]),
+        ("Deep learning for protein folding.", ["J. Smith"]),
+        ("A Survey of Medieval Trade Routes", ["Garcia, M."]),
+    ]))
+    assert keys.shape == (3, 16)
+    assert (keys[0] == keys[1]).all()
+    assert not (keys[0] == keys[2]).any()
+
+def test_signature_agreement_tracks_jaccard_similarity():
+    hasher = MinHasher(num_perm=256, bands=64)
+    sig = signatures(hasher, [
+        ("Graph neural networks for molecular property prediction", ["Lee, K."]),
+        ("Graph neural networks for molecular property predictions", ["Lee, K."]),
+        ("Graph neural networks", ["Chen, W."]),
+    ])
+    assert (sig[0] == sig[1]).mean() > 0.85
+    assert (sig[0] == sig[2]).mean() < 0.5
+
+def block_of(rows, hasher):
+    """rows: (id, user_id, title, authors, doi)"""
+    block = Block()
+    titles = [normalize_title(row[2]) for row in rows]
+    codes, shingle_rows = hasher.shingles(titles, [row[3] for row in rows])
+    sig = hasher.signatures(codes, shingle_rows, len(rows))
+    block.add(np.array([row[0] for row in rows]), np.array([row[1] for row in rows]),
+              [normalize_doi(row[4]) for row in rows], sig, hasher.band_keys(sig),
+              np.bincount(shingle_rows, minlength=len(rows)) > 0)
+    return block
+
+def test_rows_without_title_or_authors_are_not_clustered_by_minhash():
+    hasher = MinHasher()
+    block = block_of([(i, 1, "", [], None) for i in range(5)], hasher)
+    stats = Counter()
+    assert list(find_clusters(block, hasher, 0.7, 200, stats)) == []
+    assert stats["candidate_pairs"] == 0
+
+def test_doi_groups_larger_than_max_bucket_are_clustered_whole():
+    hasher = MinHasher()
+    rows = [(i, 1, f"Untitled import {i}", [], "https://doi.org/10.1000/XYZ") for i in range(1, 51)]
+    rows.append((51, 2, "Other user", [], "10.1000/xyz"))
+    stats = Counter()
+    clusters = list(find_clusters(block_of(rows, hasher), hasher, 0.7, max_bucket=10, stats=stats))
+    assert [cluster["ids"] for cluster in clusters] == [list(range(1, 51))]
+    # Linked in a chain, not every pair
+    assert stats["doi_links"] == 49
+
+def test_blocks_end_at_the_first_user_change_past_block_rows(monkeypatch):
+    users = [1] * 3 + [2] * 4 + [3] * 2 + [4] * 6 + [5]
+    rows = [(i, user, f"Paper {i}", ["Author"], None) for i, user in enumerate(users)]
+    blocks = []
+
+    def record(block, *args):
+        blocks.append(sorted(set(int(user) for part in block.scopes for user in part)))
+        return iter(())
+
+    # One fetch chunk holding every user, so only the user change can end a block
+    monkeypatch.setattr(dedupe_citations, "stream_citations", lambda conn, per_user, fetch_rows: iter([rows]))
+    monkeypatch.setattr(dedupe_citations, "find_clusters", record)
+    stats = dedupe(None, io.StringIO(), block_rows=3)
+    # User 3 alone is under block_rows, so user 4 joins it
+    assert blocks == [[1], [2], [3, 4], [5]]
+    assert stats["rows"] == len(rows)
+
+def test_clusters_are_written_as_json_lines(monkeypatch):
+    rows = [
+        (1, 7, "Attention Is All You Need", ["Vaswani, A."], None),
+        (2, 7, "Attention is all you need", ["A. Vaswani"], None),
+        (3, 7, "Something else entirely", ["Doe, J."], None),
+    ]
+    monkeypatch.setattr(dedupe_citations, "stream_citations", lambda conn, per_user, fetch_rows: iter([rows[:2], rows[2:]]))
+    output = io.StringIO()
+    dedupe(None, output)
+    assert [json.loads(line) for line in output.getvalue().splitlines()] == [
+        {"cluster": 1, "ids": [1, 2], "keep": 1, "matched_by": ["minhash"], "user_id": 7}
+    ]
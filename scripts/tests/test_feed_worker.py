@@ -0,0 +1,54 @@
+import time
+import asyncio
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+
+import pytest
+
+from feed_worker import FeedReader, FeedWorker, decode_cursor, encode_cursor
+
+def test_cursor_round_trips_the_full_feed_position():
+    created_at = datetime(2025, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    item = {"type": "paper", "id": 42, "created_at": created_at.isoformat()}
+    cursor = encode_cursor(item)
+    assert cursor == "1740832215123456.paper.42"
+    assert decode_cursor(cursor) == (created_at, "paper", 42)
+
+@pytest.mark.parametrize("value", ["", "2025-03-01", "1.paper", "1.user.2", "x.paper.2", "1.paper.2.3"])
+def test_malformed_cursors_are_rejected(value):
+    with pytest.raises(ValueError):
+        decode_cursor(value)
+
+def test_feeds_are_queued_for_trim_once_they_outgrow_the_slack():
+    worker = FeedWorker(conn=None, feed_length=100, trim_slack=10)
+    worker.lengths = {1: 100, 2: 95}
+    worker._grew(Counter({1: 10, 2: 10, 3: 1}))
+    # Unmeasured feeds are always trimmed; measured ones only past feed_length + trim_slack
+    assert worker.untrimmed == {3}
+    assert worker.lengths == {1: 110, 2: 105}
+    worker._grew(Counter({1: 1, 2: 1}))
+    assert worker.untrimmed == {1, 3}
+
+def test_async_reads_never_take_more_connections_than_the_pool_has():
+    reader = FeedReader(pool_size=2)
+    running = {"now": 0, "most": 0}
+    lock = threading.Lock()
+
+    def read(user_id, limit=50, before=None):
+        with lock:
+            running["now"] += 1
+            running["most"] = max(running["most"], running["now"])
+        time.sleep(0.01)
+        with lock:
+            running["now"] -= 1
+        return [{"user_id": user_id}]
+
+    reader.read = read
+
+    async def scenario():
+        return await asyncio.gather(*(reader.aread(user_id) for user_id in range(10)))
+
+    pages = asyncio.run(scenario())
+    assert [page[0]["user_id"] for page in pages] == list(range(10))
+    assert running["most"] == 2
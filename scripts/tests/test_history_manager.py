@@ -0,0 +1,50 @@
+import asyncio
+
+from history_manager import HistoryManager
+
+class WordCounter:
+    """One token per word plus one of framing, so budgets are easy to read"""
+
+    def message_tokens(self, message):
+        return len(message["content"].split()) + 1
+
+def turns(*lengths):
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": " ".join(["w"] * n)}
+            for i, n in enumerate(lengths)]
+
+def test_fit_keeps_the_longest_newest_run_within_budget():
+    manager = HistoryManager(WordCounter(), token_budget=10)
+    history = turns(5, 3, 4, 2)  # 6, 4, 5, 3 tokens
+    older, window = manager.fit(history)
+    assert window == history[2:] and older == history[:2]
+    assert manager.fit(history, budget=12) == (history[:1], history[1:])
+    # Stops at the first message that does not fit, even if an older one would
+    assert manager.fit(turns(1, 9, 1), budget=4) == (turns(1, 9, 1)[:2], turns(1, 9, 1)[2:])
+
+def test_fit_with_everything_or_nothing_in_budget():
+    manager = HistoryManager(WordCounter(), token_budget=100)
+    history = turns(1, 2, 3)
+    assert manager.fit(history) == ([], history)
+    assert manager.fit(history, budget=0) == (history, [])
+    assert manager.fit([]) == ([], [])
+
+def test_prepare_summarizes_dropped_turns_and_extends_the_summary_rolling():
+    calls = []
+
+    async def summarizer(previous, messages, max_tokens):
+        calls.append((previous, len(messages)))
+        return f"summary of {len(messages)} after {previous}"
+
+    manager = HistoryManager(WordCounter(), token_budget=10, summary_tokens=4, summarizer=summarizer)
+    history = turns(3, 3, 3, 3)  # 4 tokens each: the window fits one message once the summary is reserved
+
+    context = asyncio.run(manager.prepare(history))
+    assert context[0]["role"] == "system" and context[1:] == history[3:]
+    # Two more turns only summarize what was not summarized before
+    asyncio.run(manager.prepare(history + turns(3, 3)))
+    assert calls == [(None, 3), ("summary of 3 after None", 2)]
+
+def test_prepare_without_a_summarizer_returns_the_window():
+    manager = HistoryManager(WordCounter(), token_budget=8)
+    history = turns(3, 3, 3)
+    assert asyncio.run(manager.prepare(history)) == history[1:]
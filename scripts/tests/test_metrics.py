@@ -0,0 +1,49 @@
+import os
+import json
+
+import metrics
+from metrics import Counter, Gauge, Histogram, Registry, SharedMetrics
+
+LIVE_WORKER, EXITED_WORKER = 999998, 999999
+
+def worker_registry(requests, in_flight, latencies):
+    registry = Registry()
+    counter = registry.register(Counter("http_requests_total", "Requests", ("endpoint",)))
+    gauge = registry.register(Gauge("http_requests_in_flight", "In flight"))
+    histogram = registry.register(Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0)))
+    counter.inc("/chat", amount=requests)
+    gauge.set(in_flight)
+    for latency in latencies:
+        histogram.observe(latency)
+    registry.register_collector(lambda: [("cache_hits_total", "counter", "Hits", [({"backend": "memory"}, requests)])])
+    return registry
+
+def test_one_scrape_covers_every_worker(tmp_path, monkeypatch):
+    directory = str(tmp_path / "metrics")
+    shared = SharedMetrics(worker_registry(1, 2, [0.05]), directory)
+    for pid, registry in ((LIVE_WORKER, worker_registry(10, 3, [0.5, 5])), (EXITED_WORKER, worker_registry(100, 7, []))):
+        with open(os.path.join(directory, f"{pid}.json"), "w") as f:
+            json.dump(registry.families(), f)
+    monkeypatch.setattr(metrics, "_alive", lambda pid: pid != EXITED_WORKER)
+
+    lines = shared.render().splitlines()
+    # Counters include the exited worker, so totals don't drop when workers are replaced
+    assert 'http_requests_total{endpoint="/chat"} 111.0' in lines
+    assert 'cache_hits_total{backend="memory"} 111' in lines
+    # Gauges are per live worker
+    assert f'http_requests_in_flight{{pid="{os.getpid()}"}} 2' in lines
+    assert f'http_requests_in_flight{{pid="{LIVE_WORKER}"}} 3' in lines
+    assert not any(f'pid="{EXITED_WORKER}"' in line for line in lines)
+    assert lines[lines.index('latency_seconds_bucket{le="0.1"} 1') + 1:][:4] == [
+        'latency_seconds_bucket{le="1.0"} 2', 'latency_seconds_bucket{le="+Inf"} 3',
+        'latency_seconds_sum 5.55', 'latency_seconds_count 3',
+    ]
+
+def test_a_scrape_includes_the_scraped_workers_latest_samples(tmp_path):
+    registry = Registry()
+    counter = registry.register(Counter("http_requests_total", "Requests", ("endpoint",)))
+    shared = SharedMetrics(registry, str(tmp_path))
+    counter.inc("/chat")
+    shared.flush()
+    counter.inc("/chat")
+    assert 'http_requests_total{endpoint="/chat"} 2.0' in shared.render().splitlines()
@@ -0,0 +1,49 @@
+import math
+
+import pytest
+
+from notes_index import UserIndex, best_passage, tokenize
+
+def bm25(tf, df, docs, length, average, k1=1.2, b=0.75):
+    idf = math.log(1 + (docs - df + 0.5) / (df + 0.5))
+    return idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / average))
+
+def test_tokenize_drops_stopwords_and_single_characters():
+    assert tokenize("The mixed-methods study of Q&A in 2024's data") == ["mixed-methods", "study", "2024's", "data"]
+
+def test_scores_follow_bm25():
+    index = UserIndex()
+    index.upsert(("note", 1), "Protein folding", "folding folding kinetics")
+    index.upsert(("note", 2), "Survey design", "sampling frames")
+    index.upsert(("citation", 3), "Folding", "")
+    hits = index.search("folding")
+    # 3 documents of 5, 4 and 1 terms; "folding" is in two of them
+    assert [hit.key for hit in hits] == [("note", 1), ("citation", 3)]
+    assert hits[0].score == pytest.approx(bm25(3, 2, 3, 5, 10 / 3))
+    assert hits[1].score == pytest.approx(bm25(1, 2, 3, 1, 10 / 3))
+
+def test_upsert_replaces_and_remove_forgets_a_document():
+    index = UserIndex()
+    index.upsert(("note", 1), "Draft", "graphene conductivity", version=1)
+    index.upsert(("note", 1), "Draft", "perovskite stability", version=2)
+    assert index.search("graphene") == []
+    assert [hit.key for hit in index.search("perovskite")] == [("note", 1)]
+    assert len(index) == 1 and index.versions == {("note", 1): 2}
+    index.remove(("note", 1))
+    assert index.search("perovskite") == [] and len(index) == 0
+
+def test_compaction_preserves_scores():
+    churned, fresh = UserIndex(), UserIndex()
+    for round_ in range(5):
+        for i in range(40):
+            churned.upsert(("note", i), f"Note {i}", f"topic{i % 7} revision{round_} shared")
+    for i in range(40):
+        fresh.upsert(("note", i), f"Note {i}", f"topic{i % 7} revision4 shared")
+    assert churned.stats()["slots"] < 5 * 40
+    assert [(hit.key, round(hit.score, 9)) for hit in churned.search("topic3 shared", k=10)] == \
+        [(hit.key, round(hit.score, 9)) for hit in fresh.search("topic3 shared", k=10)]
+
+def test_best_passage_starts_at_the_most_relevant_sentence():
+    text = "Background on soils. Our nitrogen results were surprising. Funding was provided."
+    assert best_passage(text, {"nitrogen": 2.0}, 400) == "Our nitrogen results were surprising. Funding was provided."
+    assert best_passage(text, {"nitrogen": 2.0}, 24) == "Our nitrogen results …"
@@ -0,0 +1,91 @@
+import gc
+import asyncio
+
+from request_coalescing import SingleFlight
+
+def test_do_shares_one_call_between_concurrent_callers():
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "reply"
+
+    async def scenario():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("key", call) for _ in range(5)))
+        return flight, results
+
+    flight, results = asyncio.run(scenario())
+    assert results == ["reply"] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"upstream_calls": 1, "coalesced": 4, "in_flight": 0}
+
+def test_late_stream_subscriber_replays_from_the_start():
+    release = None
+
+    async def source():
+        yield "a"
+        yield "b"
+        await release.wait()
+        yield "c"
+
+    async def collect(stream):
+        return [chunk async for chunk in stream]
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        flight = SingleFlight()
+        first = asyncio.ensure_future(collect(flight.stream("key", source)))
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(collect(flight.stream("key", source)))
+        await asyncio.sleep(0.01)
+        release.set()
+        return flight, await first, await second
+
+    flight, first, second = asyncio.run(scenario())
+    assert first == second == ["a", "b", "c"]
+    assert flight.stats()["coalesced"] == 1
+
+def test_stream_keeps_running_without_subscribers():
+    finished = []
+
+    async def source():
+        await asyncio.sleep(0.01)
+        yield "a"
+        finished.append(True)
+
+    async def scenario():
+        flight = SingleFlight()
+        flight.stream("key", source)
+        # The flight, not the caller, owns the task pumping the stream
+        pump = flight._streams["key"].pump
+        assert isinstance(pump, asyncio.Task)
+        gc.collect()
+        await pump
+        return flight
+
+    flight = asyncio.run(scenario())
+    assert finished == [True]
+    assert flight.stats()["in_flight"] == 0
+
+def test_stream_errors_reach_every_subscriber():
+    async def source():
+        yield "a"
+        raise RuntimeError("upstream failed")
+
+    async def collect(stream):
+        chunks = []
+        try:
+            async for chunk in stream:
+                chunks.append(chunk)
+        except RuntimeError as e:
+            chunks.append(str(e))
+        return chunks
+
+    async def scenario():
+        flight = SingleFlight()
+        return await asyncio.gather(collect(flight.stream("key", source)), collect(flight.stream("key", source)))
+
+    assert asyncio.run(scenario()) == [["a", "upstream failed"]] * 2
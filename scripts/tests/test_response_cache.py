@@ -0,0 +1,62 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import response_cache as response_cache_module
+from response_cache import InMemoryCacheBackend, ResponseCache, make_cache_key
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"t": 1000.0}
+    monkeypatch.setattr(response_cache_module, "time", SimpleNamespace(monotonic=lambda: now["t"]))
+    return now
+
+def test_keys_ignore_case_spacing_and_trailing_punctuation():
+    history = [{"role": "user", "content": "Hello  there"}]
+    assert make_cache_key("Prompt", history, "What is a p-value?") == \
+        make_cache_key("prompt ", [{"role": "user", "content": "hello there"}], "what is a  P-value")
+    assert make_cache_key("Prompt", history, "What is a p-value?") != make_cache_key("Prompt", [], "What is a p-value?")
+
+def test_least_recently_used_entry_is_evicted_first(clock):
+    backend = InMemoryCacheBackend(max_entries=2)
+
+    async def scenario():
+        await backend.set("a", "1", ttl=60)
+        await backend.set("b", "2", ttl=60)
+        assert await backend.get("a") == "1"  # b is now the oldest
+        await backend.set("c", "3", ttl=60)
+        return [await backend.get(key) for key in "abc"]
+
+    assert asyncio.run(scenario()) == ["1", None, "3"]
+    assert backend.evictions == 1 and backend.size() == 2
+
+def test_entries_expire_after_their_ttl(clock):
+    backend = InMemoryCacheBackend()
+
+    async def scenario():
+        await backend.set("a", "1", ttl=60)
+        clock["t"] += 59
+        fresh = await backend.get("a")
+        clock["t"] += 1
+        return fresh, await backend.get("a")
+
+    assert asyncio.run(scenario()) == ("1", None)
+    assert backend.size() == 0
+
+class BrokenBackend(InMemoryCacheBackend):
+    async def get(self, key):
+        raise ConnectionError("redis is down")
+
+    async def set(self, key, value, ttl):
+        raise ConnectionError("redis is down")
+
+def test_backend_failures_count_as_misses():
+    cache = ResponseCache(BrokenBackend(), ttl=60)
+
+    async def scenario():
+        await cache.set("a", "1")
+        return await cache.get("a")
+
+    assert asyncio.run(scenario()) is None
+    assert cache.stats()["misses"] == 1 and cache.stats()["hit_rate"] == 0.0
@@ -0,0 +1,53 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("psycopg2")
+pytest.importorskip("bcrypt")
+
+from seed_sample_data import MISSING_USER, DataGenerator, PasswordHasher, SeedTotals, reference_time
+
+def generator():
+    return DataGenerator(seed=7, hasher=PasswordHasher(rounds=4))
+
+def follow_pairs(user_ids, start=0, end=None):
+    return [(row["follower_id"], row["following_id"])
+            for row in generator().generate_follows(user_ids, avg_follows=6, skew=1.1, start=start, end=end)]
+
+def test_seed_totals_map_user_indexes_to_ids():
+    totals = SeedTotals()
+    totals.add_users(0, [(0, 11), (2, 13)])  # Index 1 already existed
+    totals.add_users(3, [(3, 14), (4, 15)])
+    assert list(totals.user_ids(6)) == [11, MISSING_USER, 13, 14, 15, MISSING_USER]
+    assert list(totals.user_ids(2)) == [11, MISSING_USER]
+
+def test_skipped_users_do_not_shift_popularity_ranks():
+    full = list(range(101, 401))
+    pairs = follow_pairs(full)
+    skipped = {101, 103, 250}
+    partial = [MISSING_USER if user_id in skipped else user_id for user_id in full]
+    # Everyone else keeps exactly the follows they would have had
+    assert follow_pairs(partial) == [(a, b) for a, b in pairs if a not in skipped and b not in skipped]
+
+def test_follow_ranges_concatenate_to_the_whole_graph():
+    user_ids = list(range(1, 301))
+    assert follow_pairs(user_ids, 0, 120) + follow_pairs(user_ids, 120) == follow_pairs(user_ids)
+
+def test_follow_targets_are_skewed_towards_low_ranks():
+    user_ids = list(range(1, 1001))
+    followers = {}
+    for _, following in follow_pairs(user_ids):
+        followers[following] = followers.get(following, 0) + 1
+    top = sum(followers.get(user_id, 0) for user_id in user_ids[:10])
+    bottom = sum(followers.get(user_id, 0) for user_id in user_ids[-10:])
+    assert top > 10 * max(bottom, 1)
+
+def test_seeded_runs_date_from_today_unless_pinned():
+    assert generator().now == datetime.combine(date.today(), datetime.min.time())
+    assert reference_time(7, date(2025, 1, 1)) == datetime(2025, 1, 1)
+    assert datetime.now() - reference_time(None) < timedelta(seconds=5)
+
+def test_seeded_timeline_events_are_upcoming():
+    events = list(generator().generate_timeline_events([(0, 1)], {1: [10, 11]}, (3, 3)))
+    assert events and all(event["event_date"] > datetime.now() for event in events)
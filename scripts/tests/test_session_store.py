@@ -0,0 +1,144 @@
+import time
+import asyncio
+import threading
+
+from session_store import InMemorySessionStore, PostgresSessionStore, history_turns
+
+class FakeCursor:
+    def __init__(self, pool):
+        self.pool = pool
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params):
+        time.sleep(0.005)
+        session_id, user_id, limit = params
+        self.rows = [row for row in self.pool.rows if row[3] == session_id and row[0] == user_id][::-1][:limit]
+        self.rows = [(row[1], row[2]) for row in self.rows]
+
+    def executemany(self, sql, rows):
+        time.sleep(0.005)
+        for user_id, message, reply, context in rows:
+            self.pool.rows.append((user_id, message, reply, context.split('"')[3]))
+
+    def fetchall(self):
+        return self.rows
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def cursor(self):
+        return FakeCursor(self.pool)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+class FakePool:
+    """Raises like psycopg2's ThreadedConnectionPool once every connection is out"""
+
+    def __init__(self, size):
+        self.size = size
+        self.out = 0
+        self.most_out = 0
+        self.rows = []
+        self._lock = threading.Lock()
+
+    def getconn(self):
+        with self._lock:
+            if self.out >= self.size:
+                raise RuntimeError("connection pool exhausted")
+            self.out += 1
+            self.most_out = max(self.most_out, self.out)
+        return FakeConnection(self)
+
+    def putconn(self, conn):
+        with self._lock:
+            self.out -= 1
+
+def postgres_store(pool_size=2):
+    store = PostgresSessionStore(pool_size=pool_size)
+    pool = FakePool(pool_size)
+    store._get_pool = lambda: pool
+    return store, pool
+
+def test_history_turns_pairs_questions_with_replies():
+    history = [
+        {"role": "assistant", "content": "Hello"},
+        {"role": "user", "content": "Q1"},
+        {"role": "assistant", "content": "A1"},
+        {"role": "system", "content": "ignored"},
+        {"role": "user", "content": "Q2"},
+        {"content": "Q3"},
+        {"role": "assistant", "content": "A3"},
+    ]
+    assert history_turns(history) == [("", "Hello"), ("Q1", "A1"), ("Q2", None), ("Q3", "A3")]
+
+def test_in_memory_store_caps_messages_and_evicts_sessions():
+    async def scenario():
+        store = InMemorySessionStore(max_sessions=2, max_messages=4)
+        for turn in range(3):
+            await store.append_turn("a", f"q{turn}", f"r{turn}")
+        await store.seed("b", [{"role": "user", "content": "hi"}])
+        await store.load("a")  # Touch a so b is the least recently used
+        await store.append_turn("c", "q", "r")
+        return store, await store.load("a"), await store.load("b")
+
+    store, a, b = asyncio.run(scenario())
+    assert [message["content"] for message in a] == ["q1", "r1", "q2", "r2"]
+    assert b is None
+    assert store.stats()["sessions"] == 2
+
+def test_postgres_store_never_takes_more_connections_than_the_pool_holds():
+    store, pool = postgres_store(pool_size=2)
+
+    async def scenario():
+        await asyncio.gather(*(store.append_turn(f"s{i}", "q", "r", 1) for i in range(20)))
+        store._sessions.clear()
+        return await asyncio.gather(*(store.load(f"s{i}", 1) for i in range(20)))
+
+    histories = asyncio.run(scenario())
+    assert len(pool.rows) == 20
+    assert pool.most_out <= 2
+    assert all(history == [{"role": "user", "content": "q"}, {"role": "assistant", "content": "r"}]
+               for history in histories)
+
+def test_postgres_store_persists_seeded_history():
+    store, pool = postgres_store()
+    history = [{"role": "user", "content": "Q1"}, {"role": "assistant", "content": "A1"},
+               {"role": "user", "content": "Q2"}]
+
+    async def scenario():
+        await store.seed("s", history, user_id=7)
+        await store.append_turn("s", "Q3", "A3", 7)
+        store._sessions.clear()
+        return await store.load("s", 7)
+
+    reloaded = asyncio.run(scenario())
+    assert [row[:3] for row in pool.rows] == [(7, "Q1", "A1"), (7, "Q2", None), (7, "Q3", "A3")]
+    assert [message["content"] for message in reloaded] == ["Q1", "A1", "Q2", "Q3", "A3"]
+
+def test_sessions_are_only_found_for_the_user_who_started_them():
+    memory = InMemorySessionStore()
+    store, pool = postgres_store()
+
+    async def scenario(store, evict):
+        await store.seed("alice", [], user_id=1)
+        await store.append_turn("alice", "q", "r", 1)
+        await store.seed("anonymous", [{"role": "user", "content": "hi"}])
+        if evict:
+            store._sessions.clear()
+        return [await store.load("alice", 1) is not None, await store.load("alice", 2), await store.load("alice"),
+                await store.load("anonymous", 1), await store.load("unknown", 1), await store.load("anonymous") is not None]
+
+    assert asyncio.run(scenario(memory, evict=False)) == [True, None, None, None, None, True]
+    # The same holds when another worker reloads the session from the database
+    assert asyncio.run(scenario(store, evict=True)) == [True, None, None, None, None, True]
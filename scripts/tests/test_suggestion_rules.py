@@ -0,0 +1,45 @@
+import pytest
+
+from suggestion_rules import DEFAULT_RULES, RuleEngine
+
+@pytest.fixture(scope="module")
+def engine():
+    return RuleEngine()
+
+def rule_names(engine, text):
+    return {engine.rules[index]["name"] for index in engine.match(text)}
+
+def test_keywords_match_whole_words_and_stems(engine):
+    assert rule_names(engine, "Which METHODS suit this?") == {"methodology"}
+    assert rule_names(engine, "Reviewing the literature") == {"literature-review"}
+    # "data" must start and end a word; stems only need to start one
+    assert rule_names(engine, "update my metadata") == set()
+    assert rule_names(engine, "a re-analysis of the data") == {"data-analysis"}
+    assert rule_names(engine, "unplanned") == set()
+
+def test_rules_score_by_distinct_keywords_matched(engine):
+    scores = engine.match("data data dataset statistics")
+    assert list(scores.values()) == [3.0]
+
+def test_stronger_matches_rank_first_and_ties_keep_table_order():
+    rules = [
+        {"name": "a", "keywords": ["alpha"], "suggestions": ["from a"], "actions": []},
+        {"name": "b", "keywords": ["beta", "gamma"], "weight": 1.0, "suggestions": ["from b"], "actions": []},
+        {"name": "c", "keywords": ["alpha"], "suggestions": ["from c", "from a"], "actions": []},
+    ]
+    engine = RuleEngine(rules)
+    assert engine.suggestions(engine.match("alpha beta gamma")) == ["from b", "from a", "from c"]
+
+def test_actions_rank_by_rule_score_times_priority(engine):
+    suggestions, actions = engine.evaluate("How do I start planning the data analysis?")
+    assert len(suggestions) == 3
+    assert [action["priority"] for action in actions] == ["high", "high", "high"]
+    assert actions[0]["task"] == "Prepare data cleaning protocol"
+
+def test_no_match_gives_nothing(engine):
+    assert engine.evaluate("hello there") == ([], [])
+
+def test_evaluate_returns_copies_of_actions(engine):
+    _, actions = engine.evaluate("plan")
+    actions[0]["task"] = "changed"
+    assert DEFAULT_RULES[5]["actions"][0]["task"] == "Define research question and objectives"
@@ -0,0 +1,149 @@
+"""
+Synthetic research text for the sample data seeder
+Words are drawn from Zipf-distributed vocabularies with NumPy: a shared
+academic vocabulary mixed with a topical vocabulary per research interest, so
+full-text and trigram indexes see a realistic spread of lexemes
+"""
+
+import zlib
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# Real words take the top ranks; synthesized words fill the long tail
+ACADEMIC_WORDS = [
+    "the", "of", "and", "to", "in", "a", "is", "that", "for", "with", "as", "on", "by", "this", "we",
+    "are", "be", "from", "results", "data", "study", "analysis", "model", "method", "research",
+    "approach", "effect", "using", "based", "between", "significant", "these", "our", "which",
+    "findings", "sample", "evidence", "observed", "proposed", "framework", "performance",
+    "increase", "decrease", "correlation", "hypothesis", "experiment", "experimental", "measured",
+    "variables", "review", "literature", "previous", "future", "work", "limitations", "suggest",
+    "indicate", "compared", "baseline", "control", "group", "participants", "protocol", "validation",
+    "statistical", "estimate", "distribution", "parameters", "accuracy", "robust", "novel",
+    "systematic", "quantitative", "qualitative", "dataset", "collected", "methodology", "design",
+    "theory", "theoretical", "empirical", "simulation", "implementation", "evaluation", "outcomes",
+    "trend", "patterns", "factors", "impact", "mechanism", "structure", "process", "system",
+    "response", "rate", "level", "conditions", "treatment", "temperature", "measurement", "error",
+    "uncertainty", "variance", "mean", "regression", "cohort", "longitudinal", "survey", "interview",
+    "collaborators", "meeting", "draft", "revise", "next", "steps", "timeline", "deadline", "submit"
+]
+
+# Seed terms per research interest; topical vocabularies extend them with synthesized words
+TOPIC_WORDS: Dict[str, List[str]] = {
+    "Machine Learning": ["training", "neural", "network", "gradient", "loss", "classifier", "features", "overfitting", "embedding", "transformer", "inference", "supervised", "labels", "epochs"],
+    "Artificial Intelligence": ["agent", "reasoning", "planning", "knowledge", "search", "symbolic", "learning", "alignment", "language", "policy", "reward", "autonomous"],
+    "Quantum Computing": ["qubit", "entanglement", "superposition", "gate", "circuit", "decoherence", "fidelity", "annealing", "hamiltonian", "error-correction", "photonic", "topological"],
+    "Genomics": ["genome", "sequencing", "gene", "expression", "variant", "allele", "transcriptome", "chromosome", "mutation", "crispr", "rna", "methylation"],
+    "Climate Change": ["emissions", "carbon", "warming", "precipitation", "adaptation", "mitigation", "anomaly", "ocean", "ice", "scenario", "drought", "atmospheric"],
+    "Neuroscience": ["neuron", "synapse", "cortex", "plasticity", "firing", "fmri", "cognition", "hippocampus", "dopamine", "circuit", "behavioral", "electrophysiology"],
+    "Robotics": ["robot", "actuator", "manipulator", "trajectory", "sensor", "kinematics", "control", "grasping", "localization", "mapping", "locomotion", "teleoperation"],
+    "Biotechnology": ["enzyme", "protein", "fermentation", "bioreactor", "antibody", "cell", "culture", "vector", "yield", "engineering", "biomarker", "assay"],
+    "Nanotechnology": ["nanoparticle", "nanoscale", "graphene", "synthesis", "surface", "coating", "quantum-dot", "lithography", "self-assembly", "nanotube", "film", "colloid"],
+    "Data Science": ["pipeline", "visualization", "clustering", "dashboard", "feature", "outlier", "imputation", "warehouse", "query", "metrics", "sampling", "dimensionality"],
+    "Cybersecurity": ["attack", "vulnerability", "encryption", "malware", "intrusion", "authentication", "threat", "exploit", "firewall", "phishing", "privacy", "forensics"],
+    "Renewable Energy": ["solar", "wind", "turbine", "photovoltaic", "battery", "storage", "grid", "efficiency", "hydrogen", "inverter", "capacity", "biomass"],
+    "Space Exploration": ["orbit", "spacecraft", "mission", "propulsion", "satellite", "rover", "telescope", "launch", "payload", "planetary", "lunar", "exoplanet"],
+    "Drug Discovery": ["compound", "screening", "ligand", "binding", "toxicity", "trial", "dose", "pharmacokinetics", "target", "lead", "inhibitor", "efficacy"],
+    "Materials Science": ["alloy", "polymer", "crystal", "microstructure", "tensile", "fatigue", "ceramic", "composite", "phase", "diffraction", "corrosion", "annealing"],
+    "Computational Biology": ["alignment", "phylogenetic", "docking", "molecular", "dynamics", "network", "pathway", "homology", "structure", "prediction", "simulation", "metabolic"],
+}
+
+_ONSETS = ["b", "c", "d", "f", "g", "h", "k", "l", "m", "n", "p", "r", "s", "t", "v", "z",
+           "br", "cl", "cr", "dr", "fl", "gr", "pl", "pr", "sp", "st", "str", "th", "tr", "ch", "sh"]
+_NUCLEI = ["a", "e", "i", "o", "u", "ae", "ai", "ea", "io", "ou", "y"]
+_SUFFIXES = ["", "", "", "al", "ic", "ine", "ase", "ism", "ity", "ous", "ant", "ide", "ure", "ion", "ate", "omer"]
+
+def _synthesize_words(rng: np.random.Generator, count: int, exclude: set) -> List[str]:
+    """Pronounceable pseudo-words of two or three syllables, unique and not in `exclude`"""
+    words: List[str] = []
+    seen = set(exclude)
+    while len(words) < count:
+        batch = (count - len(words)) * 2
+        syllables = rng.integers(2, 4, size=batch)
+        onsets = rng.integers(0, len(_ONSETS), size=(batch, 3))
+        nuclei = rng.integers(0, len(_NUCLEI), size=(batch, 3))
+        suffixes = rng.integers(0, len(_SUFFIXES), size=batch)
+        for i in range(batch):
+            word = "".join(_ONSETS[onsets[i, j]] + _NUCLEI[nuclei[i, j]] for j in range(syllables[i]))
+            word += _SUFFIXES[suffixes[i]]
+            if word not in seen:
+                seen.add(word)
+                words.append(word)
+                if len(words) == count:
+                    break
+    return words
+
+def _zipf_cdf(size: int, exponent: float) -> np.ndarray:
+    weights = 1.0 / np.arange(1, size + 1) ** exponent
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+def stable_hash(text: str) -> int:
+    """Process-independent hash (str hashes are salted per process)"""
+    return zlib.crc32(text.encode("utf-8"))
+
+class TextCorpus:
+    """Vectorized document generator. Each token comes from the document's topic
+    vocabulary with probability topic_share and from the shared academic
+    vocabulary otherwise; ranks within a vocabulary follow a Zipf law.
+    Vocabularies are derived from the seed alone, so every process builds the
+    same corpus"""
+
+    def __init__(self, topics: Sequence[str], seed: int = 0, vocab_size: int = 20000,
+                 topic_vocab_size: int = 1500, zipf_exponent: float = 1.07,
+                 topic_share: float = 0.3, words_per_sentence: float = 14.0):
+        self.topic_share = topic_share
+        self.sentence_break = 1.0 / words_per_sentence
+        rng = np.random.default_rng([seed, stable_hash("vocabulary")])
+
+        synthesized = _synthesize_words(rng, vocab_size, set(ACADEMIC_WORDS))
+        self.general = np.array(ACADEMIC_WORDS + synthesized[:vocab_size - len(ACADEMIC_WORDS)], dtype=object)
+        self.general_cdf = _zipf_cdf(len(self.general), zipf_exponent)
+
+        # A topic ranks its seed terms first, then a topic-specific slice of the
+        # synthesized words, so topics share few rare lexemes
+        self.topics: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for topic in topics:
+            topic_rng = np.random.default_rng([seed, stable_hash(topic)])
+            seeds = [word.lower() for word in topic.split()] + TOPIC_WORDS.get(topic, [])
+            picks = topic_rng.choice(len(synthesized), size=topic_vocab_size - len(seeds), replace=False)
+            words = np.array(list(dict.fromkeys(seeds)) + [synthesized[i] for i in picks], dtype=object)
+            self.topics[topic] = (words, _zipf_cdf(len(words), zipf_exponent))
+
+    def _draw(self, rng: np.random.Generator, words: np.ndarray, cdf: np.ndarray, count: int) -> np.ndarray:
+        return words[np.minimum(np.searchsorted(cdf, rng.random(count)), len(words) - 1)]
+
+    def documents(self, rng: np.random.Generator, topics: Sequence[str], mean_words: float = 150,
+                  sigma: float = 0.6, min_words: int = 12, max_words: int = 5000) -> List[str]:
+        """One document per entry of `topics`. Lengths are log-normal with the
+        given mean word count; all tokens of the batch are sampled at once"""
+        if not topics:
+            return []
+        mu = np.log(mean_words) - sigma ** 2 / 2
+        lengths = np.clip(np.rint(rng.lognormal(mu, sigma, size=len(topics))), min_words, max_words).astype(int)
+        total = int(lengths.sum())
+
+        tokens = self._draw(rng, self.general, self.general_cdf, total)
+        topical = rng.random(total) < self.topic_share
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        for topic in set(topics):
+            mask = np.zeros(total, dtype=bool)
+            for i in (i for i, name in enumerate(topics) if name == topic):
+                mask[offsets[i]:offsets[i + 1]] = True
+            mask &= topical
+            words, cdf = self.topics[topic]
+            tokens[mask] = self._draw(rng, words, cdf, int(mask.sum()))
+
+        # Sentence ends get a period; every document ends one
+        ends = rng.random(total) < self.sentence_break
+        ends[offsets[1:] - 1] = True
+        tokens[ends] = tokens[ends] + "."
+
+        return [" ".join(tokens[offsets[i]:offsets[i + 1]]) for i in range(len(topics))]
+
+def word_count(text: str) -> int:
+    return len(text.split())
+
+def reading_time(words: int, words_per_minute: int = 200) -> int:
+    """Minutes to read `words` words, at least one"""
+    return max(1, -(-words // words_per_minute))